@@ -1,20 +1,76 @@
+import os
+import threading
 from crewai import Agent
-from tools import agent_tools
+from tools import agent_tools, clear_tool_registry
+from credentials import RunCredentials
+from llm_pool import pooled_llm
 
-def create_agents():
-    
-    # Initialize tools inside the function after API keys are set
-    search_tool, scrape_tool, read_resume_tool, semantic_search_resume_tool = agent_tools()
+# Stream the resume and interview writers' tokens into the UI and output files as they are generated
+STREAM_OUTPUTS = os.getenv("JOB_CREW_STREAM", "1") != "0"
+
+# Process-wide agent registry: one set of agents per credentials fingerprint, shared by
+# the tasks and the Crew so both always reference the same instances
+_AGENT_REGISTRY = {}
+_AGENT_REGISTRY_LOCK = threading.Lock()
+
+def create_agents(credentials=None):
+    """
+    Return the shared (researcher, profiler, resume_strategist, interview_preparer) agents
+    for these credentials (default: the process environment's)
+    """
+    credentials = credentials or RunCredentials.from_env()
+    fingerprint = credentials.fingerprint()
+    with _AGENT_REGISTRY_LOCK:
+        if fingerprint not in _AGENT_REGISTRY:
+            _AGENT_REGISTRY[fingerprint] = _build_agents(credentials)
+        return _AGENT_REGISTRY[fingerprint]
+
+def run_agents(agents):
+    """
+    Lightweight per-run copies of the shared agents.
+    Copies share the registry's tools and configuration, but each run mutates its own
+    executor state, so concurrent runs never step on each other.
+    """
+    return tuple(agent.copy() for agent in agents)
+
+def clear_agent_registry(credentials=None):
+    """Drop the cached agents and tools for these credentials, or all of them (e.g. after API keys are reset)"""
+    with _AGENT_REGISTRY_LOCK:
+        if credentials is None:
+            _AGENT_REGISTRY.clear()
+        else:
+            _AGENT_REGISTRY.pop(credentials.fingerprint(), None)
+    clear_tool_registry(credentials)
+
+def _agent_options(credentials, stream=False):
+    """Agent keyword arguments for an LLM on the shared, rate-limited client pool (empty to use CrewAI's default)"""
+    try:
+        return {"llm": pooled_llm(credentials.model, api_key=credentials.openai_api_key,
+                                  base_url=credentials.openai_base_url, stream=stream)}
+    except Exception as e:
+        print(f"Pooled LLM not available, falling back to the default: {e}")
+        return {}
+
+def _build_agents(credentials):
+
+    # Tools are built with this session's keys
+    search_tool, scrape_tool, read_resume_tool, semantic_search_resume_tool = agent_tools(credentials)
 
     # Only add valid tools (not None)
     valid_tools = [tool for tool in [scrape_tool, search_tool, read_resume_tool, semantic_search_resume_tool] if tool is not None]
 
+    # Every agent calls the model through one rate-limited client pool (see llm_pool).
+    # The resume and interview writers produce the long outputs the user waits for, so they stream
+    analyst_options = _agent_options(credentials)
+    writer_options = _agent_options(credentials, stream=STREAM_OUTPUTS)
+
     #Agent 1: Researcher
     researcher = Agent(
         role = "Elite Job Requirements Intelligence Analyst",
         goal = "Conduct deep-dive analysis of job postings to extract precise requirements, company culture indicators, and success criteria that enable perfect candidate-job alignment strategies",
         tools = [tool for tool in [scrape_tool, search_tool] if tool is not None],
         verbose = True,
+        **analyst_options,
         backstory = (
             "You are an elite recruitment intelligence specialist with 15+ years of experience analyzing job markets and hiring trends. You possess an exceptional ability to decode job postings beyond surface requirements, identifying the unspoken priorities that truly matter to hiring managers. Your analytical expertise helps candidates understand not just what employers want, but WHY they want it, enabling strategic positioning that resonates with decision-makers. You excel at detecting keyword patterns, reading between the lines of corporate language, and predicting the specific technical and cultural challenges candidates will face in interviews."
         )
@@ -26,6 +82,7 @@ def create_agents():
         goal = "Systematically extract, catalog, and analyze EVERY piece of candidate information from all provided sources to create the most comprehensive and accurate professional profile possible, ensuring zero information is overlooked",
         tools = valid_tools,
         verbose= True,
+        **analyst_options,
         backstory=(
             "You are a world-class candidate intelligence specialist with an extraordinary talent for comprehensive data extraction and professional profiling. Your expertise lies in systematically mining every detail from resumes, GitHub repositories, and personal narratives to create complete professional pictures. You possess an exceptional ability to identify patterns, connections, and evidence that others miss. Your methodical approach ensures that no skill, achievement, or experience goes unnoticed, while your analytical precision guarantees that every claim is properly sourced and verified. You understand that successful job applications depend on leveraging EVERY available piece of authentic information, strategically organized and presented."
         )
@@ -37,6 +94,7 @@ def create_agents():
         goal = "Transform comprehensive candidate data into strategically optimized, ATS-compatible resumes that maximize job requirement alignment while maintaining 100% authenticity and source traceability",
         tools= valid_tools,
         verbose= True,
+        **writer_options,
         backstory= (
             "You are a renowned resume optimization virtuoso with 12+ years of experience crafting winning resumes for top-tier candidates. Your expertise combines deep understanding of ATS algorithms, recruiter psychology, and hiring manager preferences with an unwavering commitment to authenticity. You possess an extraordinary ability to strategically reorganize, rephrase, and restructure candidate information to maximize impact without ever adding fictional content. Your strategic methodology focuses on intelligent keyword integration, achievement amplification, and relevance prioritization while maintaining complete transparency about every optimization decision made. You understand that the most powerful resumes are those that present authentic information in its most compelling and job-aligned format."
         )
@@ -48,6 +106,7 @@ def create_agents():
         goal = "Create comprehensive, evidence-based interview preparation frameworks that position candidates optimally using only their documented experiences, achievements, and skills to demonstrate perfect job-role alignment",
         tools = valid_tools,
         verbose= True,
+        **writer_options,
         backstory=(
             "You are an elite interview preparation specialist with 15+ years of experience coaching candidates to interview success at leading tech companies. Your expertise encompasses technical interview psychology, behavioral assessment strategies, and authentic storytelling techniques. You possess an exceptional ability to anticipate specific questions based on job requirements and transform candidate's real experiences into compelling, memorable interview narratives. Your preparation methodology focuses on evidence-based positioning, strategic gap management, and confidence building through authentic achievement amplification. You understand that the most successful interviews are those where candidates can authentically demonstrate their capabilities using real, documented examples that directly address employer needs."
         )
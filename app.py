@@ -2,13 +2,18 @@
 import streamlit as st
 import warnings
 import os
-import tempfile
+import time
 from pathlib import Path
-from crewai import Crew
 
-from agents import create_agents
-from tasks import agent_tasks
+from agents import clear_agent_registry
+from pipeline import run_crew, run_key
+from jobs import JOB_EXECUTOR, JobQueueFull, QUEUED, RUNNING, SUCCEEDED
+from events import get_run_events, discard_run_events
+from metrics import start_metrics_server
 from app_utils import pretty_print_result
+from credentials import RunCredentials
+from documents import file_digest, cached_resume_text, pdf_text, docx_text
+from workspace import RunWorkspace, maybe_cleanup_expired_workspaces, RESUME_FILE, TAILORED_RESUME_FILE, INTERVIEW_PREPARATION_FILE, INTERVIEW_RESUME_FILE
 
 # Optional imports with fallbacks
 try:
@@ -22,6 +27,23 @@ try:
 except ImportError:
     DOCX_AVAILABLE = False
 
+# Seconds between status checks while a background run is in progress
+JOB_POLL_INTERVAL = 2
+
+# Status labels for the crew tasks
+TASK_LABELS = {
+    "research_task": "🔍 Analyzing job requirements",
+    "profile_task": "📊 Profiling candidate",
+    "resume_strategy_task": "🎯 Tailoring resume",
+    "interview_resume_task": "🧭 Walking through the tailored resume",
+    "interview_preparation_task": "🎤 Preparing interview guide",
+}
+# Tasks whose output is streamed into the Results tab while they run, with their output files
+STREAMED_OUTPUTS = {
+    "resume_strategy_task": ("📄 Tailored Resume", TAILORED_RESUME_FILE),
+    "interview_preparation_task": ("🎤 Interview Preparation", INTERVIEW_PREPARATION_FILE),
+}
+
 # Warning Control
 warnings.filterwarnings('ignore')
 
@@ -110,6 +132,19 @@ if 'resume_content' not in st.session_state:
 if 'resume_uploaded' not in st.session_state:
     st.session_state.resume_uploaded = False
 
+# Reattach to a background run after a page refresh
+if 'job_id' not in st.session_state and "job" in st.query_params:
+    restored_job = JOB_EXECUTOR.get(st.query_params["job"])
+    if restored_job is not None:
+        st.session_state.job_id = restored_job.job_id
+        st.session_state.run_id = restored_job.metadata.get('run_id')
+
+# Expose run metrics for Prometheus when JOB_CREW_METRICS_PORT is set (once per process)
+start_metrics_server()
+
+# Remove expired run workspaces (throttled, at most once every few minutes per process)
+maybe_cleanup_expired_workspaces()
+
 def extract_text_from_pdf(pdf_file):
     """Extract text from uploaded PDF file"""
     
@@ -118,11 +153,7 @@ def extract_text_from_pdf(pdf_file):
         return ""
     
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return pdf_text(pdf_file)
     except Exception as e:
         st.error(f"Error reading PDF: {str(e)}")
         return ""
@@ -134,11 +165,7 @@ def extract_text_from_docx(docx_file):
         return ""
     
     try:
-        doc = docx.Document(docx_file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        return docx_text(docx_file)
     except Exception as e:
         st.error(f"Error reading Word document: {str(e)}")
         return ""
@@ -151,70 +178,155 @@ def extract_text_from_txt(txt_file):
         st.error(f"Error reading text file: {str(e)}")
         return ""
 
-def save_resume_content(content, filename="resume.md"):
-    """Save resume content to a temporary file"""
+def save_resume_content(content, workspace, filename=RESUME_FILE):
+    """Save resume content into the run's private workspace"""
     try:
-        temp_dir = tempfile.gettempdir()
-        file_path = os.path.join(temp_dir, filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return file_path
+        return workspace.write(filename, content)
     except Exception as e:
         st.error(f"Error saving resume: {str(e)}")
         return None
 
-def run_job_application_crew(job_url, github_url, personal_writeup, resume_path):
-    """Run the job application crew with user inputs"""
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+def run_job_application_crew(job_url, github_url, personal_writeup, resume_path, workspace, regenerate=(), credentials=None):
+    """Run the job application crew with user inputs, writing outputs to the run's workspace.
+    Unchanged tasks from earlier runs are reused; tasks named in `regenerate` always run again.
+    Every API call uses the session's `credentials`.
+    Runs on a background worker thread, so it must not call Streamlit APIs."""
+    # Prepare inputs
+    inputs = {
+        'job_posting_url': job_url,
+        'github_url': github_url,
+        'personal_writeup': personal_writeup
+    }
     
-    try:
-        # Initialize progress
-        status_text.text("🔄 Initializing AI agents...")
-        progress_bar.progress(20)
-        
-        # Create agents
-        researcher, profiler, resume_strategist, interview_preparer = create_agents()
-        
-        status_text.text("📋 Creating tasks...")
-        progress_bar.progress(40)
-        
-        # Create tasks
-        research_task, profile_task, resume_strategy_task, interview_preparation_task = agent_tasks()
-        
-        status_text.text("🤖 Setting up crew...")
-        progress_bar.progress(60)
-        
-        # Create crew
-        job_application_crew = Crew(
-            agents=[researcher, profiler, resume_strategist, interview_preparer],
-            tasks=[research_task, profile_task, resume_strategy_task, interview_preparation_task],
-            verbose=True,
-            memory=True
-        )
-        
-        status_text.text("🚀 Processing your application...")
-        progress_bar.progress(80)
-        
-        # Prepare inputs
-        inputs = {
-            'job_posting_url': job_url,
-            'github_url': github_url,
-            'personal_writeup': personal_writeup
-        }
-        
-        # Execute crew
-        result = job_application_crew.kickoff(inputs=inputs)
-        
-        progress_bar.progress(100)
-        status_text.text("✅ Complete!")
-        
-        return result
-        
-    except Exception as e:
-        progress_bar.progress(0)
-        status_text.text("❌ Error occurred")
-        raise e
+    # Create tasks and crew (reusing cached reports and unchanged task outputs when available) and execute
+    return run_crew(inputs, workspace=workspace, regenerate=regenerate, credentials=credentials)
+
+def launch_run(job_url, github_url, personal_writeup, regenerate=()):
+    """Submit a background run for this session and remember its inputs for later re-runs.
+    Identical submissions (double clicks, a second tab) attach to the run already in flight."""
+    # Each run gets its own workspace so concurrent sessions never share files
+    workspace = RunWorkspace()
+    resume_path = save_resume_content(st.session_state.resume_content, workspace)
+    credentials = st.session_state.get('credentials')
+    job_id = JOB_EXECUTOR.submit(
+        run_job_application_crew,
+        job_url,
+        github_url,
+        personal_writeup,
+        resume_path or '',
+        workspace,
+        regenerate,
+        credentials,
+        metadata={'run_id': workspace.run_id, 'credentials': credentials.fingerprint()},
+        coalesce_key=run_key(job_url, github_url, personal_writeup, st.session_state.resume_content, regenerate, credentials)
+    )
+    run_id = JOB_EXECUTOR.get(job_id).metadata.get('run_id')
+    if run_id != workspace.run_id:
+        # Attached to an identical run: its workspace holds the outputs, this one is not needed
+        workspace.cleanup()
+        st.info("ℹ️ An identical application is already being processed - showing its progress.")
+    
+    st.session_state.pop('processing_result', None)
+    st.session_state.job_id = job_id
+    st.session_state.run_id = run_id
+    st.session_state.run_inputs = (job_url, github_url, personal_writeup)
+    # Keep the job ID in the URL so a page refresh can reattach to the run
+    st.query_params["job"] = job_id
+
+def show_job_status():
+    """Poll this session's background run and collect its result once it finishes"""
+    job_id = st.session_state.get('job_id')
+    if not job_id:
+        return
+    
+    job = JOB_EXECUTOR.get(job_id)
+    if job is None:
+        st.warning("⚠️ The previous run is no longer available. Please launch it again.")
+        forget_job()
+        return
+    credentials = st.session_state.get('credentials')
+    if credentials is None or job.metadata.get('credentials') != credentials.fingerprint():
+        # E.g. a refreshed page whose keys were entered again: only the keys that paid for the run may see it
+        st.warning("⚠️ The previous run was started with different API keys. Please launch it again.")
+        forget_job()
+        return
+    
+    if job.status == QUEUED:
+        position = JOB_EXECUTOR.queue_position(job_id)
+        st.info(f"⏳ Your application is queued ({position} ahead of you)...")
+    elif job.status == RUNNING:
+        st.info(f"🤖 Elite AI specialists are strategically optimizing your application... ({int(time.time() - job.started_at)}s elapsed)")
+        show_run_progress(job.metadata.get('run_id'))
+    
+    if not job.done:
+        # Rerun once the rest of the page (including live drafts) has rendered; see poll_job_if_running
+        st.session_state.poll_job = True
+    elif job.status == SUCCEEDED:
+        if JOB_EXECUTOR.collect(job_id):
+            # Every session attached to the run has its result; otherwise the events expire with the run
+            discard_run_events(job.metadata.get('run_id'))
+        st.session_state.processing_result = job.result
+        # Other sessions share this run's workspace; leave its removal to the expiry sweep
+        st.session_state.shared_run = job.attached > 0
+        forget_job()
+        st.success("✅ Elite optimization completed successfully!")
+        st.balloons()
+    else:
+        if JOB_EXECUTOR.collect(job_id):
+            discard_run_events(job.metadata.get('run_id'))
+        forget_job()
+        st.error(f"❌ Error during processing: {str(job.error)}")
+        st.info("Please check your inputs and try again.")
+
+def show_run_progress(run_id):
+    """Progress bar driven by the run's real task, tool and LLM events"""
+    event_log = get_run_events(run_id)
+    if event_log is None:
+        return
+    finished, total, running = event_log.progress()
+    llm_calls, prompt_tokens, completion_tokens = event_log.llm_totals()
+    st.progress(finished / total if total else 0.0)
+    current = TASK_LABELS.get(running, "Preparing crew")
+    st.caption(
+        f"{current} · {finished}/{total} tasks done · "
+        f"{llm_calls} LLM calls · {prompt_tokens + completion_tokens:,} tokens"
+    )
+
+def show_live_drafts(run_id):
+    """Render the writer agents' output as it streams in; returns False if there is nothing yet"""
+    event_log = get_run_events(run_id)
+    drafts = [(label, event_log.draft(name)) for name, (label, _) in STREAMED_OUTPUTS.items()] if event_log else []
+    drafts = [(label, text) for label, text in drafts if text]
+    for label, text in drafts:
+        with st.expander(f"✍️ {label} (writing...)", expanded=True):
+            st.markdown(text)
+    return bool(drafts)
+
+def show_partial_outputs(run_id):
+    """Offer whatever output files a failed run managed to write"""
+    workspace = RunWorkspace(run_id)
+    partial = [(label, filename, workspace.read(filename)) for label, filename in STREAMED_OUTPUTS.values()]
+    partial = [(label, filename, text) for label, filename, text in partial if text]
+    if not partial:
+        return False
+    st.warning("⚠️ The last run did not finish. These are the partial results it produced.")
+    for label, filename, text in partial:
+        st.download_button(label=f"Download partial {label}", data=text, file_name=filename, mime="text/markdown")
+        with st.expander(f"View partial {label}"):
+            st.markdown(text)
+    return True
+
+def poll_job_if_running():
+    """Poll a running job without holding the script thread for the whole run"""
+    if st.session_state.pop('poll_job', False):
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+def forget_job():
+    """Stop tracking the session's background run"""
+    st.session_state.pop('job_id', None)
+    if "job" in st.query_params:
+        del st.query_params["job"]
 
 def main():
     # Header
@@ -248,10 +360,10 @@ def main():
                     if not openai_api_key or not serper_api_key:
                         st.error("❌ Please enter both API keys to proceed.")
                     else:
-                        # Set environment variables for this session
-                        os.environ["OPENAI_API_KEY"] = openai_api_key.strip()
-                        os.environ["OPENAI_MODEL_NAME"] = "gpt-4o-mini"
-                        os.environ["SERPER_API_KEY"] = serper_api_key.strip()
+                        # Keep the keys in this session only; os.environ is shared by every session in the process
+                        st.session_state.credentials = RunCredentials.from_env().with_keys(
+                            openai_api_key.strip(), serper_api_key.strip()
+                        )
                         
                         # Update session state
                         st.session_state.api_keys_configured = True
@@ -263,6 +375,10 @@ def main():
                 st.success("✅ API keys are configured and ready!")
                 if st.button("🔄 Reset API Keys", use_container_width=True, key="reset_api_button"):
                     st.session_state.api_keys_configured = False
+                    # Only this session's agents and tools; other sessions keep theirs
+                    credentials = st.session_state.pop('credentials', None)
+                    if credentials is not None:
+                        clear_agent_registry(credentials)
                     st.rerun()
 
         st.markdown("---")
@@ -307,6 +423,9 @@ def main():
     if not st.session_state.api_keys_configured:
         # Show welcome/info screen when API keys are not configured
         st.markdown("---")
+        if st.session_state.get('job_id'):
+            # Reattached after a page refresh: the run carries on, but API keys only live in the browser session
+            st.info("⏳ Your application is still being processed. Enter your API keys again to follow it.")
         
         # Main welcome section
         col1, col2, col3, col4, col5 = st.columns([2, 6, 1, 6, 2])
@@ -399,22 +518,28 @@ def main():
                 
                 if uploaded_file is not None:
                     file_extension = uploaded_file.name.split('.')[-1].lower()
+                    resume_digest = file_digest(uploaded_file.getvalue())
+                    
+                    # Unchanged upload on a rerun: the text and saved file are already current
+                    if st.session_state.get('resume_digest') == resume_digest and st.session_state.resume_uploaded:
+                        resume_text = ""
+                        st.success(f"✅ Resume uploaded successfully! ({len(st.session_state.resume_content)} characters)")
                     
-                    # Extract text based on file type
-                    if file_extension == 'pdf':
+                    # Extract text based on file type (memoized by file digest)
+                    elif file_extension == 'pdf':
                         if not PDF_AVAILABLE:
                             st.error("PyPDF2 not installed. Please install it to read PDF files.")
                             resume_text = ""
                         else:
-                            resume_text = extract_text_from_pdf(uploaded_file)
+                            resume_text = cached_resume_text(resume_digest, file_extension, lambda: extract_text_from_pdf(uploaded_file))
                     elif file_extension == 'docx':
                         if not DOCX_AVAILABLE:
                             st.error("python-docx not installed. Please install it to read Word files.")
                             resume_text = ""
                         else:
-                            resume_text = extract_text_from_docx(uploaded_file)
+                            resume_text = cached_resume_text(resume_digest, file_extension, lambda: extract_text_from_docx(uploaded_file))
                     elif file_extension in ['txt', 'md']:
-                        resume_text = extract_text_from_txt(uploaded_file)
+                        resume_text = cached_resume_text(resume_digest, file_extension, lambda: extract_text_from_txt(uploaded_file))
                     else:
                         st.error("Unsupported file format")
                         resume_text = ""
@@ -422,12 +547,8 @@ def main():
                     if resume_text:
                         st.session_state.resume_content = resume_text
                         st.session_state.resume_uploaded = True
+                        st.session_state.resume_digest = resume_digest
                         st.success(f"✅ Resume uploaded successfully! ({len(resume_text)} characters)")
-                        
-                        # Save resume content to file
-                        resume_path = save_resume_content(resume_text)
-                        if resume_path:
-                            st.session_state.resume_path = resume_path
                 
                 job_posting_url = st.text_input(
                     "Job Posting URL",
@@ -497,22 +618,16 @@ def main():
                     
                     if st.button("🚀 Launch Elite AI Processing", type="primary", use_container_width=True):
                         try:
-                            with st.spinner("Elite AI specialists are strategically optimizing your application..."):
-                                result = run_job_application_crew(
-                                    job_posting_url,
-                                    github_url if github_url else "https://github.com",
-                                    personal_writeup,
-                                    st.session_state.get('resume_path', '')
-                                )
-                                
-                                st.session_state.processing_result = result
-                                st.success("✅ Elite optimization completed successfully!")
-                                st.balloons()
+                            launch_run(job_posting_url, github_url if github_url else "https://github.com", personal_writeup)
                                 
+                        except JobQueueFull as e:
+                            st.error(f"❌ {str(e)}")
                         except Exception as e:
                             st.error(f"❌ Error during processing: {str(e)}")
                             st.info("Please check your inputs and try again.")
 
+            show_job_status()
+
             st.markdown("---")
             
         # with tab2:
@@ -535,12 +650,12 @@ def main():
                 st.markdown("#### 📁 Generated Files")
                 
                 col9, col10 = st.columns(2)
+                run_workspace = RunWorkspace(st.session_state.run_id) if 'run_id' in st.session_state else None
                 
                 with col9:
-                    if os.path.exists("tailored_resume.md"):
+                    resume_content = run_workspace.read(TAILORED_RESUME_FILE) if run_workspace else None
+                    if resume_content is not None:
                         st.markdown("##### ✅ Tailored Resume")
-                        with open("tailored_resume.md", "r", encoding="utf-8") as f:
-                            resume_content = f.read()
                         st.download_button(
                             label="📄 Download Tailored Resume",
                             data=resume_content,
@@ -553,10 +668,9 @@ def main():
                         st.warning("Tailored resume file not found")
                 
                 with col10:
-                    if os.path.exists("interview_preparation.md"):
+                    interview_content = run_workspace.read(INTERVIEW_PREPARATION_FILE) if run_workspace else None
+                    if interview_content is not None:
                         st.markdown("##### ✅ Interview Preparation")
-                        with open("interview_preparation.md", "r", encoding="utf-8") as f:
-                            interview_content = f.read()
                         st.download_button(
                             label="🎤 Download Interview Prep",
                             data=interview_content,
@@ -567,6 +681,26 @@ def main():
                             st.markdown(interview_content)
                     else:
                         st.warning("Interview preparation file not found")
+
+                    walkthrough_content = run_workspace.read(INTERVIEW_RESUME_FILE) if run_workspace else None
+                    if walkthrough_content is not None:
+                        st.download_button(
+                            label="🧭 Download Resume Walkthrough",
+                            data=walkthrough_content,
+                            file_name="interview_resume_walkthrough.md",
+                            mime="text/markdown"
+                        )
+                        with st.expander("View Resume Walkthrough"):
+                            st.markdown(walkthrough_content)
+                    
+                    # Only the interview task runs again; research, profile and resume are reused
+                    if 'run_inputs' in st.session_state and 'resume_content' in st.session_state:
+                        if st.button("🔁 Regenerate Interview Prep", use_container_width=True):
+                            try:
+                                launch_run(*st.session_state.run_inputs, regenerate=("interview_preparation_task",))
+                                st.rerun()
+                            except JobQueueFull as e:
+                                st.error(f"❌ {str(e)}")
                 
                 # Action buttons
                 st.markdown("#### 🔄 Next Steps")
@@ -574,8 +708,10 @@ def main():
                 
                 with col11:
                     if st.button("🔄 Process Another Application", use_container_width=True):
-                        # Clear session state for new application
-                        for key in ['processing_result', 'resume_content', 'resume_uploaded', 'resume_path']:
+                        # Clear session state for new application and drop the finished run's files
+                        if 'run_id' in st.session_state and not st.session_state.get('shared_run'):
+                            RunWorkspace(st.session_state.run_id).cleanup()
+                        for key in ['processing_result', 'resume_content', 'resume_uploaded', 'resume_digest', 'run_id', 'job_id', 'run_inputs', 'shared_run']:
                             if key in st.session_state:
                                 del st.session_state[key]
                         st.rerun()
@@ -588,11 +724,17 @@ def main():
                     if st.button("💾 Save to Cloud", use_container_width=True):
                         st.info("Cloud save feature coming soon!")
             
-            else:
+            elif st.session_state.get('job_id') and st.session_state.get('run_id'):
+                st.markdown("#### ⏳ Your Materials Are Being Written")
+                if not show_live_drafts(st.session_state.run_id):
+                    st.info("The tailored resume and interview guide will appear here as soon as the writers start.")
+            elif not (st.session_state.get('run_id') and show_partial_outputs(st.session_state.run_id)):
                 st.info("🎯 Process your application in the 'Process Application' tab to see results here.")
 
     # Footer
     st.markdown('<h6 class="footer">Developed & Designed by Saad Toor | saadtoorx</h6>', unsafe_allow_html=True)
 
+    poll_job_if_running()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,19 @@
-import os
 import pprint
 
+# Model used when OPENAI_MODEL_NAME is not set
+DEFAULT_MODEL_NAME = "gpt-4o-mini"
+
+def model_name():
+    """The current run's OpenAI model (see credentials), falling back to OPENAI_MODEL_NAME and DEFAULT_MODEL_NAME"""
+    from credentials import current_credentials
+    return current_credentials().model
+
 def enter_and_set_api_keys(streamlit_mode=True):
     """
-    Prompts the user to enter OpenAI and Serper API keys and sets them as environment variables.
+    Prompts the user to enter OpenAI and Serper API keys.
     Works for both Streamlit and CLI modes.
-    Returns the entered keys as a tuple: (openai_api_key, serper_api_key)
+    Returns the entered keys as a tuple: (openai_api_key, serper_api_key).
+    Nothing is written to os.environ; callers pass the keys on as credentials.RunCredentials.
     """
     if streamlit_mode:
         import streamlit as st
@@ -22,16 +30,10 @@ def enter_and_set_api_keys(streamlit_mode=True):
             print("Both OpenAI and Serper API keys are required.")
             exit(1)
     
-    # Only set environment variables if both keys are provided
-    if openai_api_key and serper_api_key:
-        os.environ["OPENAI_API_KEY"] = openai_api_key
-        os.environ["OPENAI_MODEL_NAME"] = "gpt-4o-mini"
-        os.environ["SERPER_API_KEY"] = serper_api_key
-    
-    return openai_api_key, serper_api_key
+    return openai_api_key.strip(), serper_api_key.strip()
 
 def pretty_print_result(result):
     """
     Pretty print the result dictionary in a readable format.
     """
-    pprint.pprint(result)
\ No newline at end of file
+    pprint.pprint(result)
@@ -0,0 +1,262 @@
+# Batch mode: one candidate against many job postings, or many candidates against one posting
+# Usage: python batch.py --resume resume.pdf --github https://github.com/me --writeup bio.txt --jobs urls.txt [--concurrency 4]
+#        python batch.py --jobs https://example.com/job --candidates candidates.json [--concurrency 4]
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import run_crew
+from agents import create_agents
+from documents import pdf_text, docx_text
+from workspace import RunWorkspace, RESUME_FILE, TAILORED_RESUME_FILE, INTERVIEW_PREPARATION_FILE, INTERVIEW_RESUME_FILE, EVENT_LOG_FILE
+
+# Postings processed at once; each one still runs its own tasks concurrently
+BATCH_CONCURRENCY = int(os.getenv("JOB_CREW_BATCH_CONCURRENCY", 4))
+
+MANIFEST_FILE = "manifest.json"
+PROFILE_FILE = "candidate_profile.md"
+RESEARCH_FILE = "job_research.md"
+SUMMARY_FILE = "summary.md"
+
+class BatchItem:
+    """Outcome of one run in a batch; its output bundle is the workspace directory"""
+
+    def __init__(self, label, inputs, workspace, resume_text=None):
+        self.label = label
+        self.inputs = inputs
+        self.workspace = workspace
+        self.resume_text = resume_text
+        self.status = "pending"
+        self.error = None
+        self.seconds = None
+        self.alignment = None
+
+    @property
+    def job_posting_url(self):
+        return self.inputs.get("job_posting_url")
+
+    @property
+    def files(self):
+        names = (TAILORED_RESUME_FILE, INTERVIEW_PREPARATION_FILE, INTERVIEW_RESUME_FILE, RESUME_FILE, PROFILE_FILE, RESEARCH_FILE, EVENT_LOG_FILE)
+        return {name: self.workspace.path_for(name) for name in names if os.path.exists(self.workspace.path_for(name))}
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "job_posting_url": self.job_posting_url,
+            "github_url": self.inputs.get("github_url"),
+            "run_id": self.workspace.run_id,
+            "path": self.workspace.path,
+            "status": self.status,
+            "error": self.error,
+            "seconds": self.seconds,
+            "alignment": self.alignment,
+            "files": self.files,
+        }
+
+# Bullets under the tailored resume's "Job Alignment Assessment" headings, with their weight
+_ALIGNMENT_SECTIONS = (("strong", "strong alignment", 1.0), ("good", "good alignment", 0.75), ("gaps", "development opportunities", 0.0))
+
+def alignment_score(tailored_resume):
+    """
+    Score (0-100) of how well a candidate fits, read from the tailored resume's
+    Job Alignment Assessment: strong areas count fully, good areas 75%, gaps not at all.
+    Returns None when the section is missing.
+    """
+    counts = {key: 0 for key, _, _ in _ALIGNMENT_SECTIONS}
+    current = None
+    for line in (tailored_resume or "").splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            heading = stripped.lower()
+            current = next((key for key, marker, _ in _ALIGNMENT_SECTIONS if marker in heading), None)
+        elif current and re.match(r"[-*] ", stripped):
+            counts[current] += 1
+    total = sum(counts.values())
+    if not total:
+        return None
+    weights = {key: weight for key, _, weight in _ALIGNMENT_SECTIONS}
+    counts["score"] = round(100 * sum(counts[key] * weights[key] for key in weights) / total, 1)
+    return counts
+
+def run_candidate_profile(github_url, personal_writeup, agents=None, workspace=None):
+    """Run profile_task alone and return its report, for sharing across postings"""
+    inputs = {"job_posting_url": "", "github_url": github_url, "personal_writeup": personal_writeup}
+    return run_crew(inputs, agents=agents, workspace=workspace, only=("profile_task",)).raw
+
+def run_job_research(job_url, agents=None, workspace=None):
+    """Run research_task alone (or reuse the cached report) and return it, for sharing across candidates"""
+    inputs = {"job_posting_url": job_url, "github_url": "", "personal_writeup": ""}
+    return run_crew(inputs, agents=agents, workspace=workspace, only=("research_task",)).raw
+
+def _run_item(item, agents, prefilled, shared_files):
+    start = time.time()
+    try:
+        for filename, content in shared_files.items():
+            item.workspace.write(filename, content)
+        if item.resume_text:
+            item.workspace.write(RESUME_FILE, item.resume_text)
+        run_crew(item.inputs, agents=agents, workspace=item.workspace, prefilled=prefilled)
+        item.alignment = alignment_score(item.workspace.read(TAILORED_RESUME_FILE))
+        item.status = "succeeded"
+    except Exception as e:
+        item.status = "failed"
+        item.error = str(e)
+    finally:
+        item.seconds = round(time.time() - start, 2)
+        item.workspace.write(MANIFEST_FILE, json.dumps(item.to_dict(), indent=2))
+    return item
+
+def _fan_out(items, agents, prefilled, shared_files, max_concurrency, on_item):
+    with ThreadPoolExecutor(max_workers=max_concurrency or BATCH_CONCURRENCY, thread_name_prefix="crew-batch") as pool:
+        futures = [pool.submit(_run_item, item, agents, prefilled, shared_files) for item in items]
+        for future in futures:
+            item = future.result()
+            if on_item:
+                on_item(item)
+    return items
+
+def run_batch(job_urls, github_url, personal_writeup, resume_text=None, max_concurrency=None, agents=None, on_item=None):
+    """
+    Tailor one candidate to many postings.
+    The candidate profile is generated once and injected into every posting's run, so each
+    posting runs every task but the profile; postings run max_concurrency at a time.
+    A failing posting is recorded in its BatchItem instead of stopping the batch.
+    Returns (batch workspace, [BatchItem]) with one output bundle per posting.
+    """
+    agents = agents or create_agents()
+    batch_workspace = RunWorkspace()
+    if resume_text:
+        batch_workspace.write(RESUME_FILE, resume_text)
+    profile = run_candidate_profile(github_url, personal_writeup, agents, batch_workspace)
+    batch_workspace.write(PROFILE_FILE, profile)
+
+    items = [
+        BatchItem(url, {"job_posting_url": url, "github_url": github_url, "personal_writeup": personal_writeup},
+                  RunWorkspace(), resume_text)
+        for url in dict.fromkeys(job_urls)
+    ]
+    _fan_out(items, agents, {"profile_task": profile}, {PROFILE_FILE: profile}, max_concurrency, on_item)
+
+    batch_workspace.write(MANIFEST_FILE, json.dumps({
+        "github_url": github_url,
+        "profile": batch_workspace.path_for(PROFILE_FILE),
+        "items": [item.to_dict() for item in items],
+    }, indent=2))
+    return batch_workspace, items
+
+def run_candidates_batch(job_url, candidates, max_concurrency=None, agents=None, on_item=None):
+    """
+    Evaluate many candidates against one posting.
+    `candidates` are dicts with name, github_url, personal_writeup and optional resume_text.
+    The research report is computed once and shared, so N candidates cost N x 4 + 1 task runs
+    (every task in TASK_NAMES but the research, per candidate).
+    Returns (batch workspace, [BatchItem] ranked by alignment score, best first).
+    """
+    agents = agents or create_agents()
+    batch_workspace = RunWorkspace()
+    research = run_job_research(job_url, agents, batch_workspace)
+    batch_workspace.write(RESEARCH_FILE, research)
+
+    items = [
+        BatchItem(candidate.get("name") or candidate["github_url"],
+                  {"job_posting_url": job_url, "github_url": candidate["github_url"],
+                   "personal_writeup": candidate.get("personal_writeup", "")},
+                  RunWorkspace(), candidate.get("resume_text"))
+        for candidate in candidates
+    ]
+    _fan_out(items, agents, {"research_task": research}, {RESEARCH_FILE: research}, max_concurrency, on_item)
+
+    ranked = sorted(items, key=lambda item: (item.alignment or {}).get("score", -1), reverse=True)
+    batch_workspace.write(SUMMARY_FILE, candidate_summary_table(ranked))
+    batch_workspace.write(MANIFEST_FILE, json.dumps({
+        "job_posting_url": job_url,
+        "research": batch_workspace.path_for(RESEARCH_FILE),
+        "items": [item.to_dict() for item in ranked],
+    }, indent=2))
+    return batch_workspace, ranked
+
+def candidate_summary_table(ranked_items):
+    """Markdown table of candidates ranked by alignment score"""
+    lines = ["| Rank | Candidate | Alignment | Strong | Good | Gaps | Status | Bundle |",
+             "|---|---|---|---|---|---|---|---|"]
+    for rank, item in enumerate(ranked_items, 1):
+        alignment = item.alignment or {}
+        score = f"{alignment['score']:.1f}" if "score" in alignment else "n/a"
+        lines.append(f"| {rank} | {item.label} | {score} | {alignment.get('strong', '')} | {alignment.get('good', '')} "
+                     f"| {alignment.get('gaps', '')} | {item.status} | {item.workspace.path} |")
+    return "\n".join(lines) + "\n"
+
+def read_resume(path):
+    """Resume text from a PDF, DOCX or plain-text file"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        data = f.read()
+    if extension == ".pdf":
+        return pdf_text(data)
+    if extension == ".docx":
+        return docx_text(data)
+    return data.decode("utf-8", errors="replace")
+
+def read_text_argument(value):
+    """Use the file's contents when the argument names an existing file"""
+    if value and os.path.isfile(value):
+        with open(value, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    return value or ""
+
+def read_candidates(path):
+    """Candidates from a JSON list of {name, github_url, writeup, resume} (writeup/resume may be file paths)"""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return [{
+        "name": entry.get("name"),
+        "github_url": entry["github_url"],
+        "personal_writeup": read_text_argument(entry.get("writeup", "")),
+        "resume_text": read_resume(entry["resume"]) if entry.get("resume") else None,
+    } for entry in entries]
+
+def main():
+    parser = argparse.ArgumentParser(description="Tailor one resume to many job postings, or rank many candidates for one posting")
+    parser.add_argument("--jobs", nargs="+", required=True, help="job posting URLs, or a file with one URL per line")
+    parser.add_argument("--github", help="candidate GitHub profile URL")
+    parser.add_argument("--writeup", default="", help="personal write-up text or a file containing it")
+    parser.add_argument("--resume", help="resume file (PDF, DOCX, TXT or MD)")
+    parser.add_argument("--candidates", help="JSON file of candidates to rank against a single posting")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    if not os.getenv("OPENAI_API_KEY") or not os.getenv("SERPER_API_KEY"):
+        print("Both OPENAI_API_KEY and SERPER_API_KEY must be set.")
+        sys.exit(1)
+
+    job_urls = []
+    for value in args.jobs:
+        if os.path.isfile(value):
+            with open(value, "r", encoding="utf-8") as f:
+                job_urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        else:
+            job_urls.append(value)
+
+    report = lambda item: print(f"[{item.status}] {item.label} ({item.seconds}s) -> {item.workspace.path}")
+    if args.candidates:
+        if len(job_urls) != 1:
+            parser.error("--candidates takes exactly one job posting")
+        batch_workspace, items = run_candidates_batch(job_urls[0], read_candidates(args.candidates), args.concurrency, on_item=report)
+        print(batch_workspace.read(SUMMARY_FILE))
+    else:
+        if not args.github:
+            parser.error("--github is required unless --candidates is given")
+        resume_text = read_resume(args.resume) if args.resume else None
+        batch_workspace, items = run_batch(job_urls, args.github, read_text_argument(args.writeup), resume_text,
+                                           args.concurrency, on_item=report)
+    failed = sum(1 for item in items if item.status != "succeeded")
+    print(f"{len(items) - failed}/{len(items)} runs succeeded; manifest: {batch_workspace.path_for(MANIFEST_FILE)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
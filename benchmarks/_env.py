@@ -0,0 +1,29 @@
+# Scratch environment shared by the benchmarks that run the pipeline against the offline stand-ins (mock_services)
+import os
+import tempfile
+
+def scratch_env(services, prefix, llm_cache=True):
+    """
+    (scratch directory, environment variables) for a benchmark run: external calls go to the stand-ins,
+    caches, workspaces, metrics and CrewAI storage live in a fresh temp dir, and telemetry is off.
+    With llm_cache=False every request must reach the stand-ins, so no response is replayed.
+    """
+    scratch = tempfile.mkdtemp(prefix=prefix)
+    env = dict(services.env())
+    env["OPENAI_MODEL_NAME"] = os.environ.get("OPENAI_MODEL_NAME", "gpt-4o-mini")
+    env["JOB_CREW_CACHE_DIR"] = os.path.join(scratch, "cache")
+    env["JOB_CREW_WORKSPACE_DIR"] = os.path.join(scratch, "workspaces")
+    env["JOB_CREW_METRICS_FILE"] = os.path.join(scratch, "run_metrics.jsonl")
+    env["CREWAI_STORAGE_DIR"] = os.path.join(scratch, "crewai")
+    if not llm_cache:
+        env["JOB_CREW_LLM_CACHE"] = "off"
+    # Keep CrewAI's telemetry round-trips out of the measurement
+    env["CREWAI_DISABLE_TELEMETRY"] = "true"
+    env["OTEL_SDK_DISABLED"] = "true"
+    return scratch, env
+
+def use_scratch_env(services, prefix, llm_cache=True):
+    """Apply scratch_env to this process (before the pipeline modules are imported); returns the scratch directory"""
+    scratch, env = scratch_env(services, prefix, llm_cache)
+    os.environ.update(env)
+    return scratch
@@ -0,0 +1,41 @@
+# Benchmark: cold vs warm construction of agents, tools and tasks per "click"
+# Usage: python benchmarks/bench_agent_registry.py [runs]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Dummy keys are enough: building agents and tools makes no network calls
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("SERPER_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_MODEL_NAME", "gpt-4o-mini")
+
+from agents import create_agents, clear_agent_registry
+from tasks import agent_tasks
+
+def time_click():
+    """Time what run_job_application_crew does before kickoff: agents + tasks"""
+    start = time.perf_counter()
+    agents = create_agents()
+    agent_tasks(agents)
+    return time.perf_counter() - start
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    cold = []
+    for _ in range(runs):
+        clear_agent_registry()
+        cold.append(time_click())
+
+    clear_agent_registry()
+    time_click()
+    warm = [time_click() for _ in range(runs)]
+
+    print(f"runs: {runs}")
+    print(f"cold start (registry cleared): mean {sum(cold) / runs * 1000:.1f} ms, min {min(cold) * 1000:.1f} ms")
+    print(f"warm start (shared registry):  mean {sum(warm) / runs * 1000:.1f} ms, min {min(warm) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Benchmark: concurrent sessions with different API keys in one process - wall time and key isolation
+# Usage: python benchmarks/bench_credential_isolation.py [sessions] [seconds_per_llm_call]
+# Every request the stand-ins receive is checked against the session that made it; exits 1 if a key crossed.
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import MockServices
+from _env import use_scratch_env
+
+SESSION_MARKER = re.compile(r"session-(\d+)")
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    services = MockServices(latency=latency).start()
+    # Every run must reach the stand-ins, so no response is replayed across sessions
+    use_scratch_env(services, "bench-credentials-", llm_cache=False)
+    # Keys in os.environ must never be used once every run carries its own credentials
+    os.environ["OPENAI_API_KEY"] = "sk-process-env"
+    os.environ["SERPER_API_KEY"] = "serper-process-env"
+
+    from pipeline import run_crew
+    from jobs import JobExecutor, SUCCEEDED
+    from credentials import RunCredentials
+
+    base = RunCredentials.from_env()
+    credentials = [base.with_keys(f"sk-session-{i}", f"serper-session-{i}") for i in range(sessions)]
+    executor = JobExecutor(max_workers=sessions)
+    start = time.perf_counter()
+    job_ids = [
+        executor.submit(run_crew, {"job_posting_url": services.job_posting_url(f"backend-engineer-session-{i}"),
+                                   "github_url": services.github_url(f"dev-session-{i}"),
+                                   "personal_writeup": f"Backend engineer (session-{i}), 6 years of Python."},
+                        credentials=credentials[i])
+        for i in range(sessions)
+    ]
+    while not all(executor.get(job_id).done for job_id in job_ids):
+        time.sleep(0.05)
+    seconds = time.perf_counter() - start
+    services.stop()
+
+    failed = [executor.get(job_id).error for job_id in job_ids if executor.get(job_id).status != SUCCEEDED]
+    expected = {"openai": {f"sk-session-{i}" for i in range(sessions)},
+                "serper": {f"serper-session-{i}" for i in range(sessions)}}
+    attributed = crossed = unknown = 0
+    for service, key, text in services.key_log:
+        if key not in expected[service]:
+            unknown += 1
+            continue
+        markers = set(SESSION_MARKER.findall(text))
+        if not markers:
+            continue
+        attributed += 1
+        if markers != {key.rsplit("-", 1)[1]}:
+            crossed += 1
+
+    print(f"{sessions} sessions with different keys, {latency} s per LLM call: {seconds:.2f} s, {len(failed)} failed runs")
+    print(f"requests: {len(services.key_log)}  attributed to a session: {attributed}  "
+          f"with another session's key: {crossed}  with an unknown or process-wide key: {unknown}")
+    for error in failed:
+        print("run failed:", error)
+    if crossed or unknown or failed:
+        sys.exit(1)
+    print("no key crossed between sessions")
+
+if __name__ == "__main__":
+    main()
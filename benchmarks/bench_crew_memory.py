@@ -0,0 +1,85 @@
+# Benchmark: latency, LLM/embedding calls and disk use added by each crew memory setting
+# Usage: python benchmarks/bench_crew_memory.py [runs] [seconds_per_llm_call] [dag|crew]
+# Each setting runs in its own process, since the memory settings are read at import time.
+import os
+import sys
+import json
+import time
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_services import MockServices
+from _env import scratch_env
+
+# name -> environment overrides
+SETTINGS = (
+    ("off", {"JOB_CREW_MEMORY": "off"}),
+    ("crewai default", {"JOB_CREW_MEMORY": "crewai"}),
+    ("run", {"JOB_CREW_MEMORY": "run"}),
+    ("run, all features", {"JOB_CREW_MEMORY": "run",
+                           "JOB_CREW_MEMORY_FEATURES": "save,recall,analysis,deep_recall,tools"}),
+    ("shared", {"JOB_CREW_MEMORY": "shared"}),
+    ("shared, 1 MB cap", {"JOB_CREW_MEMORY": "shared", "JOB_CREW_MEMORY_MB": "1"}),
+)
+
+def disk_bytes(path, only_under=None):
+    """Bytes of the files under `path` (and, if given, under a directory named `only_under`)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        if only_under is None or only_under in os.path.relpath(root, path).split(os.sep):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def child(runs):
+    """Run the pipeline `runs` times with distinct postings; prints seconds per run as JSON"""
+    from pipeline import run_crew
+    services_env = json.loads(os.environ["BENCH_SERVICES"])
+    seconds = []
+    for i in range(runs):
+        start = time.perf_counter()
+        run_crew({"job_posting_url": services_env["job_posting_urls"][i], "github_url": services_env["github_url"],
+                  "personal_writeup": "Backend engineer, 6 years of Python, PostgreSQL and Kubernetes."})
+        seconds.append(time.perf_counter() - start)
+    print("BENCH_RESULT " + json.dumps(seconds))
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(int(sys.argv[2]))
+        return
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    scheduler = sys.argv[3] if len(sys.argv) > 3 else "dag"
+    services = MockServices(latency=latency).start()
+    urls = {"job_posting_urls": [services.job_posting_url(f"backend-engineer-{i}") for i in range(runs)],
+            "github_url": services.github_url()}
+    print(f"{runs} runs per setting with the {scheduler} scheduler, {latency} s per LLM call")
+    print(f"{'setting':20} {'s/run':>7} {'llm calls':>9} {'embedded':>8} {'memory on disk':>15}")
+    for name, overrides in SETTINGS:
+        # Every run must reach the stand-ins, so no response is replayed
+        scratch, env = scratch_env(services, "bench-crew-memory-", llm_cache=False)
+        env = dict(os.environ, **env, **overrides)
+        env.update({
+            "BENCH_SERVICES": json.dumps(urls),
+            "JOB_CREW_SCHEDULER": scheduler,
+            # The stand-ins do not limit tokens, so don't let the pool's token budget pace the LLM-heavy settings
+            "JOB_CREW_LLM_TPM": str(10 ** 9),
+        })
+        chat, embedded = services.stats["chat"], services.stats["embeddings"]
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(runs)], cwd=ROOT, env=env,
+                                 capture_output=True, text=True)
+        result = [line for line in process.stdout.splitlines() if line.startswith("BENCH_RESULT ")]
+        if process.returncode or not result:
+            print(f"{name:20} failed: {process.stderr.strip().splitlines()[-1:]}")
+            continue
+        seconds = json.loads(result[0].split(" ", 1)[1])
+        # CrewAI keeps other state (e.g. task outputs) under CREWAI_STORAGE_DIR too; count its memory store only
+        memory_bytes = (disk_bytes(os.path.join(scratch, "crewai"), only_under="memory")
+                        + disk_bytes(os.path.join(scratch, "cache", "crew_memory")))
+        print(f"{name:20} {sum(seconds) / len(seconds):7.2f} {services.stats['chat'] - chat:9d} "
+              f"{services.stats['embeddings'] - embedded:8d} {memory_bytes / 1024:12.1f} KB")
+    services.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Benchmark: end-to-end run against offline stand-ins (mock_services), reporting wall time, framework overhead and memory
+# Usage: python benchmarks/bench_end_to_end.py [--mode pipeline|crew] [--runs 3] [--latency 0.2] [--json out.json] [--baseline base.json]
+# No API keys or network access are needed, so this can run in CI as a regression check.
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import MockServices
+from _env import use_scratch_env
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against offline stand-ins")
+    parser.add_argument("--mode", choices=("pipeline", "crew"), default="pipeline",
+                        help="pipeline: pipeline.run_crew; crew: create_agents + agent_tasks + Crew.kickoff")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per LLM call")
+    parser.add_argument("--per-token-latency", type=float, default=0.0, help="extra seconds per completion token")
+    parser.add_argument("--answer-tokens", type=int, default=600, help="size of each canned final answer")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="fail if median overhead regresses against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative overhead regression")
+    return parser.parse_args()
+
+def configure(services):
+    """Route every external call to the stand-ins and isolate caches and workspaces in a temp dir"""
+    # Every run must reach the stand-in LLM, so repeated prompts are not served from the response cache
+    scratch = use_scratch_env(services, "bench-e2e-", llm_cache=False)
+    resume_path = os.path.join(scratch, "resume.md")
+    with open(resume_path, "w", encoding="utf-8") as f:
+        f.write("# Example Developer\n\nBackend engineer, 6 years of Python, PostgreSQL, Redis and Kubernetes.\n")
+    return resume_path
+
+def run_once(mode, inputs):
+    if mode == "crew":
+        from crewai import Crew
+        from agents import create_agents
+        from tasks import agent_tasks
+        agents = create_agents()
+        tasks = agent_tasks(agents)
+        return Crew(agents=list(agents), tasks=tasks, verbose=False).kickoff(inputs=dict(inputs, job_posting="", github_summary="", run_id="bench"))
+    import pipeline
+    # Drop the cached research report, candidate profile and task outputs so every run executes all the tasks
+    for cache in (pipeline.JOB_INTELLIGENCE_CACHE, pipeline.CANDIDATE_PROFILE_CACHE, pipeline.TASK_OUTPUT_MEMO):
+        cache.clear()
+    return pipeline.run_crew(inputs)
+
+def main():
+    args = parse_args()
+    services = MockServices(latency=args.latency, per_token_latency=args.per_token_latency,
+                            answer_tokens=args.answer_tokens).start()
+    resume_path = configure(services)
+    inputs = {
+        "job_posting_url": services.job_posting_url(),
+        "github_url": services.github_url(),
+        "personal_writeup": "Backend engineer focused on reliable Python services.",
+        "resume_path": resume_path,
+    }
+
+    start = time.perf_counter()
+    import agents, tasks, pipeline  # noqa: F401  (import cost is reported separately)
+    import_seconds = time.perf_counter() - start
+
+    walls, overheads = [], []
+    for _ in range(args.runs):
+        since = time.time()
+        start = time.perf_counter()
+        run_once(args.mode, inputs)
+        wall = time.perf_counter() - start
+        walls.append(wall)
+        overheads.append(wall - services.llm_busy_seconds(since))
+    stats = dict(services.stats)
+
+    # A separate traced run, since tracemalloc slows Python code down noticeably
+    tracemalloc.start()
+    run_once(args.mode, inputs)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    services.stop()
+
+    results = {
+        "mode": args.mode,
+        "runs": args.runs,
+        "llm_latency": args.latency,
+        "import_seconds": round(import_seconds, 3),
+        "wall_seconds_median": round(statistics.median(walls), 3),
+        "wall_seconds_max": round(max(walls), 3),
+        "overhead_seconds_median": round(statistics.median(overheads), 3),
+        "run_alloc_peak_mb": round(traced_peak / 2 ** 20, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "llm_calls_per_run": stats["chat"] / args.runs,
+        "prompt_tokens_per_run": stats["prompt_tokens"] / args.runs,
+        "completion_tokens_per_run": stats["completion_tokens"] / args.runs,
+        "search_calls": stats["search"],
+        "page_fetches": stats["pages"],
+    }
+    for key, value in results.items():
+        print(f"{key:26} {value}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        limit = baseline["overhead_seconds_median"] * (1 + args.tolerance) + 0.05
+        if results["overhead_seconds_median"] > limit:
+            print(f"REGRESSION: median overhead {results['overhead_seconds_median']}s exceeds {limit:.3f}s")
+            sys.exit(1)
+        print(f"overhead within {args.tolerance:.0%} of baseline ({baseline['overhead_seconds_median']}s)")
+
+if __name__ == "__main__":
+    main()
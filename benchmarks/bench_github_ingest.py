@@ -0,0 +1,48 @@
+# Benchmark: GitHub ingestion against the fake API in mock_services - sequential vs concurrent fetches, cold vs ETag-revalidated vs fresh cache
+# Usage: python benchmarks/bench_github_ingest.py [api_latency_seconds]
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import MockServices
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    scratch = tempfile.mkdtemp(prefix="bench-github-")
+    services = MockServices(github_latency=latency).start()
+    os.environ.update(services.env())
+    os.environ["JOB_CREW_CACHE_DIR"] = scratch
+
+    import github_ingest
+    from cache import DiskCache
+
+    url = services.github_url()
+
+    def timed(workers, cache_name, revalidate_after=None):
+        github_ingest.FETCH_WORKERS = workers
+        client = github_ingest.GitHubClient(cache=DiskCache(cache_name, cache_dir=scratch), revalidate_after=revalidate_after)
+        start = time.perf_counter()
+        digest = github_ingest.ingest_github_profile(url, client)
+        return time.perf_counter() - start, client.stats, digest
+
+    sequential, _, _ = timed(1, "sequential")
+    cold, cold_stats, digest = timed(8, "concurrent")
+    revalidated, revalidated_stats, _ = timed(8, "concurrent", revalidate_after=0)
+    warm, warm_stats, _ = timed(8, "concurrent")
+    services.stop()
+
+    print(f"fake API latency {latency * 1000:.0f} ms, {cold_stats['requests']} requests per ingestion")
+    print(f"sequential, cold cache   {sequential * 1000:8.1f} ms")
+    print(f"concurrent, cold cache   {cold * 1000:8.1f} ms")
+    print(f"concurrent, revalidated  {revalidated * 1000:8.1f} ms  "
+          f"({revalidated_stats['not_modified']}/{revalidated_stats['requests']} answered 304, no rate-limit cost)")
+    print(f"concurrent, fresh cache  {warm * 1000:8.1f} ms  ({warm_stats['fresh']} responses, {warm_stats['requests']} requests)")
+    print(f"summary: {len(digest.summary)} chars (~{len(digest.summary) // 4} tokens), {len(digest.readmes)} READMEs indexed")
+    shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
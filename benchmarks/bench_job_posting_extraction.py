@@ -0,0 +1,53 @@
+# Benchmark: prompt tokens saved by structured job posting extraction over a corpus of saved postings
+# Usage: python benchmarks/bench_job_posting_extraction.py [directory of .html postings] [--show]
+import os
+import sys
+import time
+import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import JOB_POSTING_HTML
+from scraping import html_to_text
+from prompt_budget import count_tokens
+from job_posting import extract_job_posting, POSTING_SECTIONS
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_postings")
+
+def corpus(directory):
+    pages = [("mock_services", JOB_POSTING_HTML)]
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return pages
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    show = "--show" in sys.argv
+    pages = corpus(args[0] if args else CORPUS_DIR)
+
+    print(f"{'posting':22} {'raw tokens':>10} {'structured':>10} {'saved':>7} {'ms':>6}  source / sections")
+    total_raw = total_structured = 0
+    for name, page in pages:
+        raw = count_tokens(html_to_text(page))
+        start = time.perf_counter()
+        posting = extract_job_posting(page, f"https://example.com/{name}")
+        document = posting.to_markdown()
+        seconds = time.perf_counter() - start
+        structured = count_tokens(document)
+        found = ", ".join(sorted(posting.labels & POSTING_SECTIONS))
+        if raw * 2 < structured:
+            # Script-rendered pages: the scraped text does not contain the posting at all
+            saved = "missing"
+        else:
+            saved = f"{1 - structured / raw:.0%}"
+            total_raw += raw
+            total_structured += structured
+        print(f"{name:22} {raw:10d} {structured:10d} {saved:>7} {seconds * 1000:6.1f}  {posting.source}: {found}")
+        if show:
+            print(document, end="\n\n")
+    print(f"{'total':22} {total_raw:10d} {total_structured:10d} {1 - total_structured / total_raw:7.0%}"
+          "  (postings whose scraped text is 'missing' are excluded)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Benchmark: repeated pipeline runs with the LLM response cache - cold, warm and regenerate
+# Usage: python benchmarks/bench_llm_cache.py [seconds_per_llm_call] [--stream]
+# Task-level caches are cleared before every run, so only the response cache can skip LLM calls.
+# Also checks that a response cached for one API key is never replayed to another; exits 1 if it is.
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import MockServices
+from _env import use_scratch_env
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    latency = float(args[0]) if args else 0.2
+    services = MockServices(latency=latency).start()
+    use_scratch_env(services, "bench-llm-cache-")
+    os.environ["JOB_CREW_STREAM"] = "1" if "--stream" in sys.argv else "0"
+
+    import pipeline
+    from metrics import METRICS
+    from llm_cache import cache_stats
+
+    inputs = {"job_posting_url": services.job_posting_url(), "github_url": services.github_url(),
+              "personal_writeup": "Backend engineer, 6 years of Python, PostgreSQL and Kubernetes."}
+    print(f"{'run':12} {'seconds':>8} {'llm calls':>9} {'hits':>5} {'prompt tokens saved':>20} {'completion saved':>17}")
+    for name, regenerate in (("cold", ()), ("warm", ()), ("regenerate", ("interview_preparation_task",))):
+        for cache in (pipeline.JOB_INTELLIGENCE_CACHE, pipeline.CANDIDATE_PROFILE_CACHE, pipeline.TASK_OUTPUT_MEMO):
+            cache.clear()
+        calls = services.stats["chat"]
+        start = time.perf_counter()
+        pipeline.run_crew(inputs, regenerate=regenerate)
+        seconds = time.perf_counter() - start
+        stats = METRICS.runs[-1]["llm_cache"]
+        print(f"{name:12} {seconds:8.2f} {services.stats['chat'] - calls:9d} {stats['hits']:5d} "
+              f"{stats['prompt_tokens_saved']:20d} {stats['completion_tokens_saved']:17d}")
+
+    # The same request from two tenants: each key gets its own entry, and repeats hit only their own
+    from llm_pool import shared_openai_client
+    base_url = f"{services.url}/v1"
+    messages = [{"role": "user", "content": "# Answer\nSay hi to tenant isolation"}]
+    responses = []
+    for api_key in ("sk-tenant-a", "sk-tenant-b", "sk-tenant-a", "sk-tenant-b"):
+        calls = services.stats["chat"]
+        response = shared_openai_client(api_key, base_url).chat.completions.with_raw_response.create(
+            model="gpt-4o-mini", messages=messages)
+        responses.append((api_key, services.stats["chat"] - calls, response.headers.get("x-job-crew-cache") == "hit"))
+    isolated = [(calls, hit) for _, calls, hit in responses] == [(1, False), (1, False), (0, True), (0, True)]
+    outcomes = ", ".join(f"{key}: {'hit' if hit else f'{calls} call'}" for key, calls, hit in responses)
+    print(f"tenant isolation: {'ok' if isolated else 'FAIL'} ({outcomes})")
+    services.stop()
+    print("response cache:", cache_stats())
+    if not isolated:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Benchmark: throughput under a provider rate limit - independent clients vs the shared, rate-limited pool (sync and async)
+# Usage: python benchmarks/bench_llm_pool.py [threads] [requests_per_thread] [limit_per_second]
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import MockServices
+
+def hammer(make_client, threads, per_thread):
+    """Run threads x per_thread chat completions; returns (seconds, succeeded, failed)"""
+    results = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def worker():
+        client = make_client()
+        for _ in range(per_thread):
+            try:
+                client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "# Answer\nSay hi"}])
+                outcome = "ok"
+            except Exception:
+                outcome = "failed"
+            with lock:
+                results[outcome] += 1
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, results["ok"], results["failed"]
+
+def hammer_async(client, tasks, per_task):
+    """hammer() with tasks x per_task chat completions on one event loop through an async client"""
+    results = {"ok": 0, "failed": 0}
+
+    async def worker():
+        for _ in range(per_task):
+            try:
+                await client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "# Answer\nSay hi"}])
+                results["ok"] += 1
+            except Exception:
+                results["failed"] += 1
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(tasks)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start, results["ok"], results["failed"]
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    # The stand-in only limits requests, so keep the token bucket out of the way
+    os.environ["JOB_CREW_LLM_TPM"] = str(10 ** 9)
+    os.environ.setdefault("JOB_CREW_LLM_MAX_CONCURRENCY", "32")
+    # Every request repeats the same prompt; they must all reach the stand-in
+    os.environ["JOB_CREW_LLM_CACHE"] = "off"
+    from openai import OpenAI
+    import llm_pool
+
+    print(f"{threads} threads x {per_thread} requests, provider limit {limit} req/s, 0.1 s per completion")
+    for name in ("independent clients", "shared pool", "shared pool, async"):
+        services = MockServices(latency=0.1, answer_tokens=20, rate_limit=(limit, 1.0)).start()
+        base_url = f"{services.url}/v1"
+        if name == "shared pool, async":
+            # A separate key, so this run starts from a fresh limiter
+            seconds, ok, failed = hammer_async(llm_pool.shared_async_openai_client("sk-offline-async", base_url),
+                                               threads, per_thread)
+        else:
+            if name == "shared pool":
+                make_client = lambda: llm_pool.shared_openai_client("sk-offline", base_url)
+            else:
+                # What every agent had before: its own client with the SDK's default retries
+                make_client = lambda: OpenAI(api_key="sk-offline", base_url=base_url)
+            seconds, ok, failed = hammer(make_client, threads, per_thread)
+        services.stop()
+        print(f"{name:20} {seconds:6.2f} s  {ok / seconds:5.1f} ok/s ({ok / seconds / limit:4.0%} of limit)  "
+              f"failed {failed:3d}  429s served {services.stats['throttled']:4d}")
+    print("pool stats:", llm_pool.pool_stats())
+
+if __name__ == "__main__":
+    main()
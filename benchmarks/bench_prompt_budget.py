@@ -0,0 +1,55 @@
+# Benchmark: prompt tokens per run with full vs compact task prompts and a context budget
+# Usage: python benchmarks/bench_prompt_budget.py [context_budget] [llm_iterations_per_task]
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("SERPER_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_MODEL_NAME", "gpt-4o-mini")
+
+from tasks import agent_tasks, TASK_NAMES
+from prompt_budget import apply_prompt_variant, compact_prompt, task_prompt_tokens, trim_to_budget, CONTEXT_DIVIDER
+
+def upstream_context(task, stand_in_outputs, budget):
+    """Context a task receives, using each upstream task's expected_output as a stand-in for its output"""
+    outputs = [stand_in_outputs[id(upstream)] for upstream in (task.context if isinstance(task.context, list) else [])]
+    if budget:
+        share = max(budget // max(len(outputs), 1), 1)
+        outputs = [trim_to_budget(output, share) for output in outputs]
+    return CONTEXT_DIVIDER.join(outputs)
+
+def run_tokens(variant, budget, iterations):
+    tasks = apply_prompt_variant(agent_tasks(), variant)
+    # Real outputs are filled-in versions of the full templates, so always use those as stand-ins
+    stand_in_outputs = {id(task): task_full.expected_output for task, task_full in zip(tasks, agent_tasks())}
+    rows = []
+    for name, task in zip(TASK_NAMES, tasks):
+        static = task_prompt_tokens(task)
+        context = task_prompt_tokens(task, upstream_context(task, stand_in_outputs, budget)) - static
+        rows.append((name, static, context, (static + context) * iterations))
+    return rows
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    before = run_tokens("full", None, iterations)
+    after = run_tokens("compact", budget, iterations)
+
+    print(f"prompt tokens per task (x{iterations} LLM iterations per task), context budget {budget}")
+    print(f"{'task':28} {'static':>14} {'context':>14} {'per run':>16}")
+    for (name, static_before, context_before, total_before), (_, static_after, context_after, total_after) in zip(before, after):
+        print(f"{name:28} {static_before:>6} -> {static_after:<6} {context_before:>6} -> {context_after:<6} {total_before:>7} -> {total_after:<7}")
+    total_before = sum(row[3] for row in before)
+    total_after = sum(row[3] for row in after)
+    print(f"{'tokens per run':28} {total_before:>47} -> {total_after} ({100 * (1 - total_after / total_before):.0f}% fewer)")
+
+    # Every output section of the full templates must survive compaction
+    for full_task, compact_task in zip(agent_tasks(), apply_prompt_variant(agent_tasks(), "compact")):
+        headings = [line.strip() for line in full_task.expected_output.splitlines() if line.strip().startswith("#")]
+        compact_headings = compact_prompt("\n".join(headings))
+        assert all(heading in compact_task.expected_output for heading in compact_headings.splitlines())
+
+if __name__ == "__main__":
+    main()
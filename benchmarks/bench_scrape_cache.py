@@ -0,0 +1,165 @@
+# Benchmark: job posting fetches through ScrapeCache against a local job board with ETag / Last-Modified support
+# Usage: python benchmarks/bench_scrape_cache.py [concurrent_fetches] [page_latency_seconds]
+# Checks single origin fetch for equivalent URLs, 304 revalidation, blob dedup by digest and LRU eviction;
+# exits 1 if any check fails. No network access is needed.
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraping import ScrapeCache
+
+POSTING_HTML = """<html><head><title>Senior Python Engineer - Example Corp</title></head><body>
+<h1>Senior Python Engineer</h1><p>Build and operate the Python services behind our job marketplace.</p>
+<ul><li>5+ years of Python</li><li>PostgreSQL and Redis</li><li>Kubernetes in production</li></ul>
+</body></html>"""
+OTHER_HTML = """<html><head><title>Platform Engineer - Example Corp</title></head><body>
+<h1>Platform Engineer</h1><p>Own the CI, deployment and observability platform.</p>
+</body></html>"""
+# The mirror serves the same posting under a second URL
+PAGES = {
+    "/jobs/senior-python-engineer": POSTING_HTML,
+    "/jobs/senior-python-engineer-mirror": POSTING_HTML,
+    "/jobs/platform-engineer": OTHER_HTML,
+}
+LAST_MODIFIED = "Mon, 15 Jan 2024 10:00:00 GMT"
+
+class JobBoard:
+    """
+    Local HTTP server for PAGES, sent with the validators in `validators` ("etag", "last_modified")
+    and answered with 304 when a conditional GET still matches. Counts full and 304 responses.
+    """
+
+    def __init__(self, validators, latency=0.05):
+        self.validators = validators
+        self.latency = latency
+        self.stats = {"pages": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+        board = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                html = PAGES.get(self.path.split("?", 1)[0])
+                if html is None:
+                    self.send_error(404)
+                    return
+                time.sleep(board.latency)
+                data = html.encode("utf-8")
+                headers = {}
+                if "etag" in board.validators:
+                    headers["ETag"] = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+                if "last_modified" in board.validators:
+                    headers["Last-Modified"] = LAST_MODIFIED
+                not_modified = bool(headers) and all(
+                    self.headers.get(request_header) == headers[header]
+                    for header, request_header in (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since"))
+                    if header in headers
+                )
+                board.count("not_modified" if not_modified else "pages")
+                self.send_response(304 if not_modified else 200)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if not_modified:
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def blob_count(cache):
+    with cache.store._connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM entries WHERE key LIKE 'blob:%'").fetchone()[0]
+
+def timed(fetch, *args):
+    start = time.perf_counter()
+    body = fetch(*args)
+    return body, (time.perf_counter() - start) * 1000
+
+def check(failures, condition, message):
+    print(("ok    " if condition else "FAIL  ") + message)
+    if not condition:
+        failures.append(message)
+
+def run(validators, fetches, latency, failures):
+    board = JobBoard(validators, latency)
+    cache = ScrapeCache(cache_dir=tempfile.mkdtemp(prefix="bench-scrape-cache-"))
+    url = board.url + "/jobs/senior-python-engineer"
+    print(f"validators: {', '.join(validators)}")
+
+    # Equivalent spellings of one posting URL (tracking parameters, trailing slash, scheme case), fetched concurrently
+    variants = [url, url + "/", url + "?utm_source=newsletter", url.replace("http://", "HTTP://") + "?gclid=abc",
+                url + "?fbclid=xyz&utm_campaign=x"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=fetches) as pool:
+        bodies = list(pool.map(cache.fetch, [variants[i % len(variants)] for i in range(fetches)]))
+    cold_ms = (time.perf_counter() - start) * 1000
+    check(failures, board.stats["pages"] == 1 and len(set(bodies)) == 1,
+          f"{fetches} concurrent fetches of {len(variants)} URL spellings: {board.stats['pages']} origin fetch "
+          f"({cold_ms:.1f} ms)")
+
+    body, hit_ms = timed(cache.fetch, url)
+    check(failures, board.stats["pages"] == 1 and body == bodies[0], f"fresh entry served without a request ({hit_ms:.2f} ms)")
+
+    # Past the TTL the entry is revalidated with a conditional GET
+    cache.ttl = 0
+    body, revalidate_ms = timed(cache.fetch, url)
+    check(failures, board.stats["pages"] == 1 and board.stats["not_modified"] == 1
+          and cache.revalidations == 1 and body == bodies[0],
+          f"stale entry revalidated with a 304 ({revalidate_ms:.1f} ms)")
+    cache.ttl = 6 * 60 * 60
+    body, hit_ms = timed(cache.fetch, url)
+    check(failures, board.stats["pages"] == 1 and board.stats["not_modified"] == 1,
+          f"304 restarted the entry's TTL ({hit_ms:.2f} ms)")
+
+    # A different posting URL with the same content shares the stored body
+    cache.fetch(board.url + "/jobs/senior-python-engineer-mirror")
+    check(failures, board.stats["pages"] == 2 and blob_count(cache) == 1,
+          f"same page under two URLs: {board.stats['pages']} origin fetches, {blob_count(cache)} stored body")
+
+    # Capped at its current size, the store evicts the least recently used entries for a new page,
+    # and the evicted posting is fetched from the origin again
+    cache.store.max_bytes = cache.store.total_bytes()
+    cache.fetch(board.url + "/jobs/platform-engineer")
+    pages = board.stats["pages"]
+    cache.fetch(url)
+    check(failures, board.stats["pages"] == pages + 1 and cache.store.total_bytes() <= cache.store.max_bytes,
+          f"LRU eviction at {cache.store.max_bytes} bytes: evicted posting fetched again, "
+          f"{cache.store.total_bytes()} bytes stored")
+    board.stop()
+
+def main():
+    fetches = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    failures = []
+    for validators in (("etag", "last_modified"), ("etag",), ("last_modified",)):
+        run(validators, fetches, latency, failures)
+        print()
+    if failures:
+        sys.exit(1)
+    print("all scrape cache checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Benchmark: build, reopen and query latency of the local candidate index
+# Usage: python benchmarks/bench_semantic_index.py [resume_paragraphs] [embeddings: hashing|local|openai]
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_index import build_index, get_embedder, EMBEDDINGS_FILE, CHUNKS_FILE
+
+SKILLS = ["Python", "PostgreSQL", "Kubernetes", "Terraform", "React", "Kafka", "Redis", "AWS Lambda", "GraphQL", "Rust"]
+
+def synthetic_resume(paragraphs):
+    lines = []
+    for i in range(paragraphs):
+        skill = SKILLS[i % len(SKILLS)]
+        lines.append(f"## Role {i}\nLed a team of {i % 7 + 2} engineers building {skill} services; "
+                     f"cut p99 latency by {10 + i % 50}% and migrated {i * 3} jobs to {SKILLS[(i + 3) % len(SKILLS)]}.")
+    return "\n\n".join(lines)
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    kind = sys.argv[2] if len(sys.argv) > 2 else "hashing"
+    root = tempfile.mkdtemp(prefix="bench-index-")
+    embedder = get_embedder(kind)
+    documents = [("resume", synthetic_resume(paragraphs)), ("github:README", synthetic_resume(paragraphs // 4))]
+
+    start = time.perf_counter()
+    index = build_index(documents, embedder, root=root)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = build_index(documents, embedder, root=root)
+    reopen = time.perf_counter() - start
+
+    queries = [f"experience with {skill} at scale" for skill in SKILLS]
+    for query in queries:
+        index.search(query)
+    timings = []
+    for _ in range(50):
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - start)
+
+    size = sum(os.path.getsize(os.path.join(index.path, name)) for name in (EMBEDDINGS_FILE, CHUNKS_FILE))
+    print(f"embedder {embedder.name}, {len(index.chunks)} chunks, {size / 1024:.0f} KiB on disk")
+    print(f"build (first run)      {build * 1000:8.1f} ms")
+    print(f"reopen (same digest)   {reopen * 1000:8.2f} ms")
+    print(f"search p50 / p99       {statistics.median(timings) * 1e6:8.0f} / {sorted(timings)[int(len(timings) * 0.99)] * 1e6:.0f} us")
+    print(f"top hit for '{queries[0]}': [{index.search(queries[0])[0][1]}] {index.search(queries[0])[0][2][:80]!r}")
+    shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
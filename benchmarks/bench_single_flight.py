@@ -0,0 +1,48 @@
+# Benchmark: a burst of identical submissions through the job executor, with and without run coalescing
+# Usage: python benchmarks/bench_single_flight.py [submissions] [seconds_per_llm_call]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_services import MockServices
+from _env import use_scratch_env
+
+def burst(executor, inputs, submissions, coalesce_key):
+    """Submit the same run `submissions` times at once; returns (seconds, distinct jobs)"""
+    from pipeline import run_crew
+    start = time.perf_counter()
+    job_ids = {executor.submit(run_crew, inputs, coalesce_key=coalesce_key) for _ in range(submissions)}
+    while not all(executor.get(job_id).done for job_id in job_ids):
+        time.sleep(0.05)
+    return time.perf_counter() - start, len(job_ids)
+
+def main():
+    submissions = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    services = MockServices(latency=latency).start()
+    use_scratch_env(services, "bench-single-flight-")
+
+    import pipeline
+    from jobs import JobExecutor
+    from llm_cache import RESPONSE_CACHE
+
+    inputs = {"job_posting_url": services.job_posting_url(), "github_url": services.github_url(),
+              "personal_writeup": "Backend engineer, 6 years of Python, PostgreSQL and Kubernetes."}
+    key = pipeline.run_key(inputs["job_posting_url"], inputs["github_url"], inputs["personal_writeup"])
+    executor = JobExecutor(max_workers=submissions)
+    print(f"{submissions} identical submissions, {latency} s per LLM call")
+    print(f"{'mode':12} {'seconds':>8} {'runs':>5} {'llm calls':>9} {'prompt tokens':>13}")
+    for name, coalesce_key in (("independent", None), ("coalesced", key)):
+        # Start cold each time so only coalescing can avoid repeated work
+        for cache in (pipeline.JOB_INTELLIGENCE_CACHE, pipeline.CANDIDATE_PROFILE_CACHE, pipeline.TASK_OUTPUT_MEMO, RESPONSE_CACHE):
+            cache.clear()
+        calls, tokens = services.stats["chat"], services.stats["prompt_tokens"]
+        seconds, runs = burst(executor, inputs, submissions, coalesce_key)
+        print(f"{name:12} {seconds:8.2f} {runs:5d} {services.stats['chat'] - calls:9d} "
+              f"{services.stats['prompt_tokens'] - tokens:13d}")
+    services.stop()
+
+if __name__ == "__main__":
+    main()
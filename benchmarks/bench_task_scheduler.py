@@ -0,0 +1,92 @@
+# Benchmark: wall time of the crew tasks under the sequential Crew vs the dependency-aware scheduler
+# Usage: python benchmarks/bench_task_scheduler.py [seconds_per_llm_call]
+# Uses an in-process stub LLM with fixed latency, so no API keys or network are needed.
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("SERPER_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_MODEL_NAME", "gpt-4o-mini")
+# Keep CrewAI's telemetry round-trips out of the measurement
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("JOB_CREW_WORKSPACE_DIR", tempfile.mkdtemp(prefix="bench-workspace-"))
+
+from crewai import Crew
+from crewai.llms.base_llm import BaseLLM
+
+from agents import create_agents, run_agents
+from tasks import agent_tasks, TASK_NAMES
+from scheduler import run_task_graph, task_dependencies, critical_path
+
+# The resume walkthrough is a short companion to the interview guide, so its call takes a fraction as long
+SHORT_TASKS = {"interview_resume_task": 0.25}
+# Stub latency per task object, set by stub_tasks
+_task_latency = {}
+
+class SleepLLM(BaseLLM):
+    """Stub LLM that answers every call with a final answer after a fixed (per-task) delay"""
+
+    latency: float = 0.5
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        time.sleep(_task_latency.get(id(from_task), self.latency))
+        return "Thought: I now know the final answer\nFinal Answer: # Stub output\n- point"
+
+def task_latencies(latency):
+    return {name: latency * SHORT_TASKS.get(name, 1) for name in TASK_NAMES}
+
+def stub_tasks(latency, interview_waits_for_resume=False):
+    agents = run_agents(create_agents())
+    for agent in agents:
+        agent.llm = SleepLLM(model="stub", latency=latency)
+        agent.tools = []
+        agent.verbose = False
+    named_tasks = list(zip(TASK_NAMES, agent_tasks(agents)))
+    for name, task in named_tasks:
+        task.output_file = None
+        _task_latency[id(task)] = task_latencies(latency)[name]
+    if interview_waits_for_resume:
+        # The previous layout: the interview guide needed the tailored resume
+        tasks = dict(named_tasks)
+        tasks["interview_preparation_task"].context = [tasks["research_task"], tasks["profile_task"],
+                                                       tasks["resume_strategy_task"]]
+    return agents, named_tasks
+
+def inputs():
+    return {"job_posting_url": "https://example.com/job", "github_url": "https://github.com/example",
+            "personal_writeup": "Engineer", "job_posting": "", "github_summary": "", "run_id": "bench"}
+
+def timed_graph(latency, interview_waits_for_resume):
+    _, named_tasks = stub_tasks(latency, interview_waits_for_resume)
+    start = time.perf_counter()
+    run_task_graph(named_tasks, inputs())
+    elapsed = time.perf_counter() - start
+    return elapsed, critical_path(task_dependencies(named_tasks), task_latencies(latency))
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+
+    agents, named_tasks = stub_tasks(latency)
+    crew = Crew(agents=list(agents), tasks=[task for _, task in named_tasks], verbose=False)
+    start = time.perf_counter()
+    crew.kickoff(inputs=inputs())
+    crew_seconds = time.perf_counter() - start
+
+    waiting_seconds, waiting_bound = timed_graph(latency, True)
+    graph_seconds, graph_bound = timed_graph(latency, False)
+
+    serial = sum(task_latencies(latency).values())
+    print(f"LLM latency {latency:.2f}s per call, {len(named_tasks)} tasks ({serial:.2f}s if fully serial)")
+    print(f"{'mode':44} {'wall':>8} {'critical path':>14}")
+    print(f"{'crew kickoff':44} {crew_seconds:7.2f}s")
+    print(f"{'dependency-aware, interview waits for resume':44} {waiting_seconds:7.2f}s {waiting_bound:13.2f}s")
+    print(f"{'dependency-aware, interview alongside resume':44} {graph_seconds:7.2f}s {graph_bound:13.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Benchmark: resume text extraction over synthetic 5-, 50- and 500-page PDFs
+# Usage: python benchmarks/bench_text_extraction.py
+import os
+import io
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2
+from documents import pdf_text
+
+LINES_PER_PAGE = 40
+
+def synthetic_pdf(pages):
+    """Build a minimal multi-page PDF with LINES_PER_PAGE lines of text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = " ".join(
+            f"(Page {page + 1} line {line + 1}: Senior Python engineer, distributed systems, 5 years experience.) Tj T*"
+            for line in range(LINES_PER_PAGE)
+        )
+        stream = f"BT /F1 10 Tf 12 TL 40 780 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return out.getvalue()
+
+def legacy_pdf_text(data):
+    """The original extract_text_from_pdf loop, kept for comparison"""
+    text = ""
+    for page in PyPDF2.PdfReader(io.BytesIO(data)).pages:
+        text += page.extract_text() + "\n"
+    return text
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main():
+    print(f"{'pages':>6} {'legacy':>10} {'streaming':>10} {'parallel':>10} {'capped':>10}")
+    for pages in (5, 50, 500):
+        data = synthetic_pdf(pages)
+        legacy, expected = timed(legacy_pdf_text, data)
+        streaming, text = timed(pdf_text, data, max_pages=None, max_chars=None, parallel=False)
+        assert text == expected
+        parallel, text = timed(pdf_text, data, max_pages=None, max_chars=None, parallel=True)
+        assert text == expected
+        capped, _ = timed(pdf_text, data, parallel=False)
+        print(f"{pages:>6} {legacy * 1000:>8.1f}ms {streaming * 1000:>8.1f}ms {parallel * 1000:>8.1f}ms {capped * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
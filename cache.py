@@ -0,0 +1,197 @@
+# Persistent caches shared by the crew pipeline
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# All on-disk caches live under one directory so they can be wiped together
+CACHE_DIR = os.getenv("JOB_CREW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "job_application_crew_cache"))
+
+def sha256_hex(*parts):
+    """Hash one or more str/bytes parts into a hex digest (parts are length-prefixed)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b""
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(str(len(part)).encode("ascii") + b":")
+        digest.update(part)
+    return digest.hexdigest()
+
+class DiskCache:
+    """
+    Size-bounded LRU key/value store backed by SQLite.
+    Safe to share between threads and between processes using the same cache directory.
+    Values are text; callers serialize structured data themselves (e.g. JSON).
+    """
+
+    def __init__(self, name, max_bytes=64 * 1024 * 1024, ttl=None, cache_dir=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.path = os.path.join(self.cache_dir, f"{name}.sqlite3")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, meta TEXT, "
+                "size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_entry(self, key):
+        """Return (value, meta, created) without applying the TTL, or None if absent"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, meta, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def get(self, key, default=None):
+        """Return the cached value if present and not expired, counting hits and misses"""
+        row = self.get_entry(key)
+        fresh = row is not None and (self.ttl is None or time.time() - row[2] <= self.ttl)
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if fresh else default
+
+    def set(self, key, value, meta=None):
+        """Store a value (and optional text metadata), then evict down to max_bytes"""
+        now = time.time()
+        size = len(value.encode("utf-8")) + len(key) + len(meta or "")
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, meta, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, meta, size, now, now),
+            )
+            self._evict(conn)
+
+    def touch(self, key, meta=None):
+        """Mark an entry as freshly validated without rewriting its value"""
+        now = time.time()
+        with self._connect() as conn:
+            if meta is None:
+                conn.execute("UPDATE entries SET created = ?, accessed = ? WHERE key = ?", (now, now, key))
+            else:
+                conn.execute("UPDATE entries SET created = ?, accessed = ?, meta = ? WHERE key = ?", (now, now, meta, key))
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def total_bytes(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for this process plus current on-disk usage"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "bytes": self.total_bytes()}
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the store fits in max_bytes"""
+        if self.max_bytes is None:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+class TieredCache:
+    """
+    Small in-memory LRU in front of a DiskCache.
+    Hot keys are served from process memory; everything else falls back to disk.
+    """
+
+    def __init__(self, name, max_items=32, max_bytes=64 * 1024 * 1024, ttl=None, cache_dir=None):
+        self.disk = DiskCache(name, max_bytes=max_bytes, ttl=ttl, cache_dir=cache_dir)
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        value = self.disk.get(key)
+        if value is None:
+            return default
+        self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        self.disk.set(key, value)
+        self._remember(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the function,
+    later callers wait for it and share its result (or exception). Nothing is kept afterwards.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
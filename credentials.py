@@ -0,0 +1,77 @@
+# Per-run API keys and model settings, so sessions with different keys can share one process
+import os
+import hashlib
+import contextvars
+from contextlib import contextmanager
+
+from app_utils import DEFAULT_MODEL_NAME
+
+class RunCredentials:
+    """
+    API keys, model and endpoints for one session or run.
+    Passed explicitly to create_agents / agent_tasks / agent_tools and scoped to a run with
+    credentials_scope(); never written to os.environ, so concurrent sessions cannot see each other's keys.
+    """
+
+    def __init__(self, openai_api_key=None, serper_api_key=None, model=None, openai_base_url=None,
+                 serper_base_url=None, github_token=None):
+        self.openai_api_key = openai_api_key or None
+        self.serper_api_key = serper_api_key or None
+        self.model = model or DEFAULT_MODEL_NAME
+        self.openai_base_url = openai_base_url or None
+        self.serper_base_url = serper_base_url or None
+        self.github_token = github_token or None
+
+    @classmethod
+    def from_env(cls):
+        """Credentials from the process environment (CLI, batch runs and the fallback for library callers)"""
+        return cls(
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            serper_api_key=os.getenv("SERPER_API_KEY"),
+            model=os.getenv("OPENAI_MODEL_NAME"),
+            openai_base_url=os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE"),
+            # SERPER_BASE_URL points search at a compatible endpoint (e.g. mock_services for offline runs)
+            serper_base_url=os.getenv("SERPER_BASE_URL"),
+            github_token=os.getenv("GITHUB_TOKEN"),
+        )
+
+    def with_keys(self, openai_api_key, serper_api_key):
+        """Copy of these settings (model, endpoints) with a session's own API keys"""
+        return RunCredentials(openai_api_key, serper_api_key, self.model, self.openai_base_url,
+                              self.serper_base_url, self.github_token)
+
+    @property
+    def complete(self):
+        """Both keys the crew needs are present"""
+        return bool(self.openai_api_key and self.serper_api_key)
+
+    def fingerprint(self):
+        """
+        Short, non-reversible fingerprint of the keys, model and endpoints.
+        Used to key process-wide registries of agents and tools without storing the keys themselves.
+        """
+        material = "|".join(value or "" for value in (self.openai_api_key, self.serper_api_key, self.model,
+                                                       self.openai_base_url, self.serper_base_url, self.github_token))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+    def __repr__(self):
+        # Never print the keys themselves
+        return f"RunCredentials(model={self.model!r}, fingerprint={self.fingerprint()!r})"
+
+_current = contextvars.ContextVar("run_credentials", default=None)
+
+def current_credentials():
+    """The credentials of the run this code is executing for, or the process environment's outside a run"""
+    return _current.get() or RunCredentials.from_env()
+
+@contextmanager
+def credentials_scope(credentials):
+    """
+    Make `credentials` the current ones for this context (e.g. one run).
+    Worker threads must run in a copy of this context (see scheduler.run_task_graph).
+    """
+    token = _current.set(credentials)
+    try:
+        yield credentials
+    finally:
+        _current.reset(token)
@@ -0,0 +1,356 @@
+# Bounded, configurable memory for a run's tasks, under either scheduler (JOB_CREW_SCHEDULER)
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import Any
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cache import CACHE_DIR
+from semantic_index import get_embedder, EMBEDDINGS
+from credentials import current_credentials
+
+# "run" keeps memories for the current run only (in process memory), "shared" keeps them across
+# runs in a bounded on-disk store, "off" disables crew memory and "crewai" uses the framework's
+# default Memory (LLM-analysed, unbounded LanceDB store under CREWAI_STORAGE_DIR)
+MEMORY_MODE = os.getenv("JOB_CREW_MEMORY", "run")
+# Embedding backend for memories: local|hashing|openai (see semantic_index); defaults to JOB_CREW_EMBEDDINGS
+MEMORY_EMBEDDINGS = os.getenv("JOB_CREW_MEMORY_EMBEDDINGS", EMBEDDINGS)
+MEMORY_BYTES = int(os.getenv("JOB_CREW_MEMORY_MB", 64)) * 1024 * 1024
+MEMORY_TTL = int(os.getenv("JOB_CREW_MEMORY_TTL", 7 * 24 * 60 * 60))
+
+# save: store task results; recall: add relevant memories to task prompts;
+# analysis: LLM extraction, scoping and consolidation of saved memories; deep_recall: LLM-planned recall;
+# tools: recall/remember tools for the agents. The LLM-driven ones add calls to every task
+# and little value to a single-shot pipeline, so they are off unless listed in JOB_CREW_MEMORY_FEATURES.
+MEMORY_FEATURES = ("save", "recall", "analysis", "deep_recall", "tools")
+ENABLED_FEATURES = frozenset(
+    feature.strip() for feature in os.getenv("JOB_CREW_MEMORY_FEATURES", "save,recall").split(",") if feature.strip()
+)
+# The framework default ("crewai") always gives agents the recall/remember tools
+MEMORY_TOOLS = MEMORY_MODE == "crewai" or "tools" in ENABLED_FEATURES
+
+# Memories kept per task result when LLM analysis is off
+MAX_EXTRACTED = 8
+MAX_MEMORY_CHARS = 600
+
+def _timestamp(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _datetime(timestamp):
+    # MemoryRecord uses naive UTC datetimes
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+def _in_scope(scope, prefix):
+    if not prefix or prefix == "/":
+        return True
+    prefix = prefix.rstrip("/")
+    return scope == prefix or scope.startswith(prefix + "/")
+
+class BoundedMemoryStorage:
+    """
+    Storage backend for CrewAI's unified Memory (crewai.memory.storage.backend.StorageBackend protocol).
+    Records and embeddings live in SQLite - in process memory when path is None - and search is a
+    NumPy cosine scan. Records older than `ttl` are dropped and the least recently used ones are
+    evicted once the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, path=None, max_bytes=MEMORY_BYTES, ttl=MEMORY_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, scope TEXT, categories TEXT, metadata TEXT,"
+                " importance REAL, created_at REAL, last_accessed REAL, source TEXT, private INTEGER,"
+                " content TEXT, embedding BLOB, size INTEGER)"
+            )
+        self._prune()
+
+    def _rows(self, scope_prefix=None, where="", params=()):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM records {where}", params).fetchall()
+        return [row for row in rows if _in_scope(row[1], scope_prefix)]
+
+    @staticmethod
+    def _record(row):
+        from crewai.memory.types import MemoryRecord
+        return MemoryRecord(
+            id=row[0], scope=row[1], categories=json.loads(row[2]), metadata=json.loads(row[3]),
+            importance=row[4], created_at=_datetime(row[5]), last_accessed=_datetime(row[6]),
+            source=row[7], private=bool(row[8]), content=row[9],
+            embedding=np.frombuffer(row[10], dtype=np.float32).tolist() if row[10] else None,
+        )
+
+    @staticmethod
+    def _matches(row, categories=None, metadata_filter=None):
+        if categories and not set(categories) & set(json.loads(row[2])):
+            return False
+        if metadata_filter:
+            metadata = json.loads(row[3])
+            return all(metadata.get(key) == value for key, value in metadata_filter.items())
+        return True
+
+    def save(self, records):
+        rows = []
+        for record in records:
+            embedding = np.asarray(record.embedding, dtype=np.float32).tobytes() if record.embedding else None
+            rows.append((record.id, record.scope, json.dumps(record.categories), json.dumps(record.metadata, default=str),
+                         record.importance, _timestamp(record.created_at), _timestamp(record.last_accessed),
+                         record.source, int(record.private), record.content, embedding,
+                         len(record.content.encode("utf-8")) + len(embedding or b"")))
+        with self._lock, self._conn:
+            # A memory saved again (e.g. the same finding in a later run) replaces the old copy
+            self._conn.executemany("DELETE FROM records WHERE scope = ? AND content = ?",
+                                   [(row[1], row[9]) for row in rows])
+            self._conn.executemany("INSERT OR REPLACE INTO records VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+        self._prune()
+
+    def update(self, record):
+        self.save([record])
+
+    def search(self, query_embedding, scope_prefix=None, categories=None, metadata_filter=None, limit=10, min_score=0.0):
+        rows = [row for row in self._rows(scope_prefix, "WHERE embedding IS NOT NULL")
+                if self._matches(row, categories, metadata_filter)]
+        query = np.asarray(query_embedding, dtype=np.float32)
+        rows = [row for row in rows if len(row[10]) == query.nbytes]
+        if not rows or not query.any():
+            return []
+        matrix = np.stack([np.frombuffer(row[10], dtype=np.float32) for row in rows])
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = matrix @ query / np.where(norms == 0, 1, norms)
+        order = np.argsort(-scores)[:limit]
+        return [(self._record(rows[i]), float(scores[i])) for i in order if scores[i] >= min_score]
+
+    def delete(self, scope_prefix=None, categories=None, record_ids=None, older_than=None, metadata_filter=None):
+        rows = self._rows(scope_prefix)
+        if record_ids is not None:
+            rows = [row for row in rows if row[0] in set(record_ids)]
+        if older_than is not None:
+            rows = [row for row in rows if row[5] < _timestamp(older_than)]
+        ids = [(row[0],) for row in rows if self._matches(row, categories, metadata_filter)]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM records WHERE id = ?", ids)
+        return len(ids)
+
+    def get_record(self, record_id):
+        rows = self._rows(where="WHERE id = ?", params=(record_id,))
+        return self._record(rows[0]) if rows else None
+
+    def list_records(self, scope_prefix=None, limit=200, offset=0):
+        rows = self._rows(scope_prefix, "ORDER BY created_at DESC")
+        return [self._record(row) for row in rows[offset:offset + limit]]
+
+    def get_scope_info(self, scope):
+        from crewai.memory.types import ScopeInfo
+        rows = self._rows(scope)
+        return ScopeInfo(
+            path=scope,
+            record_count=len(rows),
+            categories=sorted({category for row in rows for category in json.loads(row[2])}),
+            oldest_record=_datetime(min(row[5] for row in rows)) if rows else None,
+            newest_record=_datetime(max(row[5] for row in rows)) if rows else None,
+            child_scopes=self.list_scopes(scope),
+        )
+
+    def list_scopes(self, parent="/"):
+        parent = parent.rstrip("/")
+        children = set()
+        for row in self._rows(parent or None):
+            rest = row[1][len(parent):].strip("/")
+            if rest:
+                children.add(f"{parent}/{rest.split('/')[0]}")
+        return sorted(children)
+
+    def list_categories(self, scope_prefix=None):
+        counts = {}
+        for row in self._rows(scope_prefix):
+            for category in json.loads(row[2]):
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def count(self, scope_prefix=None):
+        return len(self._rows(scope_prefix))
+
+    def reset(self, scope_prefix=None):
+        self.delete(scope_prefix=scope_prefix)
+
+    async def asave(self, records):
+        self.save(records)
+
+    async def asearch(self, query_embedding, scope_prefix=None, categories=None, metadata_filter=None, limit=10, min_score=0.0):
+        return self.search(query_embedding, scope_prefix, categories, metadata_filter, limit, min_score)
+
+    async def adelete(self, scope_prefix=None, categories=None, record_ids=None, older_than=None, metadata_filter=None):
+        return self.delete(scope_prefix, categories, record_ids, older_than, metadata_filter)
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM records").fetchone()[0]
+
+    def _prune(self):
+        with self._lock, self._conn:
+            if self.ttl:
+                self._conn.execute("DELETE FROM records WHERE created_at < ?", (time.time() - self.ttl,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM records").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for record_id, size in self._conn.execute("SELECT id, size FROM records ORDER BY last_accessed").fetchall():
+                self._conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class _Embedder:
+    """Adapts a semantic_index embedder to the batch embedding callable CrewAI memory expects"""
+
+    def __init__(self, kind):
+        self.embedder = get_embedder(kind)
+
+    def __call__(self, texts):
+        return [row.tolist() for row in self.embedder.embed(list(texts))]
+
+def extract_result_memories(content):
+    """LLM-free stand-in for Memory.extract_memories: the result's paragraphs and bullets, trimmed"""
+    result = content.split("Result:", 1)[-1]
+    parts = [re.sub(r"\s+", " ", part).strip(" -*#") for part in re.split(r"\n\s*\n|\n(?=\s*[-*#] )", result)]
+    return [part[:MAX_MEMORY_CHARS] for part in parts if len(part) > 20][:MAX_EXTRACTED]
+
+_memory_storages = {}
+_memory_storages_lock = threading.Lock()
+
+def shared_memory_storage(embedder_name):
+    """Process-wide store for "shared" mode, one file per embedding model so vectors never mix"""
+    with _memory_storages_lock:
+        if embedder_name not in _memory_storages:
+            path = os.path.join(CACHE_DIR, "crew_memory", f"{embedder_name}.sqlite3")
+            _memory_storages[embedder_name] = BoundedMemoryStorage(path)
+        return _memory_storages[embedder_name]
+
+try:
+    from pydantic import Field
+    from crewai.memory.unified_memory import Memory
+
+    class BoundedMemory(Memory):
+        """CrewAI Memory with the features in `features` only (see MEMORY_FEATURES)"""
+
+        features: Any = Field(default_factory=lambda: ENABLED_FEATURES)
+
+        def extract_memories(self, content):
+            if "analysis" in self.features:
+                return Memory.extract_memories(self, content)
+            return extract_result_memories(content)
+
+        def _encode_batch(self, contents, scope=None, categories=None, metadata=None, importance=None,
+                          source=None, private=False, root_scope=None):
+            if "analysis" in self.features:
+                return Memory._encode_batch(self, contents, scope, categories, metadata, importance, source,
+                                            private, root_scope)
+            # Embed and insert as given: no LLM scoping, categorisation or consolidation
+            # (the store replaces exact duplicates itself)
+            from crewai.memory.types import MemoryRecord, embed_texts
+            from crewai.memory.utils import join_scope_paths
+            contents = list(dict.fromkeys(contents))
+            records = [
+                MemoryRecord(content=content, scope=join_scope_paths(root_scope, scope or "/"),
+                             categories=categories or [], metadata=metadata or {},
+                             importance=self.default_importance if importance is None else importance,
+                             embedding=embedding or None, source=source, private=private)
+                for content, embedding in zip(contents, embed_texts(self._embedder, contents))
+            ]
+            self._storage.save(records)
+            return records
+
+        def recall(self, query, scope=None, categories=None, limit=10, depth="deep", **kwargs):
+            if "recall" not in self.features:
+                return []
+            if "deep_recall" not in self.features:
+                depth = "shallow"
+            return Memory.recall(self, query, scope=scope, categories=categories, limit=limit, depth=depth, **kwargs)
+
+except ImportError as e:
+    print(f"CrewAI unified memory not available, crew memory disabled: {e}")
+    BoundedMemory = None
+
+def crewai_embedder_config(credentials=None):
+    """
+    CrewAI's default memory embedder (OpenAI) with the run's key and endpoint; left to itself it would
+    read OPENAI_API_KEY from the process environment, shared by every session
+    """
+    credentials = credentials or current_credentials()
+    config = {"api_key": credentials.openai_api_key}
+    if credentials.openai_base_url:
+        config["api_base"] = credentials.openai_base_url
+    return {"provider": "openai", "config": config}
+
+def crew_memory(run_id, llm=None, mode=None, features=None, embeddings=None):
+    """
+    Memory for one run's tasks, or False when memory is off.
+    "run" mode scopes memories to run_id and keeps them in process memory (close() discards them);
+    "shared" mode uses the bounded on-disk store, capped by JOB_CREW_MEMORY_MB and JOB_CREW_MEMORY_TTL.
+    """
+    mode = mode or MEMORY_MODE
+    features = ENABLED_FEATURES if features is None else frozenset(features)
+    if mode == "off" or BoundedMemory is None:
+        return False
+    if mode == "crewai":
+        # What Crew(memory=True) builds, as an instance so the DAG scheduler's agents can share it
+        return Memory(root_scope="/crew/job-application", embedder=crewai_embedder_config(),
+                      **({"llm": llm} if llm is not None else {}))
+    if not features & {"save", "recall", "tools"}:
+        return False
+    embedder = _Embedder(embeddings or MEMORY_EMBEDDINGS)
+    shared = mode == "shared"
+    options = {"llm": llm} if llm is not None else {}
+    return BoundedMemory(
+        storage=shared_memory_storage(embedder.embedder.name) if shared else BoundedMemoryStorage(),
+        embedder=embedder,
+        root_scope="/crew/job-application" if shared else f"/run/{run_id}",
+        read_only="save" not in features,
+        features=features,
+        **options,
+    )
+
+def attach_memory(agents, memory, tools=None):
+    """
+    Give a run's agent copies the run's memory, for tasks executed without a Crew (the DAG scheduler).
+    Agents then recall before and save after each task exactly as under a Crew with the same memory.
+    """
+    if not memory:
+        return agents
+    tools = MEMORY_TOOLS if tools is None else tools
+    if tools:
+        from crewai.tools.memory_tools import create_memory_tools
+    for agent in agents:
+        agent.memory = memory
+        if tools:
+            agent.tools = list(agent.tools or []) + create_memory_tools(memory)
+    return agents
+
+def close_crew_memory(memory):
+    """Wait for background saves; a run-scoped store is discarded, the shared one stays open"""
+    if BoundedMemory is None or not isinstance(memory, Memory):
+        return
+    if memory._storage in _memory_storages.values():
+        memory.drain_writes()
+        memory._save_pool.shutdown(wait=True)
+    else:
+        memory.close()
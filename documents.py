@@ -0,0 +1,132 @@
+# Resume document helpers: streaming text extraction and a cache keyed by file digest
+import io
+import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from cache import TieredCache
+
+# Parsed resume text, keyed by SHA-256 of the uploaded bytes
+RESUME_TEXT_CACHE = TieredCache("resume_text", max_items=16, max_bytes=32 * 1024 * 1024, ttl=7 * 24 * 60 * 60)
+
+def file_digest(data):
+    """SHA-256 hex digest of raw file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def cached_resume_text(digest, extension, extract):
+    """Return the text for an uploaded file, calling extract() only on a cache miss"""
+    key = f"{extension}:{digest}"
+    text = RESUME_TEXT_CACHE.get(key)
+    if text is None:
+        text = extract()
+        # Failed extractions return "" and are not cached so a retry can succeed
+        if text:
+            RESUME_TEXT_CACHE.set(key, text)
+    return text
+
+# Hard caps for resume extraction; nothing past these limits is read
+MAX_RESUME_PAGES = 100
+MAX_RESUME_CHARS = 200_000
+# Opt-in: with JOB_CREW_PDF_WORKERS > 1, PDFs with at least PARALLEL_PAGE_THRESHOLD pages are split
+# across that many worker processes. Off by default: each worker re-parses the PDF, which only pays
+# off on multi-core hosts with very long documents.
+PDF_WORKERS = int(os.getenv("JOB_CREW_PDF_WORKERS", 0))
+PARALLEL_PAGE_THRESHOLD = 50
+
+def _read_bytes(source):
+    """Accept raw bytes or a file-like object (e.g. a Streamlit UploadedFile)"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+def join_chunks(chunks, max_chars=None):
+    """Join text chunks once, stopping the generator as soon as max_chars is reached"""
+    parts = []
+    total = 0
+    for chunk in chunks:
+        if max_chars is not None and total + len(chunk) >= max_chars:
+            parts.append(chunk[:max_chars - total])
+            break
+        parts.append(chunk)
+        total += len(chunk)
+    return "".join(parts)
+
+def _pdf_reader(source):
+    import PyPDF2
+    if isinstance(source, PyPDF2.PdfReader):
+        return source
+    return PyPDF2.PdfReader(io.BytesIO(_read_bytes(source)))
+
+def iter_pdf_pages(source, max_pages=None):
+    """Yield the text of each PDF page (newline-terminated), one page at a time; source may be a PdfReader"""
+    reader = _pdf_reader(source)
+    for index, page in enumerate(reader.pages):
+        if max_pages is not None and index >= max_pages:
+            break
+        yield (page.extract_text() or "") + "\n"
+
+def _extract_pdf_page_range(data, start, stop):
+    """Process pool worker: text of pages [start, stop) of a PDF given as bytes"""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [(reader.pages[index].extract_text() or "") + "\n" for index in range(start, stop)]
+
+def iter_pdf_pages_parallel(source, max_pages=None, workers=None, page_count=None):
+    """
+    Yield PDF page text in order while contiguous page ranges are extracted in worker processes.
+    Workers are spawned rather than forked, since forking the multithreaded app server can deadlock.
+    Pass page_count when the caller has already parsed the PDF.
+    """
+    data = _read_bytes(source)
+    if page_count is None:
+        page_count = len(_pdf_reader(data).pages)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+    workers = workers or os.cpu_count() or 1
+    # Each worker re-parses the PDF, so give it a few large ranges rather than many small ones
+    batch_size = max(1, -(-page_count // (workers * 2)))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(_extract_pdf_page_range, data, start, min(start + batch_size, page_count))
+            for start in range(0, page_count, batch_size)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Early stop: don't extract batches nobody will read
+            for future in futures:
+                future.cancel()
+
+def iter_docx_paragraphs(source, max_paragraphs=None):
+    """Yield the text of each Word paragraph (newline-terminated), one at a time"""
+    import docx
+    document = docx.Document(io.BytesIO(_read_bytes(source)))
+    for index, paragraph in enumerate(document.paragraphs):
+        if max_paragraphs is not None and index >= max_paragraphs:
+            break
+        yield paragraph.text + "\n"
+
+def pdf_text(source, max_pages=MAX_RESUME_PAGES, max_chars=MAX_RESUME_CHARS, parallel=None, workers=None):
+    """
+    Extract PDF text in linear time with page and character caps.
+    parallel=None uses worker processes only when JOB_CREW_PDF_WORKERS > 1 and the PDF has
+    PARALLEL_PAGE_THRESHOLD pages or more; the document is parsed once here either way.
+    """
+    data = _read_bytes(source)
+    reader = _pdf_reader(data)
+    workers = workers or PDF_WORKERS
+    if parallel is None:
+        parallel = workers > 1 and len(reader.pages) >= PARALLEL_PAGE_THRESHOLD
+    if parallel:
+        pages = iter_pdf_pages_parallel(data, max_pages, workers or None, page_count=len(reader.pages))
+    else:
+        pages = iter_pdf_pages(reader, max_pages)
+    return join_chunks(pages, max_chars)
+
+def docx_text(source, max_chars=MAX_RESUME_CHARS):
+    """Extract Word document text in linear time with a character cap"""
+    return join_chunks(iter_docx_paragraphs(source), max_chars)
@@ -0,0 +1,298 @@
+# Run lifecycle instrumentation: task, tool and LLM events per run
+import os
+import json
+import time
+import threading
+
+# Lifecycle event kinds recorded in a run's log
+RUN_STARTED = "run_started"
+RUN_FINISHED = "run_finished"
+TASK_STARTED = "task_started"
+TASK_COMPLETED = "task_completed"
+TASK_FAILED = "task_failed"
+TASK_CACHED = "task_cached"
+TOOL_STARTED = "tool_started"
+TOOL_FINISHED = "tool_finished"
+LLM_STARTED = "llm_started"
+LLM_COMPLETED = "llm_completed"
+
+class RunEventLog:
+    """
+    Structured event log for one run.
+    Keeps events in memory for UI progress and appends each one as a JSON line to log_path.
+    """
+
+    def __init__(self, run_id, log_path=None):
+        self.run_id = run_id
+        self.log_path = log_path
+        self.events = []
+        self.task_names = {}
+        self.tasks = {}
+        self.finished_at = None
+        # Streamed text of each task's current LLM call, and that call's ID
+        self.drafts = {}
+        self._draft_calls = {}
+        self._lock = threading.Lock()
+
+    def add_task(self, task_id, name, task=None):
+        self.task_names[str(task_id)] = name
+        if task is not None:
+            self.tasks[name] = task
+
+    def append_draft(self, name, call_id, chunk):
+        """
+        Add a streamed chunk to the task's draft and to its output file, if it has one.
+        A chunk from a new LLM call starts the draft over; CrewAI overwrites the file
+        with the final output when the task completes.
+        """
+        task = self.tasks.get(name)
+        output_file = getattr(task, "output_file", None)
+        if output_file and "{" in output_file:
+            # Not interpolated yet, so there is no per-run path to write to
+            output_file = None
+        with self._lock:
+            restart = self._draft_calls.get(name) != call_id
+            self._draft_calls[name] = call_id
+            self.drafts[name] = chunk if restart else self.drafts.get(name, "") + chunk
+            if output_file:
+                os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+                with open(output_file, "w" if restart else "a", encoding="utf-8") as f:
+                    f.write(chunk)
+
+    def draft(self, name):
+        """Text streamed so far for the task's latest LLM call, or None"""
+        with self._lock:
+            return self.drafts.get(name)
+
+    def record(self, kind, **fields):
+        event = {"ts": time.time(), "run_id": self.run_id, "event": kind}
+        event.update(fields)
+        with self._lock:
+            self.events.append(event)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, default=str) + "\n")
+        for listener in list(_LISTENERS):
+            listener(self, event)
+        return event
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.events)
+
+    def progress(self):
+        """(finished tasks, total tasks, name of the most recently started task still running or None)"""
+        finished = set()
+        running = []
+        for event in self.snapshot():
+            if event["event"] in (TASK_COMPLETED, TASK_CACHED, TASK_FAILED):
+                finished.add(event["task"])
+                if event["task"] in running:
+                    running.remove(event["task"])
+            elif event["event"] == TASK_STARTED:
+                running.append(event["task"])
+        return len(finished), len(self.task_names), running[-1] if running else None
+
+    def llm_totals(self):
+        """(LLM calls, prompt tokens, completion tokens) recorded so far"""
+        calls = prompt = completion = 0
+        for event in self.snapshot():
+            if event["event"] == LLM_COMPLETED:
+                calls += 1
+                prompt += event.get("prompt_tokens") or 0
+                completion += event.get("completion_tokens") or 0
+        return calls, prompt, completion
+
+# Finished runs stay available to the UI for RUN_EVENTS_RETENTION seconds, at most MAX_FINISHED_RUNS of them;
+# older ones are dropped when another run finishes (like JobExecutor's finished jobs)
+RUN_EVENTS_RETENTION = int(os.getenv("JOB_CREW_RUN_EVENTS_RETENTION", 60 * 60))
+MAX_FINISHED_RUNS = int(os.getenv("JOB_CREW_MAX_FINISHED_RUNS", 64))
+
+# Active runs, looked up by run ID (UI) and by CrewAI task ID (event handlers)
+_RUNS = {}
+_RUN_BY_TASK_ID = {}
+_RUNS_LOCK = threading.Lock()
+# Callables notified of every recorded event: listener(event_log, event)
+_LISTENERS = []
+
+def add_event_listener(listener):
+    """Subscribe to every event recorded by any run in this process"""
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+
+def start_run_events(run_id, log_path=None):
+    event_log = RunEventLog(run_id, log_path)
+    with _RUNS_LOCK:
+        _RUNS[run_id] = event_log
+    install_crewai_listeners()
+    return event_log
+
+def track_tasks(event_log, named_tasks):
+    """Attribute CrewAI events for these (name, task) pairs to event_log"""
+    with _RUNS_LOCK:
+        for name, task in named_tasks:
+            event_log.add_task(task.id, name, task)
+            _RUN_BY_TASK_ID[str(task.id)] = event_log
+
+def finish_run_events(event_log, **fields):
+    event_log.record(RUN_FINISHED, **fields)
+    event_log.finished_at = time.time()
+    # The run's Task objects are only needed while it streams drafts
+    event_log.tasks = {}
+    with _RUNS_LOCK:
+        for task_id in event_log.task_names:
+            _RUN_BY_TASK_ID.pop(task_id, None)
+        _prune_finished_runs()
+
+def _prune_finished_runs():
+    """Drop finished runs past the retention window, then the oldest beyond MAX_FINISHED_RUNS"""
+    cutoff = time.time() - RUN_EVENTS_RETENTION
+    finished = sorted((log.finished_at, run_id) for run_id, log in _RUNS.items() if log.finished_at is not None)
+    for index, (finished_at, run_id) in enumerate(finished):
+        if finished_at < cutoff or index < len(finished) - MAX_FINISHED_RUNS:
+            del _RUNS[run_id]
+
+def get_run_events(run_id):
+    with _RUNS_LOCK:
+        return _RUNS.get(run_id)
+
+def discard_run_events(run_id):
+    with _RUNS_LOCK:
+        _RUNS.pop(run_id, None)
+
+def _log_for(task_id):
+    with _RUNS_LOCK:
+        return _RUN_BY_TASK_ID.get(str(task_id)) if task_id else None
+
+def _usage_tokens(usage):
+    usage = usage or {}
+    return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+_installed = False
+_install_lock = threading.Lock()
+
+def install_crewai_listeners():
+    """Register process-wide handlers on the CrewAI event bus (once)"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        try:
+            from crewai.events import (
+                crewai_event_bus,
+                TaskStartedEvent,
+                TaskCompletedEvent,
+                TaskFailedEvent,
+                ToolUsageStartedEvent,
+                ToolUsageFinishedEvent,
+                LLMCallStartedEvent,
+                LLMCallCompletedEvent,
+                LLMStreamChunkEvent,
+            )
+        except ImportError:
+            try:
+                from crewai.utilities.events import (
+                    crewai_event_bus,
+                    TaskStartedEvent,
+                    TaskCompletedEvent,
+                    TaskFailedEvent,
+                    ToolUsageStartedEvent,
+                    ToolUsageFinishedEvent,
+                    LLMCallStartedEvent,
+                    LLMCallCompletedEvent,
+                    LLMStreamChunkEvent,
+                )
+            except ImportError as e:
+                print(f"CrewAI event bus not available, run events disabled: {e}")
+                return
+        _installed = True
+
+    def task_id_of(event):
+        task = getattr(event, "task", None)
+        return str(task.id) if task is not None else getattr(event, "task_id", None)
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def on_task_started(source, event):
+        task_id = task_id_of(event)
+        event_log = _log_for(task_id)
+        if event_log:
+            # Size of the prompt as assembled for this task: its description, expected output and upstream context
+            from prompt_budget import task_prompt_tokens
+            task = getattr(event, "task", None)
+            fields = {"task_prompt_tokens": task_prompt_tokens(task, getattr(event, "context", None) or "")} if task else {}
+            event_log.record(TASK_STARTED, task=event_log.task_names[task_id], **fields)
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        task_id = task_id_of(event)
+        event_log = _log_for(task_id)
+        if event_log:
+            raw = getattr(event.output, "raw", "") or ""
+            event_log.record(TASK_COMPLETED, task=event_log.task_names[task_id], output_chars=len(raw))
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def on_task_failed(source, event):
+        task_id = task_id_of(event)
+        event_log = _log_for(task_id)
+        if event_log:
+            event_log.record(TASK_FAILED, task=event_log.task_names[task_id], error=str(event.error))
+
+    @crewai_event_bus.on(ToolUsageStartedEvent)
+    def on_tool_started(source, event):
+        event_log = _log_for(getattr(event, "task_id", None))
+        if event_log:
+            event_log.record(
+                TOOL_STARTED,
+                task=event_log.task_names[str(event.task_id)],
+                agent=event.agent_role,
+                tool=event.tool_name,
+            )
+
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def on_tool_finished(source, event):
+        event_log = _log_for(getattr(event, "task_id", None))
+        if event_log:
+            event_log.record(
+                TOOL_FINISHED,
+                task=event_log.task_names[str(event.task_id)],
+                agent=event.agent_role,
+                tool=event.tool_name,
+                duration=(event.finished_at - event.started_at).total_seconds(),
+                from_cache=getattr(event, "from_cache", False),
+            )
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def on_llm_started(source, event):
+        event_log = _log_for(getattr(event, "task_id", None))
+        if event_log:
+            event_log.record(
+                LLM_STARTED,
+                call_id=getattr(event, "call_id", None),
+                task=event_log.task_names[str(event.task_id)],
+                agent=getattr(event, "agent_role", None),
+                model=getattr(event, "model", None),
+            )
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def on_llm_completed(source, event):
+        event_log = _log_for(getattr(event, "task_id", None))
+        if event_log:
+            prompt_tokens, completion_tokens = _usage_tokens(getattr(event, "usage", None))
+            event_log.record(
+                LLM_COMPLETED,
+                call_id=getattr(event, "call_id", None),
+                task=event_log.task_names[str(event.task_id)],
+                agent=getattr(event, "agent_role", None),
+                model=getattr(event, "model", None),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+            )
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def on_llm_stream_chunk(source, event):
+        # Tool-call deltas are not part of the task's written output
+        if getattr(event, "tool_call", None) or not event.chunk:
+            return
+        event_log = _log_for(getattr(event, "task_id", None))
+        if event_log:
+            event_log.append_draft(event_log.task_names[str(event.task_id)], getattr(event, "call_id", None), event.chunk)
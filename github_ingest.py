@@ -0,0 +1,181 @@
+# GitHub profile ingestion: concurrent, ETag-cached API fetches digested into a compact profiler summary
+import os
+import re
+import json
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import DiskCache
+from credentials import current_credentials
+
+# Point both at a compatible server (e.g. mock_services) for offline runs
+GITHUB_API_URL = os.getenv("JOB_CREW_GITHUB_API", "https://api.github.com").rstrip("/")
+GITHUB_WEB_URL = os.getenv("JOB_CREW_GITHUB_WEB", "https://github.com").rstrip("/")
+# Repositories whose README and languages are fetched, most relevant first
+MAX_REPOS = int(os.getenv("JOB_CREW_GITHUB_MAX_REPOS", 8))
+README_EXCERPT_CHARS = 700
+# Cached responses younger than this are used without revalidating them
+REVALIDATE_AFTER = int(os.getenv("JOB_CREW_GITHUB_REVALIDATE", 10 * 60))
+FETCH_WORKERS = 8
+
+# API responses with their ETags; revalidated with If-None-Match (304s do not count against rate limits)
+GITHUB_CACHE = DiskCache("github_api", max_bytes=64 * 1024 * 1024, ttl=30 * 24 * 60 * 60)
+
+_IMAGE_OR_BADGE = re.compile(r"!\[[^\]]*\]\([^)]*\)|<img[^>]*>|\[!\[.*?\]\(.*?\)\]\(.*?\)")
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+def github_username(github_url):
+    """The user/organization name in a GitHub profile or repository URL, or None"""
+    url = (github_url or "").strip()
+    if url and "://" not in url:
+        url = f"https://{url}"
+    for base in (GITHUB_WEB_URL, "https://github.com", "https://www.github.com", "http://github.com"):
+        if url.lower().startswith(f"{base.lower()}/"):
+            username = urlparse(url[len(base):]).path.strip("/").split("/")[0]
+            return username or None
+    return None
+
+class GitHubClient:
+    """Pooled HTTP client for the GitHub REST API with an ETag-revalidated response cache"""
+
+    def __init__(self, api_url=None, token=None, cache=None, timeout=10, revalidate_after=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = (api_url or GITHUB_API_URL).rstrip("/")
+        self.cache = cache or GITHUB_CACHE
+        self.timeout = timeout
+        self.revalidate_after = REVALIDATE_AFTER if revalidate_after is None else revalidate_after
+        self.session = requests.Session()
+        self.session.mount(self.api_url, HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS))
+        self.session.headers["User-Agent"] = "job-application-crew"
+        token = token or current_credentials().github_token
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.stats = {"fresh": 0, "requests": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, path, raw=False):
+        """GET an API path; returns parsed JSON (or text when raw), or None for 404s"""
+        url = f"{self.api_url}{path}"
+        key = f"{'raw' if raw else 'json'}:{url}"
+        headers = {"Accept": "application/vnd.github.raw" if raw else "application/vnd.github+json"}
+        entry = self.cache.get_entry(key)
+        if entry is not None and time.time() - entry[2] < self.revalidate_after:
+            self._count("fresh")
+            return entry[0] if raw else json.loads(entry[0])
+        if entry is not None and entry[1]:
+            headers["If-None-Match"] = entry[1]
+
+        self._count("requests")
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            self._count("not_modified")
+            self.cache.touch(key)
+            body = entry[0]
+        elif response.status_code == 404:
+            return None
+        else:
+            response.raise_for_status()
+            body = response.text
+            self.cache.set(key, body, meta=response.headers.get("ETag"))
+        return body if raw else json.loads(body)
+
+def clean_readme(text, limit=README_EXCERPT_CHARS):
+    """One-line README excerpt without images, badges and HTML"""
+    text = _HTML_TAG.sub("", _IMAGE_OR_BADGE.sub("", text or ""))
+    text = re.sub(r"\s+", " ", text).strip()
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " ..."
+
+def _repo_rank(repo):
+    return (not repo.get("fork"), repo.get("stargazers_count", 0), repo.get("pushed_at") or "")
+
+class GitHubDigest:
+    """Result of ingestion: a compact markdown summary plus full README texts for the semantic index"""
+
+    def __init__(self, username, summary, readmes):
+        self.username = username
+        self.summary = summary
+        self.readmes = readmes
+
+def ingest_github_profile(github_url, client=None, max_repos=None):
+    """
+    Fetch a GitHub user's profile, repositories, READMEs and language stats concurrently
+    and digest them into a summary the profiler can use without browsing GitHub itself.
+    Returns None when the URL is not a GitHub profile or the API cannot be reached.
+    """
+    username = github_username(github_url)
+    if not username:
+        return None
+    client = client or GitHubClient()
+    max_repos = max_repos or MAX_REPOS
+    try:
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="github") as pool:
+            user_future = pool.submit(client.get, f"/users/{username}")
+            repos_future = pool.submit(client.get, f"/users/{username}/repos?per_page=100&sort=pushed")
+            user = user_future.result()
+            repos = repos_future.result() or []
+            if user is None:
+                return None
+
+            top = sorted(repos, key=_repo_rank, reverse=True)[:max_repos]
+            readme_futures = [pool.submit(client.get, f"/repos/{repo['full_name']}/readme", True) for repo in top]
+            language_futures = [pool.submit(client.get, f"/repos/{repo['full_name']}/languages") for repo in top]
+            readmes = [future.result() or "" for future in readme_futures]
+            languages = [future.result() or {} for future in language_futures]
+    except Exception as e:
+        print(f"GitHub ingestion failed for {github_url}: {e}")
+        return None
+
+    return GitHubDigest(
+        username,
+        summarize_github(user, repos, top, readmes, languages),
+        [(f"github:{repo['name']}/README", readme) for repo, readme in zip(top, readmes) if readme],
+    )
+
+def summarize_github(user, repos, top, readmes, languages):
+    """Markdown digest of the profile, language mix and most relevant repositories"""
+    lines = [f"## GitHub: {user.get('name') or user.get('login')} ({user.get('html_url') or user.get('login')})"]
+    facts = [f"{key}: {user[key]}" for key in ("bio", "company", "location", "blog") if user.get(key)]
+    facts.append(f"public repos: {user.get('public_repos', len(repos))}, followers: {user.get('followers', 0)}")
+    lines.extend(f"- {fact}" for fact in facts)
+
+    totals = {}
+    for repo_languages in languages:
+        for language, size in repo_languages.items():
+            totals[language] = totals.get(language, 0) + size
+    if not totals:
+        for repo in repos:
+            if repo.get("language"):
+                totals[repo["language"]] = totals.get(repo["language"], 0) + 1
+    if totals:
+        whole = sum(totals.values())
+        mix = ", ".join(f"{language} {100 * size / whole:.0f}%" for language, size in sorted(totals.items(), key=lambda item: -item[1])[:8])
+        lines.append(f"- languages (top repos, by code size): {mix}")
+
+    lines.append("")
+    lines.append(f"### Top {len(top)} repositories")
+    for repo, readme in zip(top, readmes):
+        details = [f"★{repo.get('stargazers_count', 0)}", f"forks {repo.get('forks_count', 0)}"]
+        if repo.get("language"):
+            details.append(repo["language"])
+        if repo.get("fork"):
+            details.append("fork")
+        if repo.get("pushed_at"):
+            details.append(f"last push {repo['pushed_at'][:10]}")
+        lines.append(f"#### {repo['name']} ({', '.join(details)})")
+        if repo.get("description"):
+            lines.append(repo["description"])
+        if repo.get("topics"):
+            lines.append(f"topics: {', '.join(repo['topics'])}")
+        excerpt = clean_readme(readme)
+        if excerpt:
+            lines.append(f"README: {excerpt}")
+        lines.append("")
+    return "\n".join(lines).strip()
@@ -0,0 +1,251 @@
+# Structured job posting extraction: boilerplate stripping, JSON-LD JobPosting parsing and section heuristics
+import re
+import json
+from html import unescape
+
+from scraping import SCRAPE_CACHE, html_to_text
+
+# Upper bound on the structured document handed to the researcher
+MAX_DOCUMENT_CHARS = 12000
+
+# <header> is kept: posting pages often put the job title and company there
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "nav", "footer",
+                    "aside", "form", "button", "select", "dialog"]
+# Matched against each class/id/role word, e.g. "cookie-banner" or "site_footer" but not "shared-layout"
+_BOILERPLATE_HINT = re.compile(
+    r"(^|[-_])(cookies?|consent|gdpr|banner|newsletter|subscribe|share|social|breadcrumbs?|related|similar|"
+    r"recommended|navbar|navigation|menu|modal|popup|sidebar|footer|skip|login|signup)([-_]|$)", re.I)
+
+# Section label -> heading pattern; the first match wins, so the more specific labels come first
+SECTION_PATTERNS = [
+    ("Nice to have", re.compile(r"nice[- ]to[- ]have|preferred|bonus|(a|big) plus|desired|ideally", re.I)),
+    ("Benefits", re.compile(r"benefit|perks|what we offer|we offer|compensation|salary|why (join|work)|rewards", re.I)),
+    ("About the company", re.compile(r"^about (?!you\b|(the|this) (role|job|position|opportunity))|who we are|our (mission|story)|company overview", re.I)),
+    ("About the role", re.compile(r"about (the|this) (role|job|position|opportunity)|overview|summary|job description|the opportunity", re.I)),
+    ("Responsibilities", re.compile(r"responsibilit|what you('| wi)ll do|what you will do|duties|day[- ]to[- ]day|the role|your role|in this role|your impact|you will", re.I)),
+    ("Requirements", re.compile(r"requirement|qualification|what you('ll)? (bring|need)|must[- ]have|you have|who you are|about you|"
+                                r"skills|experience|we('re| are) looking for|you should|tech stack|your profile", re.I)),
+]
+# Call-to-action and sharing lines that carry no information about the job
+_CALL_TO_ACTION = re.compile(r"^(apply( now| today| for this (job|position|role))?|share( this (job|position))?|"
+                             r"save( job)?|back to (all )?(jobs|search|openings)|see all (jobs|openings))[.!]?$", re.I)
+# Sections that only job postings have; two of them make a page count as a posting
+POSTING_SECTIONS = {"Responsibilities", "Requirements", "Nice to have", "Benefits"}
+
+_HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+_BLOCK_TAGS = _HEADING_TAGS + ["p", "li", "dt", "dd", "tr"]
+
+def _soup(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html or "", "html.parser")
+
+def _clean(text):
+    return re.sub(r"\s+", " ", text or "").strip()
+
+def classify_heading(text):
+    """Section label for a heading, or None when it is not a known job posting section"""
+    text = _clean(text).rstrip(":")
+    if not text or len(text) > 80:
+        return None
+    return next((label for label, pattern in SECTION_PATTERNS if pattern.search(text)), None)
+
+def strip_boilerplate(soup):
+    """Remove scripts, navigation, footers, cookie banners and similar chrome in place; returns the main content root"""
+    for tag in soup.find_all(BOILERPLATE_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.decomposed or tag.name in ("html", "body", "main", "article"):
+            continue
+        hints = list(tag.get("class") or []) + [tag.get("id") or "", tag.get("role") or ""]
+        if any(_BOILERPLATE_HINT.search(hint) for hint in hints if hint):
+            tag.decompose()
+    return soup.find("main") or soup.find("article") or soup.find(attrs={"role": "main"}) or soup.body or soup
+
+def _is_heading(tag):
+    if tag.name in _HEADING_TAGS:
+        return True
+    # <p><strong>Requirements:</strong></p> style headings
+    if tag.name in ("p", "dt", "div"):
+        text = _clean(tag.get_text(" "))
+        bold = tag.find(["strong", "b"])
+        return bool(bold) and _clean(bold.get_text(" ")) == text and 0 < len(text) <= 80
+    return False
+
+def extract_sections(root):
+    """
+    [(heading, label, [lines])] in document order. List items become "- " bullets; text
+    before the first heading is returned under "Overview". `label` is None for headings
+    that are not known posting sections.
+    """
+    sections = [["Overview", "About the role", []]]
+    seen = set()
+    # Innermost <div>s count as blocks too, for pages that use them instead of paragraphs
+    blocks = [block for block in root.find_all(_BLOCK_TAGS + ["div"])
+              if block.name != "div" or block.find(_BLOCK_TAGS + ["div"]) is None]
+    if not blocks:
+        lines = [_clean(line) for line in root.get_text("\n").splitlines()]
+        sections[0][2] = [line for line in lines if len(line) > 2]
+        return [tuple(section) for section in sections]
+
+    for block in blocks:
+        # Text is taken from the outermost block only
+        if block.name != "tr" and block.find_parent(["li", "p", "dd"]) is not None:
+            continue
+        text = _clean(block.get_text(" "))
+        if len(text) < 3 or _CALL_TO_ACTION.match(text):
+            continue
+        if _is_heading(block):
+            sections.append([text.rstrip(":"), classify_heading(text), []])
+            continue
+        line = f"- {text}" if block.name in ("li", "dd") else text
+        if line not in seen:
+            seen.add(line)
+            sections[-1][2].append(line)
+    return [tuple(section) for section in sections if section[2]]
+
+def _json_ld_postings(soup):
+    postings = []
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        try:
+            data = json.loads(script.string or script.get_text() or "")
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                kind = item.get("@type")
+                if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+                    postings.append(item)
+                stack.extend(value for key, value in item.items() if key == "@graph")
+    return postings
+
+def _name(value):
+    if isinstance(value, dict):
+        return value.get("name") or value.get("value")
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_name(item) for item in value)))
+    return value
+
+def _location(posting):
+    places = posting.get("jobLocation") or []
+    places = places if isinstance(places, list) else [places]
+    names = []
+    for place in places:
+        address = place.get("address", {}) if isinstance(place, dict) else {}
+        if isinstance(address, dict):
+            parts = [_name(address.get(key)) for key in ("addressLocality", "addressRegion", "addressCountry")]
+            names.append(", ".join(str(part) for part in parts if part))
+        elif address:
+            names.append(str(address))
+    if posting.get("jobLocationType") == "TELECOMMUTE":
+        names.append("Remote")
+    return "; ".join(name for name in names if name)
+
+def _salary(posting):
+    salary = posting.get("baseSalary")
+    if not isinstance(salary, dict):
+        return salary
+    value = salary.get("value", {})
+    currency = salary.get("currency") or (value.get("currency") if isinstance(value, dict) else "") or ""
+    if isinstance(value, dict):
+        amount = value.get("value") or "-".join(str(value[key]) for key in ("minValue", "maxValue") if key in value)
+        unit = value.get("unitText")
+    else:
+        amount, unit = value, salary.get("unitText")
+    return " ".join(str(part) for part in (amount, currency, f"per {unit.lower()}" if unit else "") if part)
+
+class JobPosting:
+    """Compact, structured view of a job posting page"""
+
+    def __init__(self, url=None, title=None, facts=None, sections=None, source="page heuristics"):
+        self.url = url
+        self.title = title
+        self.facts = facts or {}
+        self.sections = sections or []
+        self.source = source
+
+    @property
+    def labels(self):
+        return {label for _, label, _ in self.sections if label}
+
+    @property
+    def is_posting(self):
+        return self.source == "JSON-LD JobPosting" or len(self.labels & POSTING_SECTIONS) >= 2
+
+    def to_markdown(self, max_chars=None):
+        """Markdown document: title, key facts, then known sections in a fixed order followed by the rest"""
+        lines = [f"# {self.title or 'Job posting'}"]
+        lines.extend(f"- {key}: {value}" for key, value in self.facts.items() if value)
+
+        merged = {}
+        for heading, label, content in self.sections:
+            merged.setdefault(label or heading, []).extend(content)
+        order = ["About the role", "Responsibilities", "Requirements", "Nice to have", "Benefits", "About the company"]
+        for name in [name for name in order if name in merged] + [name for name in merged if name not in order]:
+            lines.append("")
+            lines.append(f"## {name}")
+            lines.extend(merged[name])
+
+        document = "\n".join(lines)
+        max_chars = max_chars or MAX_DOCUMENT_CHARS
+        return document if len(document) <= max_chars else document[:max_chars].rsplit("\n", 1)[0] + "\n[...]"
+
+def extract_job_posting(html, url=None):
+    """
+    Structured JobPosting for a page: schema.org JSON-LD when the page has it
+    (title, company, location, salary and description sections), otherwise
+    headings and bullets of the page's main content with boilerplate removed.
+    """
+    soup = _soup(html)
+    postings = _json_ld_postings(soup)
+    if postings:
+        posting = postings[0]
+        facts = {
+            "Company": _name(posting.get("hiringOrganization")),
+            "Location": _location(posting),
+            "Employment type": _name(posting.get("employmentType")),
+            "Salary": _salary(posting),
+            "Posted": posting.get("datePosted"),
+            "Apply by": posting.get("validThrough"),
+        }
+        description = posting.get("description") or ""
+        if "&lt;" in description:
+            description = unescape(description)
+        sections = extract_sections(strip_boilerplate(_soup(description)))
+        for key, label in (("responsibilities", "Responsibilities"), ("qualifications", "Requirements"),
+                           ("skills", "Requirements"), ("experienceRequirements", "Requirements"),
+                           ("educationRequirements", "Requirements"), ("jobBenefits", "Benefits")):
+            value = _name(posting.get(key))
+            if value:
+                sections.append((label, label, [f"- {_clean(html_to_text(str(value)))}"]))
+        return JobPosting(url, _clean(posting.get("title")), facts, sections, source="JSON-LD JobPosting")
+
+    meta = {tag.get("property") or tag.get("name"): tag.get("content")
+            for tag in soup.find_all("meta") if tag.get("content")}
+    root = strip_boilerplate(soup)
+    heading = root.find("h1") or soup.find("h1")
+    title = (_clean(heading.get_text(" ")) if heading else None) or meta.get("og:title") or (
+        _clean(soup.title.get_text()) if soup.title else None)
+    sections = extract_sections(root)
+    # Text under the title heading is the posting's introduction
+    sections = [("Overview", "About the role", content) if title and name in title else (name, label, content)
+                for name, label, content in sections]
+    return JobPosting(url, title, {"Company": meta.get("og:site_name")}, sections)
+
+def page_text(html, url=None):
+    """Text for an agent: the structured document for job postings, boilerplate-free text for other pages"""
+    posting = extract_job_posting(html, url)
+    if posting.is_posting:
+        return posting.to_markdown()
+    return html_to_text(str(strip_boilerplate(_soup(html))))
+
+def job_posting_document(url):
+    """Structured document for a job posting URL (fetched through the scrape cache), or None if it cannot be fetched"""
+    try:
+        return extract_job_posting(SCRAPE_CACHE.fetch(url), url).to_markdown()
+    except Exception as e:
+        print(f"Could not pre-process job posting {url}: {e}")
+        return None
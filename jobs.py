@@ -0,0 +1,124 @@
+# Background execution of crew runs so the Streamlit script thread never blocks on kickoff
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+class JobQueueFull(Exception):
+    """Raised when the executor is at capacity and cannot admit another run"""
+
+class Job:
+    """State of one submitted run, polled by the UI via its job ID"""
+
+    def __init__(self, job_id, metadata=None, coalesce_key=None):
+        self.job_id = job_id
+        self.metadata = metadata or {}
+        self.coalesce_key = coalesce_key
+        # Identical submissions that attached to this job instead of starting their own
+        self.attached = 0
+        # Sessions (the submitter and attached ones) that have collected the finished job
+        self.collected = 0
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+class JobExecutor:
+    """
+    Bounded worker pool with admission control.
+    At most max_workers runs execute at once and at most max_queued more may wait;
+    further submissions are rejected with JobQueueFull instead of piling up.
+    Finished jobs are kept for `retention` seconds so a refreshed page can still collect them.
+    A submission whose coalesce_key matches a queued or running job attaches to that job
+    (single flight) and shares its result instead of repeating the work.
+    """
+
+    def __init__(self, max_workers=4, max_queued=16, retention=60 * 60):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _active_count(self):
+        return sum(1 for job in self._jobs.values() if not job.done)
+
+    def submit(self, fn, *args, metadata=None, coalesce_key=None, **kwargs):
+        """Queue fn(*args, **kwargs) and return its job ID (an in-flight job's ID if coalesce_key matches one)"""
+        with self._lock:
+            self._prune()
+            if coalesce_key is not None:
+                for job in self._jobs.values():
+                    if job.coalesce_key == coalesce_key and not job.done:
+                        job.attached += 1
+                        return job.job_id
+            if self._active_count() >= self.max_workers + self.max_queued:
+                raise JobQueueFull("Too many applications are being processed right now. Please try again shortly.")
+            job = Job(uuid.uuid4().hex, metadata, coalesce_key)
+            self._jobs[job.job_id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.job_id
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        """Return the Job for job_id, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def collect(self, job_id):
+        """
+        Record that one session has picked up a finished job.
+        Returns True once the submitter and every attached session have, i.e. nobody is still watching it.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return True
+            job.collected += 1
+            return job.collected > job.attached
+
+    def queue_position(self, job_id):
+        """Number of queued jobs submitted before this one (0 once it is running)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            return sum(
+                1 for other in self._jobs.values()
+                if other.status == QUEUED and other.submitted_at < job.submitted_at
+            )
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+# One executor per server process, shared by every Streamlit session
+JOB_EXECUTOR = JobExecutor(
+    max_workers=int(os.getenv("JOB_CREW_MAX_WORKERS", 4)),
+    max_queued=int(os.getenv("JOB_CREW_MAX_QUEUED", 16)),
+)
@@ -0,0 +1,241 @@
+# Exact-match cache of LLM responses, shared between threads and processes through SQLite
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from cache import DiskCache, sha256_hex
+
+# "all" caches every completion, "deterministic" only temperature-0 requests, "off" disables the cache
+LLM_CACHE_MODE = os.getenv("JOB_CREW_LLM_CACHE", "all")
+LLM_CACHE_BYTES = int(os.getenv("JOB_CREW_LLM_CACHE_MB", 256)) * 1024 * 1024
+LLM_CACHE_TTL = int(os.getenv("JOB_CREW_LLM_CACHE_TTL", 30 * 24 * 60 * 60))
+
+# Request fields that change what the model returns; everything else (user, metadata, ...) is ignored
+KEY_FIELDS = ("model", "messages", "tools", "tool_choice", "temperature", "top_p", "max_tokens",
+              "max_completion_tokens", "stop", "seed", "response_format", "reasoning_effort",
+              "frequency_penalty", "presence_penalty", "logprobs", "top_logprobs", "n", "stream")
+# Request headers identifying the account a request is billed to; responses are only replayed to the same account
+CREDENTIAL_HEADERS = ("authorization", "api-key", "openai-organization", "openai-project")
+
+RESPONSE_CACHE = DiskCache("llm_responses", max_bytes=LLM_CACHE_BYTES, ttl=LLM_CACHE_TTL)
+
+class CacheStats:
+    """Hit, miss and tokens-saved counters for one run (or the whole process)"""
+
+    def __init__(self, refresh=False):
+        self.refresh = refresh
+        self.counts = {"hits": 0, "misses": 0, "stored": 0, "prompt_tokens_saved": 0, "completion_tokens_saved": 0}
+        self._lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self._lock:
+            for key, amount in amounts.items():
+                self.counts[key] += amount
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self.counts)
+
+PROCESS_STATS = CacheStats()
+_run_stats = contextvars.ContextVar("llm_cache_run_stats", default=None)
+
+@contextmanager
+def llm_cache_scope(refresh=False):
+    """
+    Collect cache statistics for the LLM calls made in this context (e.g. one run).
+    With refresh=True cached responses are not served but fresh ones still replace them,
+    for runs that regenerate an output on purpose.
+    Worker threads must run in a copy of this context (see scheduler.run_task_graph).
+    """
+    stats = CacheStats(refresh)
+    token = _run_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _run_stats.reset(token)
+
+def _count(**amounts):
+    PROCESS_STATS.add(**amounts)
+    stats = _run_stats.get()
+    if stats is not None:
+        stats.add(**amounts)
+
+def credentials_fingerprint(headers):
+    """Hash of a request's credential headers, so one tenant's cached responses are never served to another"""
+    return sha256_hex("llm-cache-credentials", *(headers.get(name) or "" for name in CREDENTIAL_HEADERS))
+
+def request_key(url, payload, credentials=""):
+    """
+    Cache key of a chat request: endpoint, credentials fingerprint and the fields that determine
+    the response, canonically serialized
+    """
+    fields = {field: payload[field] for field in KEY_FIELDS if payload.get(field) is not None}
+    return sha256_hex(str(url), credentials, json.dumps(fields, sort_keys=True, separators=(",", ":")))
+
+def cacheable(payload):
+    if LLM_CACHE_MODE == "off" or not payload.get("messages"):
+        return False
+    if LLM_CACHE_MODE == "deterministic":
+        return payload.get("temperature") == 0
+    return True
+
+def response_usage(body, streamed):
+    """(prompt tokens, completion tokens) reported in a JSON or server-sent-events response body"""
+    usage = None
+    if streamed:
+        for line in body.splitlines():
+            if line.startswith("data:") and '"usage"' in line:
+                try:
+                    usage = json.loads(line[5:]).get("usage") or usage
+                except ValueError:
+                    continue
+    else:
+        try:
+            usage = json.loads(body).get("usage")
+        except ValueError:
+            usage = None
+    usage = usage or {}
+    return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+
+try:
+    import httpx
+
+    class _RecordingStream(httpx.SyncByteStream):
+        """
+        Passes a response body through and stores it once it has been read to the end.
+        Streaming clients stop reading at the final event, so a body ending with `terminator` also counts as complete.
+        """
+
+        def __init__(self, stream, on_complete, terminator=None):
+            self.stream = stream
+            self.on_complete = on_complete
+            self.terminator = terminator
+            self.parts = []
+            self.finished = False
+
+        def __iter__(self):
+            for part in self.stream:
+                self.parts.append(part)
+                yield part
+            self.finished = True
+
+        def _complete(self):
+            body = b"".join(self.parts)
+            if self.terminator and body.rstrip().endswith(self.terminator):
+                self.finished = True
+            if self.finished and self.on_complete:
+                on_complete, self.on_complete = self.on_complete, None
+                on_complete(body)
+
+        def close(self):
+            try:
+                self.stream.close()
+            finally:
+                self._complete()
+
+    class _RecordingAsyncStream(_RecordingStream, httpx.AsyncByteStream):
+        """_RecordingStream for responses of an async transport"""
+
+        async def __aiter__(self):
+            async for part in self.stream:
+                self.parts.append(part)
+                yield part
+            self.finished = True
+
+        async def aclose(self):
+            try:
+                await self.stream.aclose()
+            finally:
+                self._complete()
+
+    class CachingTransport(httpx.BaseTransport):
+        """
+        httpx transport serving repeated chat completions from RESPONSE_CACHE.
+        Hits never reach the wrapped transport (so they cost no rate-limit budget);
+        successful misses are stored once their body, streamed or not, has been fully read.
+        """
+
+        def __init__(self, transport, cache=None):
+            self.transport = transport
+            self.cache = cache or RESPONSE_CACHE
+
+        def _lookup(self, request):
+            """(key, payload, cached response) for a read chat request; key is None when it must not be cached"""
+            if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+                return None, None, None
+            try:
+                payload = json.loads(request.content or b"{}")
+            except ValueError:
+                payload = {}
+            if not cacheable(payload):
+                return None, payload, None
+
+            key = request_key(request.url.copy_with(query=None), payload, credentials_fingerprint(request.headers))
+            scope = _run_stats.get()
+            if not (scope is not None and scope.refresh):
+                entry = self.cache.get_entry(key)
+                if entry is not None and time.time() - entry[2] <= LLM_CACHE_TTL:
+                    meta = json.loads(entry[1] or "{}")
+                    _count(hits=1, prompt_tokens_saved=meta.get("prompt_tokens", 0),
+                           completion_tokens_saved=meta.get("completion_tokens", 0))
+                    return key, payload, httpx.Response(
+                        200, headers={"content-type": meta.get("content_type", "application/json"),
+                                      "x-job-crew-cache": "hit"},
+                        stream=httpx.ByteStream(entry[0].encode("utf-8")))
+            _count(misses=1)
+            # Bodies are stored as sent, so ask for them uncompressed
+            request.headers["Accept-Encoding"] = "identity"
+            return key, payload, None
+
+        def _recording(self, response, key, payload, stream_class):
+            """The response, with its body stored under key once fully read"""
+            if response.status_code != 200:
+                return response
+            content_type = response.headers.get("content-type", "application/json")
+            streamed = bool(payload.get("stream"))
+
+            def store(body):
+                text = body.decode("utf-8", errors="replace")
+                prompt_tokens, completion_tokens = response_usage(text, streamed)
+                self.cache.set(key, text, meta=json.dumps({"content_type": content_type, "prompt_tokens": prompt_tokens,
+                                                           "completion_tokens": completion_tokens}))
+                _count(stored=1)
+
+            return httpx.Response(200, headers=response.headers, extensions=response.extensions,
+                                  stream=stream_class(response.stream, store, b"data: [DONE]" if streamed else None))
+
+        def handle_request(self, request):
+            request.read()
+            key, payload, cached = self._lookup(request)
+            if cached is not None:
+                return cached
+            response = self.transport.handle_request(request)
+            return self._recording(response, key, payload, _RecordingStream) if key else response
+
+        def close(self):
+            self.transport.close()
+
+    class AsyncCachingTransport(CachingTransport, httpx.AsyncBaseTransport):
+        """CachingTransport for httpx.AsyncClient, wrapping an async transport"""
+
+        async def handle_async_request(self, request):
+            await request.aread()
+            key, payload, cached = self._lookup(request)
+            if cached is not None:
+                return cached
+            response = await self.transport.handle_async_request(request)
+            return self._recording(response, key, payload, _RecordingAsyncStream) if key else response
+
+        async def aclose(self):
+            await self.transport.aclose()
+
+except ImportError:
+    CachingTransport = None
+    AsyncCachingTransport = None
+
+def cache_stats():
+    """Process-wide counters plus the store's size on disk"""
+    return dict(PROCESS_STATS.to_dict(), bytes=RESPONSE_CACHE.total_bytes(), mode=LLM_CACHE_MODE)
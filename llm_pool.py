@@ -0,0 +1,514 @@
+# Process-wide, rate-limit-aware LLM client pool shared by every agent
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import weakref
+import threading
+
+from credentials import current_credentials
+from cache import sha256_hex
+from llm_cache import CachingTransport, AsyncCachingTransport, LLM_CACHE_MODE
+
+# Provider limits per API key; refined from x-ratelimit-* response headers when the provider sends them
+REQUESTS_PER_MINUTE = int(os.getenv("JOB_CREW_LLM_RPM", 500))
+TOKENS_PER_MINUTE = int(os.getenv("JOB_CREW_LLM_TPM", 200000))
+# Bounds of the adaptive concurrency limit (AIMD) per API key
+MAX_CONCURRENCY = int(os.getenv("JOB_CREW_LLM_MAX_CONCURRENCY", 16))
+INITIAL_CONCURRENCY = int(os.getenv("JOB_CREW_LLM_INITIAL_CONCURRENCY", 4))
+# Retries of throttled (429), overloaded (5xx) or dropped requests, with jittered exponential backoff
+MAX_RETRIES = int(os.getenv("JOB_CREW_LLM_RETRIES", 6))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# Completion tokens assumed for requests that do not set max_tokens
+COMPLETION_ESTIMATE = 1000
+# Set to 1 for deterministic replays: every agent samples at temperature 0 with a fixed seed
+DETERMINISTIC = os.getenv("JOB_CREW_LLM_DETERMINISTIC", "0") == "1"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+
+def parse_duration(text):
+    """Seconds in an x-ratelimit-reset value such as "1s", "6m0s" or "20ms" (None when absent)"""
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", text):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+class TokenBucket:
+    """
+    Reservation-style token bucket: callers take what they need immediately (the balance may
+    go negative) and sleep until the debt is repaid, so waiting callers are served in order.
+    """
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take `amount` tokens and return how long the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds` (e.g. a provider Retry-After)"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe(self, limit=None, remaining=None, reset_seconds=None):
+        """Adopt the provider's view of the limit and the remaining budget when it is stricter than ours"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.rate = limit / 60.0
+                self.capacity = float(limit)
+            if remaining is not None:
+                # Requests still in flight are already counted by the provider, so only ever lower the balance
+                self.tokens = min(self.tokens, float(remaining))
+                if reset_seconds and remaining <= 0:
+                    self.paused_until = max(self.paused_until, time.monotonic() + reset_seconds)
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: +1 per limit-many successful responses, halved on a throttle
+    (at most once per cooldown), reduced by 10% when latency climbs well above its baseline.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=1, maximum=MAX_CONCURRENCY, cooldown=1.0):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.baseline = None
+        self.last_decrease = 0.0
+        self._condition = threading.Condition()
+        # (event loop, future) of async callers waiting for a slot
+        self._async_waiters = []
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        """acquire() for async callers: waits on the event loop until a slot is released, without blocking it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def _wake_async_waiters(self):
+        # Called with the condition held; every waiter re-checks, so a cancelled one cannot strand a slot
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(lambda future=future: future.done() or future.set_result(None))
+            except RuntimeError:
+                # That caller's event loop has closed
+                pass
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+            self._wake_async_waiters()
+
+    def _decrease(self, factor):
+        now = time.monotonic()
+        if now - self.last_decrease >= self.cooldown:
+            self.limit = max(self.minimum, self.limit * factor)
+            self.last_decrease = now
+
+    def on_success(self, first_byte_seconds=None):
+        """
+        Record a successful response. `first_byte_seconds` is only given for streamed requests,
+        where time to first byte tracks provider queueing rather than completion length.
+        """
+        with self._condition:
+            congested = False
+            if first_byte_seconds is not None:
+                # A slow-moving minimum of time to first byte is the uncongested baseline
+                if self.baseline is None or first_byte_seconds < self.baseline:
+                    self.baseline = first_byte_seconds
+                else:
+                    self.baseline += (first_byte_seconds - self.baseline) * 0.01
+                congested = first_byte_seconds > max(2 * self.baseline, self.baseline + 1.0)
+            if congested:
+                self._decrease(0.9)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+    def on_throttle(self):
+        with self._condition:
+            self._decrease(0.5)
+
+def request_profile(request):
+    """(tokens the request may consume, whether it streams): prompt at ~4 bytes per token plus the completion allowance"""
+    body = request.content or b""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = {}
+    completion = payload.get("max_completion_tokens") or payload.get("max_tokens") or COMPLETION_ESTIMATE
+    return len(body) // 4 + int(completion), bool(payload.get("stream"))
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets plus adaptive concurrency for one API key"""
+
+    def __init__(self, rpm=None, tpm=None, concurrency=None):
+        self.requests = TokenBucket(rpm or REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tpm or TOKENS_PER_MINUTE)
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "failed": 0, "wait_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["concurrency_limit"] = round(self.concurrency.limit, 2)
+        stats["in_flight"] = self.concurrency.in_flight
+        return stats
+
+    def acquire(self, tokens):
+        start = time.monotonic()
+        self.concurrency.acquire()
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            time.sleep(wait)
+        self.count("wait_seconds", time.monotonic() - start)
+
+    async def acquire_async(self, tokens):
+        """acquire() for async callers: waits on the event loop instead of blocking it"""
+        start = time.monotonic()
+        await self.concurrency.acquire_async()
+        try:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            # Cancelled while waiting for the budget: give the slot back
+            self.concurrency.release()
+            raise
+        self.count("wait_seconds", time.monotonic() - start)
+
+    def observe_headers(self, headers):
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if limit is None and remaining is None:
+                continue
+            bucket.observe(int(limit) if limit else None, int(remaining) if remaining else None,
+                           parse_duration(headers.get(f"x-ratelimit-reset-{kind}")))
+
+def retry_delay(attempt, headers=None):
+    """Provider Retry-After when given, else full-jitter exponential backoff"""
+    headers = headers or {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000 + random.uniform(0, 0.1)
+    if headers.get("retry-after"):
+        seconds = parse_duration(headers["retry-after"])
+        if seconds is not None:
+            return seconds + random.uniform(0, 0.25 * seconds + 0.1)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+try:
+    import httpx
+
+    class _ReleasingStream(httpx.SyncByteStream):
+        """Response body that gives the concurrency slot back once it has been read or closed"""
+
+        def __init__(self, stream, on_close):
+            self.stream = stream
+            self.on_close = on_close
+
+        def __iter__(self):
+            yield from self.stream
+
+        def close(self):
+            try:
+                self.stream.close()
+            finally:
+                on_close, self.on_close = self.on_close, None
+                if on_close:
+                    on_close()
+
+    class _ReleasingAsyncStream(httpx.AsyncByteStream):
+        """_ReleasingStream for responses of an async transport"""
+
+        def __init__(self, stream, on_close):
+            self.stream = stream
+            self.on_close = on_close
+
+        async def __aiter__(self):
+            async for part in self.stream:
+                yield part
+
+        async def aclose(self):
+            try:
+                await self.stream.aclose()
+            finally:
+                on_close, self.on_close = self.on_close, None
+                if on_close:
+                    on_close()
+
+    class _RateLimiting:
+        """Retry and concurrency bookkeeping shared by the sync and async rate-limited transports"""
+
+        def __init__(self, limiter, max_connections=None):
+            self.limiter = limiter
+            connections = max_connections or MAX_CONCURRENCY * 2
+            self.limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections,
+                                       keepalive_expiry=60)
+
+        def _dropped(self, attempt):
+            """Seconds to wait before retrying a request whose connection failed, or None to give up"""
+            self.limiter.concurrency.release()
+            if attempt == MAX_RETRIES:
+                self.limiter.count("failed")
+                return None
+            self.limiter.count("retries")
+            return retry_delay(attempt)
+
+        def _retry_after(self, response, attempt):
+            """Seconds to wait before retrying a throttled or overloaded response (already closed), or None"""
+            self.limiter.observe_headers(response.headers)
+            if response.status_code == 429:
+                # Back off on every throttle, including the last attempt's
+                self.limiter.count("throttled")
+                self.limiter.concurrency.on_throttle()
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return None
+            self.limiter.concurrency.release()
+            delay = retry_delay(attempt, response.headers)
+            if response.status_code == 429:
+                # Everyone sharing the key backs off, instead of each caller retrying into the limit
+                self.limiter.requests.pause(delay)
+            self.limiter.count("retries")
+            return delay
+
+        def _accepted(self, response, start, streaming, stream_class):
+            if response.status_code < 400:
+                self.limiter.concurrency.on_success(time.monotonic() - start if streaming else None)
+            elif response.status_code in RETRY_STATUSES:
+                self.limiter.count("failed")
+            return httpx.Response(response.status_code, headers=response.headers, extensions=response.extensions,
+                                  stream=stream_class(response.stream, self.limiter.concurrency.release))
+
+    class RateLimitedTransport(_RateLimiting, httpx.BaseTransport):
+        """
+        httpx transport that paces requests through a RateLimiter and retries throttled,
+        overloaded or dropped requests itself (the OpenAI client's own retries are disabled).
+        A concurrency slot is held until the response body, including a stream, is closed.
+        """
+
+        def __init__(self, limiter, max_connections=None):
+            _RateLimiting.__init__(self, limiter, max_connections)
+            self.transport = httpx.HTTPTransport(limits=self.limits)
+
+        def handle_request(self, request):
+            request.read()
+            tokens, streaming = request_profile(request)
+            for attempt in range(MAX_RETRIES + 1):
+                self.limiter.acquire(tokens)
+                self.limiter.count("requests")
+                start = time.monotonic()
+                try:
+                    response = self.transport.handle_request(request)
+                except httpx.TransportError:
+                    delay = self._dropped(attempt)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    continue
+
+                if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    response.read()
+                    response.close()
+                delay = self._retry_after(response, attempt)
+                if delay is not None:
+                    time.sleep(delay)
+                    continue
+                return self._accepted(response, start, streaming, _ReleasingStream)
+
+        def close(self):
+            self.transport.close()
+
+    class AsyncRateLimitedTransport(_RateLimiting, httpx.AsyncBaseTransport):
+        """
+        RateLimitedTransport for httpx.AsyncClient, sharing the sync transport's RateLimiter for the key.
+        Connections belong to the event loop that opened them, so each loop gets its own connection pool.
+        """
+
+        def __init__(self, limiter, max_connections=None):
+            _RateLimiting.__init__(self, limiter, max_connections)
+            self._loop_transports = weakref.WeakKeyDictionary()
+
+        def _loop_transport(self):
+            loop = asyncio.get_running_loop()
+            transport = self._loop_transports.get(loop)
+            if transport is None:
+                transport = self._loop_transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+            return transport
+
+        async def handle_async_request(self, request):
+            await request.aread()
+            tokens, streaming = request_profile(request)
+            transport = self._loop_transport()
+            for attempt in range(MAX_RETRIES + 1):
+                await self.limiter.acquire_async(tokens)
+                self.limiter.count("requests")
+                start = time.monotonic()
+                try:
+                    response = await transport.handle_async_request(request)
+                except httpx.TransportError:
+                    delay = self._dropped(attempt)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    continue
+
+                if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    await response.aread()
+                    await response.aclose()
+                delay = self._retry_after(response, attempt)
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    continue
+                return self._accepted(response, start, streaming, _ReleasingAsyncStream)
+
+        async def aclose(self):
+            transports = list(self._loop_transports.values())
+            self._loop_transports.clear()
+            for transport in transports:
+                await transport.aclose()
+
+except ImportError:
+    httpx = None
+    RateLimitedTransport = None
+    AsyncRateLimitedTransport = None
+
+_limiters = {}
+_clients = {}
+_pool_lock = threading.Lock()
+
+def _key_fingerprint(api_key):
+    return sha256_hex("llm-pool", api_key or "")[:16]
+
+def rate_limiter(api_key=None):
+    """The process-wide RateLimiter for an API key (limits are per key at the provider)"""
+    fingerprint = _key_fingerprint(api_key or current_credentials().openai_api_key)
+    with _pool_lock:
+        if fingerprint not in _limiters:
+            _limiters[fingerprint] = RateLimiter()
+        return _limiters[fingerprint]
+
+def _shared_client(asynchronous, api_key, base_url):
+    api_key = api_key or current_credentials().openai_api_key
+    base_url = base_url or current_credentials().openai_base_url
+    key = (_key_fingerprint(api_key), base_url, asynchronous)
+    with _pool_lock:
+        client = _clients.get(key)
+    if client is None:
+        timeout = httpx.Timeout(600, connect=10)
+        caching = CachingTransport is not None and LLM_CACHE_MODE != "off"
+        if asynchronous:
+            from openai import AsyncOpenAI
+            transport = AsyncRateLimitedTransport(rate_limiter(api_key))
+            if caching:
+                transport = AsyncCachingTransport(transport)
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                 http_client=httpx.AsyncClient(transport=transport, timeout=timeout))
+        else:
+            from openai import OpenAI
+            transport = RateLimitedTransport(rate_limiter(api_key))
+            if caching:
+                transport = CachingTransport(transport)
+            client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                            http_client=httpx.Client(transport=transport, timeout=timeout))
+        with _pool_lock:
+            client = _clients.setdefault(key, client)
+    return client
+
+def shared_openai_client(api_key=None, base_url=None):
+    """
+    One keep-alive OpenAI client per (API key, base URL), rate limited by that key's RateLimiter.
+    Repeated requests are answered from the LLM response cache (see llm_cache) before they are rate limited.
+    """
+    return _shared_client(False, api_key, base_url)
+
+def shared_async_openai_client(api_key=None, base_url=None):
+    """AsyncOpenAI counterpart of shared_openai_client, drawing on the same RateLimiter and response cache"""
+    return _shared_client(True, api_key, base_url)
+
+def pooled_llm(model=None, api_key=None, base_url=None, **kwargs):
+    """
+    CrewAI LLM whose OpenAI calls, sync (call) and async (acall), go through the shared,
+    rate-limited clients for api_key (default: the current run's credentials).
+    Other providers, or a CrewAI without the native OpenAI provider, get a plain LLM.
+    """
+    from crewai import LLM
+    if DETERMINISTIC:
+        kwargs.setdefault("temperature", 0)
+        kwargs.setdefault("seed", 0)
+    credentials = current_credentials()
+    llm = LLM(model=model or credentials.model, api_key=api_key or credentials.openai_api_key,
+              base_url=base_url or credentials.openai_base_url, **kwargs)
+    try:
+        from crewai.llms.providers.openai.completion import OpenAICompletion
+    except ImportError:
+        return llm
+    if not isinstance(llm, OpenAICompletion) or RateLimitedTransport is None:
+        return llm
+    # OpenAICompletion takes no ready-made clients (client_params would hand one http_client to both its
+    # sync and async clients), so the pooled clients replace the ones it builds in these private
+    # attributes, present in the crewai 1.x series pinned in requirements.txt
+    if not (hasattr(llm, "_client") and hasattr(llm, "_async_client")):
+        print("This CrewAI version's OpenAI provider has no _client/_async_client; LLM calls bypass the shared pool")
+        return llm
+    base_url = llm.base_url or llm.api_base
+    llm._client = shared_openai_client(llm.api_key, base_url)
+    llm._async_client = shared_async_openai_client(llm.api_key, base_url)
+    return llm
+
+def pool_stats():
+    """{API key fingerprint: limiter stats} for every key used in this process"""
+    with _pool_lock:
+        limiters = dict(_limiters)
+    return {fingerprint: limiter.snapshot() for fingerprint, limiter in limiters.items()}
@@ -0,0 +1,280 @@
+# Token, latency and tool telemetry per run, agent, task and tool
+# Usage: python metrics.py   (prints percentile summaries over recorded runs)
+import os
+import json
+import threading
+from collections import deque, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cache import CACHE_DIR
+from events import (
+    add_event_listener,
+    RUN_STARTED,
+    RUN_FINISHED,
+    TASK_STARTED,
+    TASK_COMPLETED,
+    TASK_FAILED,
+    TOOL_FINISHED,
+    LLM_STARTED,
+    LLM_COMPLETED,
+)
+
+METRICS_FILE = os.getenv("JOB_CREW_METRICS_FILE", os.path.join(CACHE_DIR, "run_metrics.jsonl"))
+QUANTILES = (0.5, 0.9, 0.99)
+
+def _empty_bucket():
+    return {"llm_calls": 0, "llm_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "tool_calls": 0, "tool_seconds": 0.0}
+
+def summarize_run(events):
+    """Reduce one run's event list to per-task, per-agent and per-tool totals"""
+    summary = {"run_id": None, "status": None, "started": None, "seconds": None, "totals": _empty_bucket(),
+               "tasks": defaultdict(_empty_bucket), "agents": defaultdict(_empty_bucket), "tools": {}, "llm_cache": {}}
+    task_started = {}
+    llm_started = {}
+
+    for event in events:
+        kind = event["event"]
+        summary["run_id"] = event["run_id"]
+        if kind == RUN_STARTED:
+            summary["started"] = event["ts"]
+        elif kind == RUN_FINISHED:
+            summary["status"] = event.get("status")
+            summary["llm_cache"] = event.get("llm_cache") or {}
+            if summary["started"] is not None:
+                summary["seconds"] = event["ts"] - summary["started"]
+        elif kind == TASK_STARTED:
+            task_started[event["task"]] = event["ts"]
+            if event.get("task_prompt_tokens") is not None:
+                summary["tasks"][event["task"]]["task_prompt_tokens"] = event["task_prompt_tokens"]
+        elif kind in (TASK_COMPLETED, TASK_FAILED) and event["task"] in task_started:
+            summary["tasks"][event["task"]]["seconds"] = event["ts"] - task_started[event["task"]]
+        elif kind == LLM_STARTED:
+            llm_started[event.get("call_id")] = event["ts"]
+        elif kind == LLM_COMPLETED:
+            seconds = event["ts"] - llm_started.pop(event.get("call_id"), event["ts"])
+            for bucket in (summary["totals"], summary["tasks"][event["task"]], summary["agents"][event.get("agent") or "unknown"]):
+                bucket["llm_calls"] += 1
+                bucket["llm_seconds"] += seconds
+                bucket["prompt_tokens"] += event.get("prompt_tokens") or 0
+                bucket["completion_tokens"] += event.get("completion_tokens") or 0
+        elif kind == TOOL_FINISHED:
+            tool = summary["tools"].setdefault(event["tool"], {"calls": 0, "seconds": 0.0, "cached": 0})
+            tool["calls"] += 1
+            tool["seconds"] += event.get("duration") or 0.0
+            tool["cached"] += 1 if event.get("from_cache") else 0
+            for bucket in (summary["totals"], summary["tasks"][event["task"]], summary["agents"][event.get("agent") or "unknown"]):
+                bucket["tool_calls"] += 1
+                bucket["tool_seconds"] += event.get("duration") or 0.0
+
+    summary["tasks"] = dict(summary["tasks"])
+    summary["agents"] = dict(summary["agents"])
+    return summary
+
+def percentile(values, q):
+    """Linear-interpolated percentile of a list of numbers (q in [0, 1])"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+class MetricsRecorder:
+    """
+    Collects a summary of every finished run, appends it to a JSONL file and keeps
+    recent runs in memory for percentile summaries and the Prometheus text export.
+    Past runs are loaded from the file on first use, and the file is cut back to the last
+    `history` runs whenever it grows to twice that, so it never grows without bound.
+    """
+
+    def __init__(self, path=METRICS_FILE, history=500):
+        self.path = path
+        self.runs = deque(maxlen=history)
+        self._loaded = False
+        self._file_runs = 0
+        self._lock = threading.Lock()
+
+    def on_event(self, event_log, event):
+        if event["event"] == RUN_FINISHED:
+            self.record(summarize_run(event_log.snapshot()))
+
+    def record(self, summary):
+        with self._lock:
+            self._load()
+            self.runs.append(summary)
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(summary) + "\n")
+                self._file_runs += 1
+                if self._file_runs >= 2 * self.runs.maxlen:
+                    self._rotate()
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [line for line in f if line.strip()]
+
+    def _load(self):
+        """Load past run summaries from the JSONL file once (caller holds the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        lines = self._read_file()
+        self._file_runs = len(lines)
+        # Runs recorded before the load are newer than anything in the file
+        recorded = list(self.runs)
+        self.runs.clear()
+        self.runs.extend(json.loads(line) for line in lines[-self.runs.maxlen:])
+        self.runs.extend(recorded)
+
+    def _rotate(self):
+        """Rewrite the file with only the last `history` runs (caller holds the lock)"""
+        lines = self._read_file()[-self.runs.maxlen:]
+        staging = f"{self.path}.{os.getpid()}.tmp"
+        with open(staging, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(staging, self.path)
+        self._file_runs = len(lines)
+
+    def load_history(self):
+        """Load past run summaries from the JSONL file now rather than on first use"""
+        with self._lock:
+            self._load()
+
+    def history(self):
+        """Recent run summaries, oldest first"""
+        with self._lock:
+            self._load()
+            return list(self.runs)
+
+    def percentiles(self):
+        """Percentiles across recorded runs of run time, tokens and per-task time"""
+        runs = self.history()
+        series = defaultdict(list)
+        for run in runs:
+            if run.get("seconds") is not None:
+                series["run_seconds"].append(run["seconds"])
+            totals = run["totals"]
+            series["prompt_tokens"].append(totals["prompt_tokens"])
+            series["completion_tokens"].append(totals["completion_tokens"])
+            series["llm_calls"].append(totals["llm_calls"])
+            for name, task in run["tasks"].items():
+                if "seconds" in task:
+                    series[f"task_seconds:{name}"].append(task["seconds"])
+                series[f"task_tokens:{name}"].append(task["prompt_tokens"] + task["completion_tokens"])
+                if "task_prompt_tokens" in task:
+                    series[f"task_prompt_tokens:{name}"].append(task["task_prompt_tokens"])
+            for name, tool in run["tools"].items():
+                series[f"tool_seconds:{name}"].append(tool["seconds"])
+        return {name: {f"p{int(q * 100)}": percentile(values, q) for q in QUANTILES} | {"count": len(values)}
+                for name, values in series.items()}
+
+    def prometheus_text(self):
+        """Render totals over the recent run history and quantiles in the Prometheus text exposition format"""
+        runs = self.history()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{str(val).replace(chr(34), chr(39))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        statuses = defaultdict(int)
+        tokens = defaultdict(int)
+        llm_calls = defaultdict(int)
+        tool_calls = defaultdict(int)
+        tool_seconds = defaultdict(float)
+        for run in runs:
+            statuses[run.get("status") or "unknown"] += 1
+            for agent, bucket in run["agents"].items():
+                llm_calls[agent] += bucket["llm_calls"]
+                tokens[(agent, "prompt")] += bucket["prompt_tokens"]
+                tokens[(agent, "completion")] += bucket["completion_tokens"]
+            for tool, bucket in run["tools"].items():
+                tool_calls[tool] += bucket["calls"]
+                tool_seconds[tool] += bucket["seconds"]
+
+        metric("job_crew_runs", "gauge", "Finished crew runs (recent history)",
+               [({"status": status}, count) for status, count in statuses.items()])
+        metric("job_crew_llm_calls", "gauge", "LLM round-trips per agent (recent history)",
+               [({"agent": agent}, count) for agent, count in llm_calls.items()])
+        metric("job_crew_tokens", "gauge", "LLM tokens per agent (recent history)",
+               [({"agent": agent, "kind": kind}, count) for (agent, kind), count in tokens.items()])
+        metric("job_crew_tool_calls", "gauge", "Tool calls per tool (recent history)",
+               [({"tool": tool}, count) for tool, count in tool_calls.items()])
+        metric("job_crew_tool_seconds", "gauge", "Time spent in tools (recent history)",
+               [({"tool": tool}, round(seconds, 6)) for tool, seconds in tool_seconds.items()])
+
+        quantile_samples = []
+        for name, stats in self.percentiles().items():
+            for q in QUANTILES:
+                value = stats[f"p{int(q * 100)}"]
+                if value is None:
+                    continue
+                series, _, label = name.partition(":")
+                labels = {"series": series, "quantile": q}
+                if label:
+                    labels["name"] = label
+                quantile_samples.append((labels, round(value, 6)))
+        metric("job_crew_run_quantiles", "gauge", "Percentiles across recent runs", quantile_samples)
+
+        from llm_pool import pool_stats
+        metric("job_crew_llm_pool", "gauge", "Shared LLM client pool counters and concurrency limit per API key",
+               [({"key": key, "stat": stat}, round(value, 3)) for key, stats in pool_stats().items() for stat, value in stats.items()])
+        from llm_cache import cache_stats
+        cache = cache_stats()
+        metric("job_crew_llm_cache", "gauge", "LLM response cache counters and size in bytes since process start",
+               [({"stat": stat, "mode": cache["mode"]}, value) for stat, value in cache.items() if stat != "mode"])
+        return "\n".join(lines) + "\n"
+
+# Process-wide recorder, fed by every run's event log
+METRICS = MetricsRecorder()
+add_event_listener(METRICS.on_event)
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=None):
+    """Serve METRICS.prometheus_text() on http://0.0.0.0:<port>/metrics (once per process)"""
+    global _server
+    port = port or os.getenv("JOB_CREW_METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = METRICS.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), MetricsHandler)
+        except OSError as e:
+            # Another process on this host already serves the endpoint
+            print(f"Metrics endpoint not started: {e}")
+            return None
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-server").start()
+        return _server
+
+if __name__ == "__main__":
+    for name, stats in sorted(METRICS.percentiles().items()):
+        values = "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in stats.items())
+        print(f"{name:50} {values}")
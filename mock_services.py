@@ -0,0 +1,445 @@
+# Offline stand-ins for OpenAI, Serper and the scraped pages, for benchmarks and CI without network access
+# Usage: python mock_services.py [port]   (prints the environment variables that route the crew to it)
+import re
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_URL = re.compile(r"https?://[^\s\"'<>)\]]+")
+
+JOB_POSTING_HTML = """<html><head><title>Senior Python Engineer - Example Corp</title></head><body>
+<nav>Home | Careers | About</nav>
+<h1>Senior Python Engineer</h1>
+<p>Example Corp is hiring a Senior Python Engineer to build data-intensive services for our analytics platform.</p>
+<h2>Responsibilities</h2>
+<ul><li>Design and operate Python microservices on AWS</li><li>Own CI/CD pipelines and observability</li>
+<li>Mentor engineers and review code</li><li>Partner with product on roadmap delivery</li></ul>
+<h2>Requirements</h2>
+<ul><li>5+ years of Python, including asyncio and type hints</li><li>Experience with PostgreSQL and Redis</li>
+<li>Docker and Kubernetes in production</li><li>Strong written communication</li></ul>
+<h2>Nice to have</h2>
+<ul><li>Streaming systems (Kafka)</li><li>LLM application experience</li></ul>
+<h2>Benefits</h2><p>Remote-friendly, learning budget, equity.</p>
+<footer>Example Corp is an equal opportunity employer.</footer>
+</body></html>"""
+
+PROFILE_HTML = """<html><head><title>example-dev (Example Developer)</title></head><body>
+<h1>Example Developer</h1><p>Backend engineer working on Python services and developer tooling.</p>
+<h2>Popular repositories</h2>
+<ul><li>fastqueue - asyncio task queue backed by Redis (1.2k stars)</li>
+<li>pg-migrate - zero-downtime PostgreSQL migrations</li><li>k8s-deploy-kit - Helm charts and CI templates</li></ul>
+</body></html>"""
+
+GITHUB_REPOS = [
+    ("fastqueue", "asyncio task queue backed by Redis", "Python", 1200, {"Python": 182000, "Lua": 4100}),
+    ("pg-migrate", "Zero-downtime PostgreSQL migrations", "Python", 340, {"Python": 64000, "PLpgSQL": 9000}),
+    ("k8s-deploy-kit", "Helm charts and CI templates", "Smarty", 95, {"Smarty": 21000, "Shell": 6400}),
+    ("dotfiles", "Editor and shell configuration", "Shell", 12, {"Shell": 8800, "Vim Script": 5100}),
+    ("rust-bloom", "Bloom filters with SIMD hashing", "Rust", 48, {"Rust": 39000}),
+    ("observability-demo", "OpenTelemetry tracing for Flask and Celery", "Python", 61, {"Python": 23000, "Dockerfile": 900}),
+]
+
+def _tokens(text):
+    return max(1, (len(text) + 3) // 4)
+
+def _message_text(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+def canned_answer(prompt, answer_tokens):
+    """
+    Deterministic final answer shaped like the requested output.
+    Repeats the markdown headings of the prompt's expected output and pads each with
+    filler bullets until roughly answer_tokens tokens (at least one bullet per heading).
+    """
+    headings = [line.strip() for line in prompt.splitlines() if re.match(r"\s*#{1,4} ", line)] or ["# Result"]
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    per_heading = max(answer_tokens // len(headings), 8)
+    sections = []
+    for number, heading in enumerate(headings):
+        bullets = []
+        while _tokens("\n".join(bullets)) < per_heading:
+            bullets.append(f"- Point {number}.{len(bullets) + 1}: evidence-backed detail {digest} for this section.")
+        sections.append(heading + "\n" + "\n".join(bullets))
+    return "\n\n".join(sections)
+
+class MockServices:
+    """
+    Local HTTP server standing in for every external service the crew talks to.
+
+    - POST /v1/chat/completions: OpenAI-compatible, including `stream: true`. When tools are offered,
+      the first `tool_rounds` calls of a conversation request a tool, then a canned final answer is returned.
+    - POST /v1/embeddings: deterministic hash-based vectors.
+    - POST /search, /news: Serper-compatible results linking back to local pages.
+    - GET /jobs/<slug>, /github/<user>: canned job posting and profile pages for scraping.
+    - GET /api/github/...: GitHub REST API subset (user, repos, README, languages) with ETag/304 support,
+      each response delayed by `github_latency` seconds.
+
+    Each completion takes `latency` seconds plus `per_token_latency` per completion token.
+    With `rate_limit=(requests, window_seconds)` chat completions beyond that rate get a 429 with
+    Retry-After, and every completion carries OpenAI-style x-ratelimit-* headers.
+    Served requests are counted in `stats`, and LLM busy intervals are kept so
+    callers can separate model time from framework overhead.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, per_token_latency=0.0,
+                 answer_tokens=600, tool_rounds=1, embedding_dim=64, github_latency=0.0, rate_limit=None):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self._admitted = deque()
+        self.github_latency = github_latency
+        self.per_token_latency = per_token_latency
+        self.answer_tokens = answer_tokens
+        self.tool_rounds = tool_rounds
+        self.embedding_dim = embedding_dim
+        self.stats = {"chat": 0, "embeddings": 0, "search": 0, "pages": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                      "github_api": 0, "github_not_modified": 0, "throttled": 0}
+        self.llm_intervals = []
+        # (service, API key, request text) for every keyed request, to check that keys never cross between runs
+        self.key_log = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def job_posting_url(self, slug="senior-python-engineer"):
+        return f"{self.url}/jobs/{slug}"
+
+    def github_url(self, user="example-dev"):
+        return f"{self.url}/github/{user}"
+
+    def env(self):
+        """Environment variables that route the crew's OpenAI and Serper traffic to this server"""
+        return {
+            "OPENAI_API_KEY": "sk-offline",
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "OPENAI_API_BASE": f"{self.url}/v1",
+            "SERPER_API_KEY": "offline",
+            "SERPER_BASE_URL": self.url,
+            "JOB_CREW_GITHUB_API": f"{self.url}/api/github",
+            "JOB_CREW_GITHUB_WEB": f"{self.url}/github",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="mock-services")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def llm_busy_seconds(self, since=0.0):
+        """Wall time during which at least one completion was being served (overlapping calls counted once)"""
+        with self._lock:
+            intervals = sorted((max(start, since), end) for start, end in self.llm_intervals if end > since)
+        busy = 0.0
+        current_start = current_end = None
+        for start, end in intervals:
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    busy += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            busy += current_end - current_start
+        return busy
+
+    # OpenAI-compatible endpoints
+
+    def admit(self):
+        """(admitted, x-ratelimit-*/retry-after headers) for a chat completion under `rate_limit`"""
+        if not self.rate_limit:
+            return True, {}
+        requests, window = self.rate_limit
+        with self._lock:
+            now = time.time()
+            while self._admitted and now - self._admitted[0] >= window:
+                self._admitted.popleft()
+            admitted = len(self._admitted) < requests
+            if admitted:
+                self._admitted.append(now)
+            else:
+                self.stats["throttled"] += 1
+            reset = window - (now - self._admitted[0]) if self._admitted else 0.0
+            headers = {
+                "x-ratelimit-limit-requests": str(int(requests * 60 / window)),
+                "x-ratelimit-remaining-requests": str(requests - len(self._admitted)),
+                "x-ratelimit-reset-requests": f"{reset:.3f}s",
+            }
+        if not admitted:
+            headers["retry-after-ms"] = str(int(reset * 1000) + 1)
+        return admitted, headers
+
+    def _reply(self, body):
+        """(assistant message, finish reason, prompt tokens, completion tokens) for a chat request"""
+        messages = body.get("messages", [])
+        prompt = "\n".join(_message_text(message) for message in messages)
+        tools = body.get("tools") or []
+        tool_results = sum(1 for message in messages if message.get("role") == "tool")
+        native_tools = bool(tools)
+
+        message = {"role": "assistant", "content": None}
+        tool_call = self._tool_call(tools, prompt) if native_tools and tool_results < self.tool_rounds else None
+        if tool_call:
+            message["tool_calls"] = [tool_call]
+            completion = json.dumps(tool_call)
+            finish_reason = "tool_calls"
+        else:
+            answer = canned_answer(prompt, self.answer_tokens)
+            # Without native tools CrewAI parses the ReAct format
+            message["content"] = answer if native_tools else f"Thought: I now know the final answer\nFinal Answer: {answer}"
+            completion = message["content"]
+            finish_reason = "stop"
+        return message, finish_reason, _tokens(prompt), _tokens(completion)
+
+    def log_key(self, path, headers, body):
+        service = "serper" if path in ("/search", "/news") else "openai"
+        key = headers.get("X-API-KEY") if service == "serper" else (headers.get("Authorization") or "")[len("Bearer "):]
+        if service == "serper":
+            text = body.get("q", "")
+        else:
+            text = "\n".join(_message_text(message) for message in body.get("messages", [])) or json.dumps(body.get("input", ""))
+        with self._lock:
+            self.key_log.append((service, key, text))
+
+    def _record_call(self, started, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.llm_intervals.append((started, time.time()))
+            self.stats["chat"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+    def chat_completion(self, body):
+        message, finish_reason, prompt_tokens, completion_tokens = self._reply(body)
+        started = time.time()
+        time.sleep(self.latency + self.per_token_latency * completion_tokens)
+        self._record_call(started, prompt_tokens, completion_tokens)
+        return {
+            "id": f"chatcmpl-{int(started * 1000)}",
+            "object": "chat.completion",
+            "created": int(started),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def stream_chat_completion(self, body):
+        """
+        Yield chat.completion.chunk dicts for a `stream: true` request.
+        The first chunk arrives after `latency`, then each content piece after per_token_latency.
+        """
+        message, finish_reason, prompt_tokens, completion_tokens = self._reply(body)
+        started = time.time()
+        base = {"id": f"chatcmpl-{int(started * 1000)}", "object": "chat.completion.chunk",
+                "created": int(started), "model": body.get("model", "mock")}
+
+        def chunk(delta, finish=None):
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish}])
+
+        time.sleep(self.latency)
+        yield chunk({"role": "assistant", "content": ""})
+        if message.get("tool_calls"):
+            yield chunk({"tool_calls": [dict(call, index=index) for index, call in enumerate(message["tool_calls"])]})
+        else:
+            # Roughly one token per piece
+            for piece in re.findall(r"\S*\s*", message["content"]):
+                if piece:
+                    time.sleep(self.per_token_latency)
+                    yield chunk({"content": piece})
+        yield chunk({}, finish_reason)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield dict(base, choices=[], usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                                "total_tokens": prompt_tokens + completion_tokens})
+        self._record_call(started, prompt_tokens, completion_tokens)
+
+    def _tool_call(self, tools, prompt):
+        """Call the first offered tool whose required arguments can be filled from the prompt"""
+        urls = _URL.findall(prompt)
+        for tool in tools:
+            function = tool.get("function", {})
+            properties = function.get("parameters", {}).get("properties", {})
+            required = function.get("parameters", {}).get("required", list(properties))
+            arguments = {}
+            for name in required:
+                if "url" in name and urls:
+                    arguments[name] = urls[0]
+                elif "query" in name:
+                    arguments[name] = "Example Corp engineering culture"
+                else:
+                    break
+            else:
+                call_id = hashlib.sha256((function.get("name", "") + prompt).encode("utf-8")).hexdigest()[:12]
+                return {"id": f"call_{call_id}", "type": "function",
+                        "function": {"name": function.get("name"), "arguments": json.dumps(arguments)}}
+        return None
+
+    def embeddings(self, body):
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        self._count("embeddings", len(inputs))
+        data = []
+        for index, text in enumerate(inputs):
+            seed = hashlib.sha256(str(text).encode("utf-8")).digest()
+            vector = [(seed[i % len(seed)] - 127.5) / 127.5 for i in range(self.embedding_dim)]
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        return {"object": "list", "data": data, "model": body.get("model", "mock-embedding"),
+                "usage": {"prompt_tokens": sum(_tokens(str(text)) for text in inputs), "total_tokens": 0}}
+
+    # Serper-compatible search
+
+    def search(self, body):
+        self._count("search")
+        query = body.get("q", "")
+        return {
+            "searchParameters": {"q": query, "type": "search"},
+            "organic": [
+                {"title": "Senior Python Engineer - Example Corp", "link": self.job_posting_url(),
+                 "snippet": "Build data-intensive Python services on AWS.", "position": 1},
+                {"title": "Example Corp engineering blog", "link": f"{self.url}/jobs/engineering-blog",
+                 "snippet": "How we run Python microservices at scale.", "position": 2},
+            ],
+        }
+
+    # GitHub REST API subset
+
+    def github_api(self, path):
+        """(status, JSON or raw text body) for a GitHub API path, or None for unknown paths"""
+        self._count("github_api")
+        time.sleep(self.github_latency)
+        parts = [part for part in path.split("/") if part]
+        if parts[:1] == ["users"] and len(parts) == 2:
+            return 200, {"login": parts[1], "name": "Example Developer", "html_url": f"{self.url}/github/{parts[1]}",
+                         "bio": "Backend engineer working on Python services and developer tooling.",
+                         "location": "Berlin", "public_repos": len(GITHUB_REPOS), "followers": 210}
+        if parts[:1] == ["users"] and parts[2:] == ["repos"]:
+            return 200, [{"name": name, "full_name": f"{parts[1]}/{name}", "description": description,
+                          "language": language, "stargazers_count": stars, "forks_count": stars // 10,
+                          "fork": name == "dotfiles", "topics": [language.lower()],
+                          "pushed_at": f"2024-0{index + 1}-15T10:00:00Z"}
+                         for index, (name, description, language, stars, _) in enumerate(GITHUB_REPOS)]
+        repos = {name: (description, languages) for name, description, _, _, languages in GITHUB_REPOS}
+        if parts[:1] == ["repos"] and len(parts) == 4 and parts[2] in repos:
+            description, languages = repos[parts[2]]
+            if parts[3] == "languages":
+                return 200, languages
+            if parts[3] == "readme":
+                return 200, (f"# {parts[2]}\n\n[![CI](https://img.shields.io/badge/ci-passing-green)](https://ci)\n\n"
+                             f"{description}. Used in production by several teams.\n\n## Usage\n\n"
+                             + "Install it, configure it and run the examples. " * 20)
+        return 404, {"message": "Not Found"}
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body, content_type="application/json", headers=None):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_events(self, chunks, headers=None):
+                """Server-sent events, one `data:` line per chunk, terminated by [DONE]"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for data in chunks:
+                    self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                path = self.path.split("?")[0].rstrip("/")
+                services.log_key(path, self.headers, body)
+                admitted, limit_headers = services.admit() if path.endswith("/chat/completions") else (True, {})
+                if not admitted:
+                    self._send(429, {"error": {"message": "Rate limit reached for requests", "type": "requests",
+                                               "code": "rate_limit_exceeded"}}, headers=limit_headers)
+                elif path.endswith("/chat/completions") and body.get("stream"):
+                    self._send_events(services.stream_chat_completion(body), limit_headers)
+                elif path.endswith("/chat/completions"):
+                    self._send(200, services.chat_completion(body), headers=limit_headers)
+                elif path.endswith("/embeddings"):
+                    self._send(200, services.embeddings(body))
+                elif path in ("/search", "/news"):
+                    self._send(200, services.search(body))
+                else:
+                    self._send(404, {"error": f"unknown endpoint {path}"})
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path.startswith("/api/github/"):
+                    status, body = services.github_api(path[len("/api/github"):])
+                    data = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+                    etag = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        services._count("github_not_modified")
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                    else:
+                        self.send_response(status)
+                        self.send_header("Content-Type", "text/plain" if isinstance(body, str) else "application/json")
+                        self.send_header("Content-Length", str(len(data)))
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        self.wfile.write(data)
+                elif path.startswith("/jobs/"):
+                    services._count("pages")
+                    self._send(200, JOB_POSTING_HTML.encode("utf-8"), "text/html; charset=utf-8")
+                elif path.startswith("/github/"):
+                    services._count("pages")
+                    self._send(200, PROFILE_HTML.encode("utf-8"), "text/html; charset=utf-8")
+                else:
+                    self._send(404, {"error": f"unknown page {path}"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+if __name__ == "__main__":
+    services = MockServices(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    for key, value in services.env().items():
+        print(f"export {key}={value}")
+    print(f"# job posting: {services.job_posting_url()}  github: {services.github_url()}")
+    try:
+        services._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,285 @@
+# Run planning, scheduling and result caching for a single job application run
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app_utils import model_name
+from agents import create_agents, run_agents
+from tools import bind_candidate_index
+from semantic_index import build_index
+from github_ingest import ingest_github_profile
+from tasks import agent_tasks, prefill_task_output, PROMPT_VERSIONS, TASK_NAMES
+from cache import DiskCache, sha256_hex
+from job_posting import job_posting_document
+from scraping import normalize_url
+from prompt_budget import BudgetedCrew, apply_prompt_variant, PROMPT_VARIANT, CONTEXT_TOKEN_BUDGET
+from workspace import RunWorkspace, EVENT_LOG_FILE, RESUME_FILE
+from events import start_run_events, track_tasks, finish_run_events, RUN_STARTED, TASK_CACHED
+from scheduler import run_task_graph
+from llm_cache import llm_cache_scope
+from credentials import current_credentials, credentials_scope
+from crew_memory import crew_memory, attach_memory, close_crew_memory, MEMORY_TOOLS
+from llm_pool import pooled_llm
+import metrics  # registers the per-run metrics recorder on the event log
+
+# "dag" runs independent tasks concurrently; "crew" uses CrewAI's sequential process
+SCHEDULER = os.getenv("JOB_CREW_SCHEDULER", "dag")
+
+# Research reports depend only on the posting, so they are shared across candidates
+JOB_INTELLIGENCE_CACHE = DiskCache("job_intelligence", max_bytes=32 * 1024 * 1024, ttl=7 * 24 * 60 * 60)
+# Candidate profiles depend only on the resume, GitHub profile and write-up, so they are shared across postings
+CANDIDATE_PROFILE_CACHE = DiskCache("candidate_profiles", max_bytes=32 * 1024 * 1024, ttl=30 * 24 * 60 * 60)
+
+def current_model_name():
+    return model_name()
+
+def prompt_version(task_name):
+    """Cache-key version of a task prompt, including the active template variant"""
+    return f"{PROMPT_VERSIONS[task_name]}-{PROMPT_VARIANT}"
+
+def job_intelligence_key(job_url, posting_document=None):
+    """Key of the research report for a posting: (structured posting hash, prompt version, model)"""
+    posting_document = posting_document or job_posting_document(job_url)
+    if posting_document is None:
+        return None
+    return sha256_hex(sha256_hex(posting_document), prompt_version("research_task"), current_model_name())
+
+def candidate_profile_key(github_url, personal_writeup, resume_text=None, github_summary=""):
+    """Key of the candidate profile: (resume hash, GitHub URL and summary hash, write-up hash, prompt version, model)"""
+    return sha256_hex(sha256_hex(resume_text or ""), github_url.strip(), sha256_hex(github_summary),
+                      sha256_hex(personal_writeup.strip()), prompt_version("profile_task"), current_model_name())
+
+def run_key(job_url, github_url, personal_writeup, resume_text=None, regenerate=(), credentials=None):
+    """
+    Key of a whole run's inputs: identical submissions in flight at the same time share one run (see jobs.JobExecutor).
+    Includes the credentials fingerprint, so sessions only share runs paid for with their own keys.
+    """
+    credentials = credentials or current_credentials()
+    return sha256_hex(normalize_url(job_url), github_url.strip(), sha256_hex(personal_writeup.strip()),
+                      sha256_hex(resume_text or ""), ",".join(sorted(regenerate)), credentials.fingerprint())
+
+# Cross-run caches for the tasks whose output depends on one side of the application only
+TASK_CACHES = {
+    "research_task": JOB_INTELLIGENCE_CACHE,
+    "profile_task": CANDIDATE_PROFILE_CACHE,
+}
+
+# Outputs of the remaining tasks, keyed by their interpolated prompt and upstream outputs (see TaskMemo)
+TASK_OUTPUT_MEMO = DiskCache("task_outputs", max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 60 * 60)
+
+def task_cache_key(name, inputs, resume_text=None):
+    if name == "research_task":
+        posting = inputs.get("job_posting")
+        return job_intelligence_key(inputs["job_posting_url"], posting if posting != NO_JOB_POSTING else None)
+    return candidate_profile_key(inputs["github_url"], inputs["personal_writeup"], resume_text,
+                                 inputs.get("github_summary", ""))
+
+# Stand in for the pre-processed posting and GitHub summary when they could not be pre-fetched
+NO_JOB_POSTING = "(not available - scrape the job posting URL with your tools)"
+NO_GITHUB_SUMMARY = "(not available - review the GitHub profile with your tools)"
+
+def github_inputs(inputs):
+    """
+    Pre-fetch the candidate's GitHub profile before the crew starts.
+    Returns (inputs with github_summary set, [(source, README text)] for the candidate index).
+    """
+    github = ingest_github_profile(inputs.get("github_url")) if inputs.get("github_url") else None
+    if github is None:
+        return dict(inputs, github_summary=NO_GITHUB_SUMMARY), []
+    return dict(inputs, github_summary=github.summary), github.readmes
+
+def prefetch_inputs(inputs):
+    """
+    Pre-process the job posting (see job_posting) while the GitHub profile is ingested.
+    Returns (inputs with job_posting and github_summary set, GitHub documents for the candidate index).
+    """
+    job_url = inputs.get("job_posting_url")
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as pool:
+        posting = pool.submit(job_posting_document, job_url) if job_url else None
+        inputs, github_documents = github_inputs(inputs)
+        return dict(inputs, job_posting=(posting and posting.result()) or NO_JOB_POSTING), github_documents
+
+class TaskMemo:
+    """
+    Incremental re-runs for the DAG scheduler.
+    A task's output is stored under a hash of its interpolated prompt (i.e. the inputs it uses),
+    the context budget, the model and its upstream outputs. When only the write-up changes, the
+    profile is regenerated and everything downstream of it misses, while untouched tasks are reused.
+    Tasks in TASK_CACHES are left to those content-aware caches; tasks in `regenerate` always run.
+    """
+
+    def __init__(self, cache=None, regenerate=(), on_hit=None):
+        self.cache = cache or TASK_OUTPUT_MEMO
+        self.regenerate = set(regenerate)
+        self.on_hit = on_hit
+
+    def key(self, name, task, upstream_tasks):
+        upstream_hashes = [sha256_hex(upstream.output.raw if upstream.output is not None else "") for upstream in upstream_tasks]
+        return sha256_hex(name, prompt_version(name), current_model_name(), str(CONTEXT_TOKEN_BUDGET),
+                          task.description, task.expected_output, *upstream_hashes)
+
+    def lookup(self, name, task, upstream_tasks):
+        if name in TASK_CACHES or name in self.regenerate:
+            return False
+        raw = self.cache.get(self.key(name, task, upstream_tasks))
+        if not raw:
+            return False
+        prefill_task_output(task, raw)
+        if task.output_file:
+            os.makedirs(os.path.dirname(task.output_file) or ".", exist_ok=True)
+            with open(task.output_file, "w", encoding="utf-8") as f:
+                f.write(raw)
+        if self.on_hit:
+            self.on_hit(name)
+        return True
+
+    def store(self, name, task, upstream_tasks):
+        if name not in TASK_CACHES and task.output is not None and task.output.raw:
+            self.cache.set(self.key(name, task, upstream_tasks), task.output.raw)
+
+class RunPlan:
+    """The tasks of one run and which of them are already satisfied from caches"""
+
+    def __init__(self, agents, tasks):
+        self.agents = agents
+        self.named_tasks = list(zip(TASK_NAMES, tasks))
+        self.cached = set()
+        # Cross-run cache keys of the tasks looked up in TASK_CACHES
+        self.cache_keys = {}
+
+    @property
+    def tasks(self):
+        return [task for _, task in self.named_tasks]
+
+    def task(self, name):
+        return dict(self.named_tasks)[name]
+
+    def use_cached(self, name, raw):
+        prefill_task_output(self.task(name), raw)
+        self.cached.add(name)
+
+    def select(self, names):
+        """Restrict the run to the named tasks (their upstream tasks must be selected or cached)"""
+        self.named_tasks = [(name, task) for name, task in self.named_tasks if name in names]
+
+    def scheduled(self):
+        return [(name, task) for name, task in self.named_tasks if name not in self.cached]
+
+def candidate_index(resume_text=None, github_documents=()):
+    """Semantic index over the candidate's resume and GitHub READMEs (built once per distinct set), or None"""
+    documents = ([("resume", resume_text)] if resume_text else []) + list(github_documents)
+    if not documents:
+        return None
+    try:
+        return build_index(documents)
+    except Exception as e:
+        print(f"Could not build the candidate search index: {e}")
+        return None
+
+def prepare_run(inputs, agents=None, prefilled=None, only=None, resume_text=None, regenerate=(), github_documents=(),
+                credentials=None):
+    """
+    Build the tasks for one run on per-run copies of the shared agents (for `credentials`, default: the current ones).
+    `prefilled` maps task names to outputs computed elsewhere (e.g. shared across a batch),
+    `only` restricts the run to a subset of TASK_NAMES and tasks in `regenerate` bypass caches.
+    `github_documents` (see github_inputs) are indexed for the candidate search tool alongside the resume.
+    When a cached research report or candidate profile exists, that agent is skipped
+    and the cached output is injected as context for the later tasks.
+    """
+    agents = run_agents(agents or create_agents(credentials or current_credentials()))
+    bind_candidate_index(agents, candidate_index(resume_text, github_documents))
+    plan = RunPlan(agents, apply_prompt_variant(agent_tasks(agents)))
+    if only:
+        plan.select(only)
+
+    for name, raw in (prefilled or {}).items():
+        plan.use_cached(name, raw)
+    for name, cache in TASK_CACHES.items():
+        if name not in dict(plan.named_tasks) or name in plan.cached:
+            continue
+        key = task_cache_key(name, inputs, resume_text)
+        if key is None:
+            continue
+        plan.cache_keys[name] = key
+        if name in regenerate:
+            continue
+        cached_output = cache.get(key)
+        if cached_output:
+            plan.use_cached(name, cached_output)
+    return plan
+
+def build_crew(plan, run_id=None):
+    """
+    Sequential Crew over the plan's uncached tasks (used when JOB_CREW_SCHEDULER=crew).
+    Memory is bounded and configured by crew_memory (JOB_CREW_MEMORY, JOB_CREW_MEMORY_FEATURES).
+    """
+    return BudgetedCrew(
+        agents=list(plan.agents),
+        tasks=[task for _, task in plan.scheduled()],
+        verbose=True,
+        memory=crew_memory(run_id, llm=pooled_llm()),
+        memory_tools=MEMORY_TOOLS,
+        context_token_budget=CONTEXT_TOKEN_BUDGET
+    )
+
+def remember_task_outputs(plan):
+    """Persist freshly generated research reports and candidate profiles for later runs"""
+    for name, key in plan.cache_keys.items():
+        task = plan.task(name)
+        if name in plan.cached or task.output is None or not task.output.raw:
+            continue
+        if TASK_CACHES[name].get_entry(key) is None:
+            TASK_CACHES[name].set(key, task.output.raw)
+
+def run_crew(inputs, agents=None, workspace=None, prefilled=None, only=None, regenerate=(), credentials=None):
+    """
+    Run the full pipeline for one set of inputs and return the final task's output.
+    Output files and the structured event log are written to the run's workspace
+    (a new one unless given); live progress is available via events.get_run_events(run_id).
+    The job posting and GitHub profile are pre-processed (job_posting, github_ingest) before any agent starts.
+    `prefilled` and `only` are passed to prepare_run, e.g. to share one stage across batch runs.
+    With the DAG scheduler, tasks whose inputs and upstream outputs are unchanged since an
+    earlier run are reused (TaskMemo); name tasks in `regenerate` to force them to run again.
+    Repeated LLM requests are answered from the response cache (llm_cache), except in runs that regenerate.
+    `credentials` (default: the process environment's) are used for every API call the run makes.
+    """
+    with credentials_scope(credentials or current_credentials()) as credentials:
+        return _run_crew(inputs, agents, workspace, prefilled, only, regenerate, credentials)
+
+def _run_crew(inputs, agents, workspace, prefilled, only, regenerate, credentials):
+    workspace = workspace or RunWorkspace()
+    inputs, github_documents = prefetch_inputs(dict(inputs, run_id=workspace.run_id))
+    os.makedirs(workspace.path, exist_ok=True)
+    event_log = start_run_events(workspace.run_id, workspace.path_for(EVENT_LOG_FILE))
+
+    # The uploaded resume lives in the workspace; it is part of the candidate profile's cache key
+    plan = prepare_run(inputs, agents, prefilled, only, workspace.read(RESUME_FILE), regenerate, github_documents, credentials)
+    track_tasks(event_log, plan.named_tasks)
+    event_log.record(RUN_STARTED, tasks=[name for name, _ in plan.scheduled()], scheduler=SCHEDULER)
+    for name in plan.cached:
+        event_log.record(TASK_CACHED, task=name)
+
+    with llm_cache_scope(refresh=bool(regenerate)) as llm_cache:
+        try:
+            if not plan.scheduled():
+                result = plan.tasks[-1].output
+            elif SCHEDULER == "crew":
+                crew = build_crew(plan, workspace.run_id)
+                try:
+                    result = crew.kickoff(inputs=inputs)
+                finally:
+                    close_crew_memory(crew.memory)
+            else:
+                memo = TaskMemo(regenerate=regenerate, on_hit=lambda name: event_log.record(TASK_CACHED, task=name))
+                # Same memory as build_crew gives the crew, attached to this run's agent copies
+                memory = crew_memory(workspace.run_id, llm=pooled_llm())
+                attach_memory(plan.agents, memory)
+                try:
+                    result = run_task_graph(plan.named_tasks, inputs, skip=plan.cached, context_budget=CONTEXT_TOKEN_BUDGET, memo=memo)
+                finally:
+                    close_crew_memory(memory)
+        except Exception as e:
+            finish_run_events(event_log, status="failed", error=str(e), llm_cache=llm_cache.to_dict())
+            raise
+    remember_task_outputs(plan)
+    finish_run_events(event_log, status="succeeded", llm_cache=llm_cache.to_dict())
+    return result
@@ -0,0 +1,114 @@
+# Prompt budgeting: token measurement, compact task prompts and upstream context trimming
+import os
+import re
+from crewai import Crew
+from app_utils import model_name
+
+# "full" keeps the task prompts as written; "compact" strips layout and repeated placeholders
+PROMPT_VARIANT = os.getenv("JOB_CREW_PROMPT_VARIANT", "full")
+# Maximum tokens of upstream task output passed to a task as context (unset = unlimited)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("JOB_CREW_CONTEXT_BUDGET", 0)) or None
+
+# Separator CrewAI puts between upstream task outputs in a task's context
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+
+_EMOJI = re.compile("[\U0001F000-\U0001FAFF☀-➿⬀-⯿️]")
+_TABLE_RULE = re.compile(r"^\|?[\s:|-]+\|[\s:|-]*$")
+_encodings = {}
+
+def count_tokens(text, model=None):
+    """Token count for text, using tiktoken when available and ~4 characters per token otherwise"""
+    model = model or model_name()
+    if model not in _encodings:
+        try:
+            import tiktoken
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encodings[model] = None
+    encoding = _encodings[model]
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def compact_prompt(text):
+    """
+    Compact variant of a task prompt that keeps every instruction and output section.
+    Drops indentation, blank lines, decorative emoji, table rule rows and placeholder
+    lines that only repeat the previous one with a different number.
+    """
+    lines = []
+    previous_shape = None
+    for line in text.splitlines():
+        line = _EMOJI.sub("", line).strip()
+        line = re.sub(r"[ \t]{2,}", " ", line)
+        if not line or _TABLE_RULE.match(line):
+            continue
+        # "2. [Responsibility 2 as listed]" repeats "1. [Responsibility 1 as listed]"
+        shape = re.sub(r"\d+", "#", line)
+        if shape == previous_shape and "[" in line:
+            continue
+        previous_shape = shape
+        lines.append(line)
+    return "\n".join(lines)
+
+def apply_prompt_variant(tasks, variant=None):
+    """Switch the tasks' description and expected_output to the given template variant"""
+    variant = variant or PROMPT_VARIANT
+    if variant == "compact":
+        for task in tasks:
+            task.description = compact_prompt(task.description)
+            task.expected_output = compact_prompt(task.expected_output)
+    return tasks
+
+def trim_to_budget(text, budget, model=None):
+    """
+    Trim upstream output to roughly `budget` tokens while keeping every markdown section.
+    Each section keeps its heading and as many leading lines as its share of the budget allows.
+    """
+    if budget is None or count_tokens(text, model) <= budget:
+        return text
+    sections = re.split(r"\n(?=[ \t]*#{1,3} )", text)
+    allowance = max(budget // max(len(sections), 1), 1)
+    trimmed = []
+    for section in sections:
+        kept = []
+        used = 0
+        for line in section.splitlines():
+            cost = count_tokens(line, model) + 1
+            if kept and used + cost > allowance:
+                kept.append("[...]")
+                break
+            kept.append(line)
+            used += cost
+        trimmed.append("\n".join(kept))
+    return "\n".join(trimmed)
+
+def task_prompt_tokens(task, context="", model=None):
+    """Tokens of the static part of a task prompt plus the context it receives"""
+    return (count_tokens(task.description, model) + count_tokens(task.expected_output, model)
+            + (count_tokens(context, model) if context else 0))
+
+class BudgetedCrew(Crew):
+    """
+    Crew that trims the aggregated upstream context of each task to context_token_budget tokens.
+    With memory_tools=False, agents get no recall/remember tools even when the crew has memory.
+    """
+
+    context_token_budget: int | None = None
+    memory_tools: bool = True
+
+    def _add_memory_tools(self, tools, memory):
+        if not self.memory_tools:
+            return tools
+        return Crew._add_memory_tools(self, tools, memory)
+
+    def _get_context(self, task, task_outputs):
+        context = Crew._get_context(task, task_outputs)
+        if not context or self.context_token_budget is None:
+            return context
+        outputs = context.split(CONTEXT_DIVIDER)
+        share = max(self.context_token_budget // len(outputs), 1)
+        return CONTEXT_DIVIDER.join(trim_to_budget(output, share) for output in outputs)
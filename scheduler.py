@@ -0,0 +1,103 @@
+# Dependency-aware execution of the crew's tasks: independent tasks run concurrently
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from prompt_budget import trim_to_budget, CONTEXT_DIVIDER
+
+def task_dependencies(named_tasks):
+    """
+    Map each task name to the names of the tasks in its `context` list.
+    A task without an explicit context list has no dependencies.
+    """
+    names_by_id = {id(task): name for name, task in named_tasks}
+    dependencies = {}
+    for name, task in named_tasks:
+        context = task.context if isinstance(task.context, list) else []
+        dependencies[name] = [names_by_id[id(upstream)] for upstream in context if id(upstream) in names_by_id]
+    return dependencies
+
+def critical_path(dependencies, durations):
+    """Length of the longest dependency chain given per-task durations"""
+    finish = {}
+
+    def finish_time(name):
+        if name not in finish:
+            finish[name] = durations.get(name, 0) + max((finish_time(dep) for dep in dependencies[name]), default=0)
+        return finish[name]
+
+    return max((finish_time(name) for name in dependencies), default=0)
+
+def interpolate_task(task, inputs):
+    """Fill {placeholders} in a task's prompt and output_file, as Crew.kickoff would"""
+    if hasattr(task, "interpolate_inputs_and_add_conversation_history"):
+        task.interpolate_inputs_and_add_conversation_history(inputs)
+    else:
+        task.interpolate_inputs(inputs)
+
+def _execute(task, upstream_tasks, context_budget):
+    outputs = [upstream.output.raw for upstream in upstream_tasks if upstream.output is not None]
+    if context_budget and outputs:
+        share = max(context_budget // len(outputs), 1)
+        outputs = [trim_to_budget(output, share) for output in outputs]
+    return task.execute_sync(agent=task.agent, context=CONTEXT_DIVIDER.join(outputs), tools=task.agent.tools)
+
+def run_task_graph(named_tasks, inputs, skip=(), max_workers=None, context_budget=None, memo=None):
+    """
+    Execute (name, task) pairs as a DAG on a thread pool.
+    A task starts as soon as every task in its context has an output, so independent
+    tasks overlap and wall time approaches the critical path instead of the sum.
+    Tasks sharing an agent still run one at a time, since an agent executes one task at a time.
+    Tasks named in `skip` must already carry an output (e.g. from a cache).
+    `memo` (optional) is consulted once a task's upstream outputs are known:
+    memo.lookup(name, task, upstream) attaches a stored output and returns True to skip the task,
+    and memo.store(name, task, upstream) is called after each task that ran.
+    Returns the output of the last task.
+    """
+    tasks = dict(named_tasks)
+    dependencies = task_dependencies(named_tasks)
+    done = set(skip)
+    pending = [name for name, _ in named_tasks if name not in done]
+    for name in pending:
+        interpolate_task(tasks[name], inputs)
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks), thread_name_prefix="crew-task") as pool:
+        while pending or running:
+            # Repeat until nothing new is ready, since memo hits can unblock further tasks
+            ready = True
+            while ready:
+                busy = {id(tasks[running_name].agent) for running_name in running.values()}
+                ready = [name for name in pending
+                         if all(dep in done for dep in dependencies[name]) and id(tasks[name].agent) not in busy]
+                for name in ready:
+                    if id(tasks[name].agent) in busy:
+                        # Another task of this round took the agent
+                        continue
+                    pending.remove(name)
+                    upstream = [tasks[dep] for dep in dependencies[name]]
+                    if memo is not None and memo.lookup(name, tasks[name], upstream):
+                        done.add(name)
+                        continue
+                    # Each task runs in a copy of the caller's context (e.g. its LLM cache scope)
+                    context = contextvars.copy_context()
+                    running[pool.submit(context.run, _execute, tasks[name], upstream, context_budget)] = name
+                    busy.add(id(tasks[name].agent))
+            if not running:
+                if pending:
+                    raise ValueError(f"Task dependencies cannot be satisfied: {pending}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                done.add(name)
+                if memo is not None:
+                    memo.store(name, tasks[name], [tasks[dep] for dep in dependencies[name]])
+
+    return tasks[named_tasks[-1][0]].output
@@ -0,0 +1,132 @@
+# Cached fetching of job posting pages shared by all runs and users
+import os
+import re
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from cache import DiskCache, SingleFlight, sha256_hex
+
+# Click IDs that never change page content (utm_* parameters are dropped too); generic names such as
+# ref or src select content on some sites, so they are kept
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid"}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+def normalize_url(url):
+    """Canonical form of a URL so equivalent links share one cache entry"""
+    url = url.strip()
+    if "://" not in url and not url.startswith("//"):
+        # Scheme-less ("example.com/jobs"): parse the host as a network location, not as the path
+        url = "//" + url
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+class ScrapeCache:
+    """
+    Content-addressed cache in front of job posting fetches.
+    Normalized URLs map to a content digest and its validators (ETag / Last-Modified);
+    page bodies are stored once per digest. Entries younger than the TTL are served with
+    no network round-trip; older entries are revalidated with a conditional GET.
+    Concurrent fetches of the same URL share one request.
+    """
+
+    def __init__(self, ttl=6 * 60 * 60, max_bytes=64 * 1024 * 1024, timeout=15, cache_dir=None):
+        self.store = DiskCache("scrape", max_bytes=max_bytes, cache_dir=cache_dir)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._in_flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "coalesced": self._in_flight.coalesced,
+                "bytes": self.store.total_bytes(),
+            }
+
+    def fetch(self, url):
+        """Return the page body for url, from cache when possible"""
+        key = "url:" + normalize_url(url)
+        return self._in_flight.do(key, self._fetch, url, key)
+
+    def _fetch(self, url, key):
+        entry = self.store.get_entry(key)
+        cached = self.store.get_entry("blob:" + entry[0]) if entry else None
+
+        validators = {}
+        if cached is not None:
+            if time.time() - entry[2] <= self.ttl:
+                self._count("hits")
+                return cached[0]
+            record = json.loads(entry[1] or "{}")
+            if record.get("etag"):
+                validators["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                validators["If-Modified-Since"] = record["last_modified"]
+
+        try:
+            response = self._request(url, validators)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and validators:
+                # Server confirmed our copy is current: restart its TTL
+                self.store.touch(key)
+                self._count("revalidations")
+                self._count("hits")
+                return cached[0]
+            raise
+
+        self._count("misses")
+        with response:
+            raw = response.read()
+            charset = response.headers.get_content_charset() or "utf-8"
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        body = raw.decode(charset, errors="replace")
+        digest = sha256_hex(raw)
+        self.store.set("blob:" + digest, body)
+        self.store.set(key, digest, meta=json.dumps({"etag": etag, "last_modified": last_modified}))
+        return body
+
+    def _request(self, url, extra_headers=None):
+        headers = dict(DEFAULT_HEADERS)
+        headers.update(extra_headers or {})
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+
+def html_to_text(html):
+    """Same text extraction ScrapeWebsiteTool applies to a fetched page"""
+    from bs4 import BeautifulSoup
+    text = BeautifulSoup(html, "html.parser").get_text(" ")
+    text = re.sub("[ \t]+", " ", text)
+    text = re.sub("\\s+\n\\s+", "\n", text)
+    return text
+
+# Shared by every scrape tool in the process
+SCRAPE_CACHE = ScrapeCache(ttl=int(os.getenv("JOB_CREW_SCRAPE_TTL", 6 * 60 * 60)))
@@ -0,0 +1,209 @@
+# Local semantic search over the candidate's resume and GitHub documents
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from cache import CACHE_DIR, sha256_hex
+from credentials import current_credentials
+
+# "local" (sentence-transformers if installed, else hashing), "hashing" or "openai"
+EMBEDDINGS = os.getenv("JOB_CREW_EMBEDDINGS", "local")
+INDEX_DIR = os.path.join(CACHE_DIR, "semantic_index")
+# Oldest indexes beyond this count are deleted when a new one is built
+MAX_INDEXES = int(os.getenv("JOB_CREW_MAX_INDEXES", 200))
+
+EMBEDDINGS_FILE = "embeddings.f32"
+CHUNKS_FILE = "chunks.json"
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+def chunk_text(text, max_chars=800, overlap=120):
+    """Split text into chunks of whole paragraphs (long paragraphs are windowed with overlap)"""
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        while len(paragraph) > max_chars:
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars - overlap:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+class HashingEmbedder:
+    """Dependency-free local embedder: signed feature hashing of word unigrams and bigrams"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                matrix[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return _normalize(matrix)
+
+class SentenceTransformerEmbedder:
+    """Local neural embedder (sentence-transformers), loaded once per process"""
+
+    def __init__(self, model="all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model)
+        self.name = f"st-{model}"
+
+    def embed(self, texts):
+        return _normalize(np.asarray(self.model.encode(list(texts), batch_size=32), dtype=np.float32))
+
+class OpenAIEmbedder:
+    """OpenAI embeddings API with the given key and base URL (e.g. mock_services for offline runs)"""
+
+    def __init__(self, model="text-embedding-3-small", api_key=None, base_url=None):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.model = model
+        self.name = f"openai-{model}"
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), 128):
+            response = self.client.embeddings.create(model=self.model, input=list(texts[start:start + 128]))
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+def get_embedder(kind=None):
+    """Process-wide embedder for the configured backend (one per API key for the OpenAI backend)"""
+    kind = kind or EMBEDDINGS
+    if kind == "openai":
+        credentials = current_credentials()
+        key = ("openai", credentials.fingerprint())
+        with _embedders_lock:
+            if key not in _embedders:
+                _embedders[key] = OpenAIEmbedder(api_key=credentials.openai_api_key, base_url=credentials.openai_base_url)
+            return _embedders[key]
+    with _embedders_lock:
+        if kind not in _embedders:
+            if kind == "local":
+                try:
+                    _embedders[kind] = SentenceTransformerEmbedder()
+                except Exception as e:
+                    print(f"sentence-transformers not available, using hashing embeddings: {e}")
+                    _embedders[kind] = HashingEmbedder()
+            else:
+                _embedders[kind] = HashingEmbedder()
+        return _embedders[kind]
+
+class SemanticIndex:
+    """
+    Cosine-similarity index over document chunks.
+    Embeddings are L2-normalized float32 rows in a memory-mapped file, so search is a single
+    matrix-vector product and opening an existing index reads almost nothing from disk.
+    """
+
+    def __init__(self, path, embedder):
+        self.path = path
+        self.embedder = embedder
+        with open(os.path.join(path, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.chunks = meta["chunks"]
+        self.sources = meta["sources"]
+        self.embeddings = np.memmap(os.path.join(path, EMBEDDINGS_FILE), dtype=np.float32, mode="r",
+                                    shape=(len(self.chunks), meta["dim"])) if self.chunks else np.zeros((0, meta["dim"]), np.float32)
+        self._query_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _query_vector(self, query):
+        with self._lock:
+            if query in self._query_cache:
+                self._query_cache.move_to_end(query)
+                return self._query_cache[query]
+        vector = self.embedder.embed([query])[0]
+        with self._lock:
+            self._query_cache[query] = vector
+            if len(self._query_cache) > 256:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def search(self, query, k=5):
+        """[(score, source, chunk)] for the k chunks most similar to the query"""
+        if not self.chunks:
+            return []
+        scores = self.embeddings @ self._query_vector(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.sources[i], self.chunks[i]) for i in top]
+
+def _prune_indexes(root, keep):
+    try:
+        entries = [os.path.join(root, name) for name in os.listdir(root)]
+    except FileNotFoundError:
+        return
+    entries = sorted((path for path in entries if os.path.isdir(path)), key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+_build_lock = threading.Lock()
+
+def build_index(documents, embedder=None, root=None):
+    """
+    Return the index for [(source, text)] documents, building it only if this exact set of
+    documents has not been indexed with this embedder before.
+    """
+    embedder = embedder or get_embedder()
+    root = root or INDEX_DIR
+    digest = sha256_hex(embedder.name, *[part for source, text in documents for part in (source, text)])
+    path = os.path.join(root, digest)
+    if os.path.exists(os.path.join(path, CHUNKS_FILE)):
+        os.utime(path)
+        return SemanticIndex(path, embedder)
+
+    with _build_lock:
+        if not os.path.exists(os.path.join(path, CHUNKS_FILE)):
+            chunks, sources = [], []
+            for source, text in documents:
+                for chunk in chunk_text(text):
+                    chunks.append(chunk)
+                    sources.append(source)
+            matrix = embedder.embed(chunks) if chunks else np.zeros((0, 1), np.float32)
+
+            staging = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            os.makedirs(staging, exist_ok=True)
+            if chunks:
+                stored = np.memmap(os.path.join(staging, EMBEDDINGS_FILE), dtype=np.float32, mode="w+", shape=matrix.shape)
+                stored[:] = matrix
+                stored.flush()
+                del stored
+            with open(os.path.join(staging, CHUNKS_FILE), "w", encoding="utf-8") as f:
+                json.dump({"dim": int(matrix.shape[1]), "embedder": embedder.name, "built": time.time(),
+                           "chunks": chunks, "sources": sources}, f)
+            try:
+                os.replace(staging, path)
+            except OSError:
+                # Another process finished the same index first
+                shutil.rmtree(staging, ignore_errors=True)
+            _prune_indexes(root, MAX_INDEXES)
+    return SemanticIndex(path, embedder)
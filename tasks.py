@@ -1,10 +1,37 @@
 from crewai import Task
+from crewai.tasks.task_output import TaskOutput
 from agents import create_agents
+from workspace import workspace_output_file, TAILORED_RESUME_FILE, INTERVIEW_PREPARATION_FILE, INTERVIEW_RESUME_FILE
+
+# Names of the tasks returned by agent_tasks(), in the same order; the interview guide, last, is a run's final output
+TASK_NAMES = ("research_task", "profile_task", "resume_strategy_task", "interview_resume_task", "interview_preparation_task")
+
+# Bump a task's version whenever its description or expected_output changes,
+# so cached outputs produced by the old prompt are no longer reused
+PROMPT_VERSIONS = {
+    "research_task": "2",
+    "profile_task": "2",
+    "resume_strategy_task": "1",
+    "interview_resume_task": "1",
+    "interview_preparation_task": "1",
+}
+
+def prefill_task_output(task, raw):
+    """Attach a previously computed output so downstream tasks can use it as context without re-running it"""
+    task.output = TaskOutput(
+        description=task.description,
+        expected_output=task.expected_output,
+        raw=raw,
+        agent=task.agent.role if task.agent is not None else "",
+    )
+    return task
 
-def agent_tasks():
+def agent_tasks(agents=None, credentials=None):
     
-    # Create agents inside the function after API keys are set
-    researcher, profiler, resume_strategist, interview_preparer = create_agents()
+    # Reuse the shared agents (for these credentials) so the tasks and the Crew reference the same instances
+    if agents is None:
+        agents = create_agents(credentials)
+    researcher, profiler, resume_strategist, interview_preparer = agents
 
     # Task 1: Deep Job Requirements Intelligence Analysis
     research_task = Task(
@@ -13,6 +40,9 @@ def agent_tasks():
 
             **PRIMARY MISSION**: Extract and analyze every detail from the job posting URL ({job_posting_url}) to create a complete intelligence profile that enables perfect candidate-job alignment.
 
+            **PRE-PROCESSED JOB POSTING** (boilerplate removed, sections extracted; scrape the URL only if it is missing or incomplete):
+{job_posting}
+
             **SYSTEMATIC ANALYSIS FRAMEWORK**:
 
             1. **TECHNICAL REQUIREMENTS EXTRACTION**:
@@ -168,6 +198,7 @@ def agent_tasks():
                - Note awards, recognitions, professional development activities
 
             2. **GITHUB PROFILE DEEP TECHNICAL ANALYSIS**: {github_url}
+               - Start from the pre-fetched GitHub summary below; use tools only for details it does not cover
                - Systematically review ALL repositories for comprehensive technology usage
                - Extract programming languages with usage frequency and complexity assessment
                - Identify frameworks, libraries, and development tools implemented
@@ -176,6 +207,9 @@ def agent_tasks():
                - Assess code quality indicators: documentation, testing, structure
                - Document collaboration evidence: contributors, issues, pull requests
 
+               **Pre-fetched GitHub summary**:
+{github_summary}
+
             3. **PERSONAL WRITEUP NARRATIVE ANALYSIS**: {personal_writeup}
                - Extract career goals, professional aspirations, and motivation drivers
                - Identify self-described strengths, skills, and competencies
@@ -607,7 +641,7 @@ def agent_tasks():
 
             **FINAL AUTHENTICITY STATEMENT**: This optimized resume represents a strategic enhancement of the candidate's documented experience, skills, and achievements. Every statement, metric, and claim is directly sourced from candidate-provided materials. No fictional content, inflated achievements, or unsubstantiated claims have been added. All optimization decisions maintain complete transparency and source traceability.**"""
         ),
-        output_file= "tailored_resume.md",
+        output_file= workspace_output_file(TAILORED_RESUME_FILE),
         context=[research_task, profile_task],
         agent = resume_strategist
     )
@@ -847,13 +881,55 @@ def agent_tasks():
 
             **AUTHENTICITY COMMITMENT**: Every example, story, and talking point in this preparation guide is derived exclusively from the candidate's documented experiences, achievements, and background. No fictional scenarios, inflated capabilities, or unsubstantiated claims have been included. All preparation recommendations maintain complete transparency and can be traced to original candidate materials.**"""
         ),
-        output_file= "interview_preparation.md",
+        output_file= workspace_output_file(INTERVIEW_PREPARATION_FILE),
+        # Built from the posting and the candidate's own materials, so it runs alongside resume writing
         context= [
             research_task,
+            profile_task
+        ],
+        agent = interview_preparer
+    )
+
+    #Task 5: Tailored Resume Interview Walkthrough
+    interview_resume_task = Task(
+        description=(
+            """PREPARE THE CANDIDATE TO BACK EVERY CLAIM ON THE TAILORED RESUME
+
+            **PRIMARY MISSION**: The interviewer will read the tailored resume, so the candidate must be ready to back every claim it makes. Walk through the tailored resume and prepare short, evidence-based talking points for the claims an interviewer is likely to probe.
+
+            **WALKTHROUGH STEPS**:
+            1. Take each section of the tailored resume in order (summary, skills, experience, projects)
+            2. For every claim an interviewer is likely to probe, write short talking points and name the documented evidence behind it (project, role, metric)
+            3. Flag claims whose evidence is thin, and how to discuss them honestly
+            4. List the job-posting keywords the resume emphasizes so the candidate uses the same terms in interviews
+
+            **CRITICAL AUTHENTICITY PROTOCOLS**:
+            - Use ONLY experiences, skills and achievements documented in the candidate's materials
+            - Keep it short: this is a companion to the interview preparation guide, not a second guide
+            """
+        ),
+        expected_output=(
+            """**TAILORED RESUME INTERVIEW WALKTHROUGH**
+
+            ## 📄 RESUME CLAIMS TO BE READY FOR
+
+            | Resume Section | Claim | Evidence | Talking Points |
+            |----------------|-------|----------|----------------|
+            | [Section] | [Claim as worded on the resume] | [Documented project, role or metric] | [Short points] |
+
+            ## 🔑 RESUME KEYWORDS TO USE IN INTERVIEWS
+            - **[Keyword]**: [Where it appears on the resume and which experience demonstrates it]
+
+            ## ⚠️ CLAIMS NEEDING EXTRA PREPARATION
+            - **[Claim]**: [Why an interviewer may probe it and the documented evidence to cite]"""
+        ),
+        output_file= workspace_output_file(INTERVIEW_RESUME_FILE),
+        # Needs only the tailored resume and the candidate's materials, so it runs alongside the interview guide
+        context= [
             profile_task,
             resume_strategy_task
         ],
         agent = interview_preparer
     )
 
-    return research_task, profile_task, resume_strategy_task, interview_preparation_task
\ No newline at end of file
+    return research_task, profile_task, resume_strategy_task, interview_resume_task, interview_preparation_task
\ No newline at end of file
@@ -1,26 +1,141 @@
 # Tools for CrewAI agents with fallback for missing packages
 import warnings
-import os
+import threading
+from credentials import RunCredentials
+from scraping import SCRAPE_CACHE
+from job_posting import page_text
 warnings.filterwarnings("ignore")
 
-def agent_tools():
+try:
+    from crewai_tools import ScrapeWebsiteTool
+
+    class CachedScrapeWebsiteTool(ScrapeWebsiteTool):
+        """
+        ScrapeWebsiteTool that reads pages through the shared on-disk scrape cache.
+        Job postings come back as the structured document from job_posting, other pages without boilerplate.
+        """
+
+        def _run(self, **kwargs):
+            website_url = kwargs.get("website_url", self.website_url)
+            return page_text(SCRAPE_CACHE.fetch(website_url), website_url)
+
+except ImportError:
+    CachedScrapeWebsiteTool = None
+
+try:
+    import requests
+    from crewai_tools import SerperDevTool
+
+    class KeyedSerperDevTool(SerperDevTool):
+        """
+        SerperDevTool that sends its own API key instead of reading SERPER_API_KEY from os.environ,
+        so tools built for different sessions never share a key.
+        """
+
+        api_key: str = ""
+
+        def _make_api_request(self, search_query, search_type):
+            payload = {"q": search_query, "num": self.n_results}
+            for field, value in (("gl", self.country), ("location", self.location), ("hl", self.locale)):
+                if value:
+                    payload[field] = value
+            response = requests.post(self._get_search_url(search_type), json=payload, timeout=10,
+                                     headers={"X-API-KEY": self.api_key, "content-type": "application/json"})
+            response.raise_for_status()
+            results = response.json()
+            if not results:
+                raise ValueError("Empty response from Serper API")
+            return dict(results)
+
+except ImportError:
+    KeyedSerperDevTool = None
+
+try:
+    from typing import Any
+    from pydantic import BaseModel, Field
+    from crewai.tools import BaseTool
+
+    class CandidateSearchSchema(BaseModel):
+        search_query: str = Field(..., description="What to look for in the candidate's resume and GitHub READMEs")
+
+    class CandidateSearchTool(BaseTool):
+        """
+        Semantic search over the current run's resume and GitHub documents (see semantic_index).
+        The shared instance has no index; each run binds its own copy via bind_candidate_index().
+        """
+
+        name: str = "Search the candidate's resume and GitHub documents"
+        description: str = "Semantic search over the candidate's resume and GitHub READMEs; returns the most relevant passages."
+        args_schema: type[BaseModel] = CandidateSearchSchema
+        index: Any = None
+        top_k: int = 5
+
+        def _run(self, search_query, **kwargs):
+            if self.index is None:
+                return "No resume or GitHub documents were provided for this application."
+            results = self.index.search(search_query, k=self.top_k)
+            if not results:
+                return "No matching passages found."
+            return "\n\n".join(f"[{source}] (score {score:.2f})\n{chunk}" for score, source, chunk in results)
+
+except ImportError:
+    CandidateSearchTool = None
+
+def bind_candidate_index(agents, index):
+    """Give each agent holding the shared CandidateSearchTool a copy bound to this run's index"""
+    if CandidateSearchTool is None:
+        return agents
+    for agent in agents:
+        if any(isinstance(tool, CandidateSearchTool) for tool in agent.tools or []):
+            agent.tools = [
+                CandidateSearchTool(index=index) if isinstance(tool, CandidateSearchTool) else tool
+                for tool in agent.tools
+            ]
+    return agents
+
+# Process-wide tool registry: one set of tool instances per credentials fingerprint
+_TOOL_REGISTRY = {}
+_TOOL_REGISTRY_LOCK = threading.Lock()
+
+def agent_tools(credentials=None):
+    """Return the shared tool instances for these credentials (default: the process environment's)"""
+    credentials = credentials or RunCredentials.from_env()
+    fingerprint = credentials.fingerprint()
+    with _TOOL_REGISTRY_LOCK:
+        if fingerprint not in _TOOL_REGISTRY:
+            tools = _build_agent_tools(credentials)
+            # Don't remember failed builds so a later retry can succeed
+            if all(tool is None for tool in tools):
+                return tools
+            _TOOL_REGISTRY[fingerprint] = tools
+        return _TOOL_REGISTRY[fingerprint]
+
+def clear_tool_registry(credentials=None):
+    """Drop the cached tool instances for these credentials, or all of them (e.g. after API keys are reset)"""
+    with _TOOL_REGISTRY_LOCK:
+        if credentials is None:
+            _TOOL_REGISTRY.clear()
+        else:
+            _TOOL_REGISTRY.pop(credentials.fingerprint(), None)
+
+def _build_agent_tools(credentials):
 
     try:
-        from crewai_tools import (
-        FileReadTool,
-        ScrapeWebsiteTool,
-        MDXSearchTool,
-        SerperDevTool)
-        
-        # Check if required environment variables are set
-        if not os.getenv("OPENAI_API_KEY"):
-            print("OPENAI_API_KEY not set, using fallback tools")
+        from crewai_tools import FileReadTool
+
+        # Check if the required keys were provided
+        if not credentials.openai_api_key:
+            print("OpenAI API key not set, using fallback tools")
             return None, None, None, None
-            
-        search_tool = SerperDevTool()
-        scrape_tool = ScrapeWebsiteTool()
+
+        search_options = {"api_key": credentials.serper_api_key or ""}
+        if credentials.serper_base_url:
+            search_options["base_url"] = credentials.serper_base_url
+        search_tool = KeyedSerperDevTool(**search_options)
+        scrape_tool = CachedScrapeWebsiteTool()
         read_resume_tool = FileReadTool()
-        semantic_search_resume_tool = MDXSearchTool()
+        # Local index built once per document set, instead of embedding through the API on every query
+        semantic_search_resume_tool = CandidateSearchTool() if CandidateSearchTool is not None else None
 
         return search_tool, scrape_tool, read_resume_tool, semantic_search_resume_tool
 
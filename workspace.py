@@ -0,0 +1,85 @@
+# Per-run workspaces so concurrent sessions never share resume or output files
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+
+WORKSPACE_ROOT = os.getenv("JOB_CREW_WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "job_application_crew_runs"))
+# Workspaces untouched for longer than this are deleted
+WORKSPACE_TTL = int(os.getenv("JOB_CREW_WORKSPACE_TTL", 24 * 60 * 60))
+# Minimum seconds between expiry sweeps
+CLEANUP_INTERVAL = 10 * 60
+
+TAILORED_RESUME_FILE = "tailored_resume.md"
+INTERVIEW_PREPARATION_FILE = "interview_preparation.md"
+INTERVIEW_RESUME_FILE = "interview_resume_walkthrough.md"
+RESUME_FILE = "resume.md"
+EVENT_LOG_FILE = "events.jsonl"
+
+_last_cleanup = 0.0
+_cleanup_lock = threading.Lock()
+
+def workspace_output_file(filename):
+    """
+    output_file template for a Task, resolved per run from the 'run_id' kickoff input.
+    The template variable also keeps CrewAI from stripping the leading slash of absolute paths.
+    """
+    return os.path.join(WORKSPACE_ROOT, "{run_id}", filename)
+
+class RunWorkspace:
+    """Private directory for one crew run, identified by its run ID"""
+
+    def __init__(self, run_id=None, root=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.root = root or WORKSPACE_ROOT
+        self.path = os.path.join(self.root, self.run_id)
+
+    def path_for(self, filename):
+        return os.path.join(self.path, filename)
+
+    def write(self, filename, content):
+        """Write a text file into the workspace and return its path"""
+        os.makedirs(self.path, exist_ok=True)
+        file_path = self.path_for(filename)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return file_path
+
+    def read(self, filename):
+        """Return a text file's contents, or None if it doesn't exist"""
+        file_path = self.path_for(filename)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+def cleanup_expired_workspaces(ttl=WORKSPACE_TTL, root=None):
+    """Delete workspaces whose last modification is older than ttl seconds; returns how many were removed"""
+    root = root or WORKSPACE_ROOT
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+def maybe_cleanup_expired_workspaces():
+    """Run the expiry sweep at most once per CLEANUP_INTERVAL per process"""
+    global _last_cleanup
+    with _cleanup_lock:
+        if time.time() - _last_cleanup < CLEANUP_INTERVAL:
+            return 0
+        _last_cleanup = time.time()
+    return cleanup_expired_workspaces()